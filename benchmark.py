@@ -0,0 +1,1471 @@
+# FWEA-I Backend Benchmarks
+# Run from the repository root: python benchmark.py <name> [options]
+
+import argparse
+import asyncio
+import importlib
+import multiprocessing
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+SAMPLE_RATE = 44100
+
+
+def load_backend():
+    """Import fwea-final-backend.py (hyphenated filename, so not a plain import) with models warm"""
+    backend = importlib.import_module("fwea-final-backend")
+    backend.models.ensure_loaded()
+    return backend
+
+
+def synthetic_track(minutes: float, sr: int = SAMPLE_RATE, seed: int = 0) -> np.ndarray:
+    """Deterministic mono test signal: low bass, mid 'vocal' tones and noise"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(minutes * 60 * sr), dtype=np.float32) / sr
+    signal = (
+        0.3 * np.sin(2 * np.pi * 80 * t)
+        + 0.2 * np.sin(2 * np.pi * 440 * t) * (1 + np.sin(2 * np.pi * 0.5 * t))
+        + 0.05 * rng.standard_normal(t.shape[0]).astype(np.float32)
+    )
+    return signal.astype(np.float32)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+# ---------------------------------------------------------------------------
+# Stem separation: per-bin Python loop vs broadcast band gains
+# ---------------------------------------------------------------------------
+
+def legacy_stem_separation(audio_data: np.ndarray, sr: int):
+    """The original nested-loop mask construction, kept here as the reference"""
+    import librosa
+
+    stft = librosa.stft(audio_data, n_fft=2048, hop_length=512)
+    magnitude = np.abs(stft)
+    phase = np.angle(stft)
+
+    vocal_mask = np.zeros_like(magnitude)
+    instrumental_mask = np.zeros_like(magnitude)
+
+    freq_bins = magnitude.shape[0]
+    vocal_freq_start = int(200 * freq_bins / (sr / 2))
+    vocal_freq_end = int(2000 * freq_bins / (sr / 2))
+
+    for f in range(freq_bins):
+        for t in range(magnitude.shape[1]):
+            mag = magnitude[f, t]
+            if vocal_freq_start <= f <= vocal_freq_end:
+                vocal_mask[f, t] = mag * 0.8
+                instrumental_mask[f, t] = mag * 0.3
+            else:
+                vocal_mask[f, t] = mag * 0.2
+                instrumental_mask[f, t] = mag * 0.9
+
+    vocals = librosa.istft(vocal_mask * np.exp(1j * phase), hop_length=512)
+    instrumental = librosa.istft(instrumental_mask * np.exp(1j * phase), hop_length=512)
+    return vocals, instrumental
+
+
+def bench_separation(args):
+    backend = load_backend()
+
+    print("🎵 Stem separation benchmark (legacy loop vs BandGainSeparator)")
+    for minutes in args.minutes:
+        audio = synthetic_track(minutes)
+        separator = backend.BandGainSeparator(SAMPLE_RATE)
+
+        (vocals, instrumental), fast_s = timed(separator.separate, audio)
+        line = f"  {minutes:>4g} min: vectorized {fast_s:8.2f}s"
+
+        if not args.skip_legacy:
+            (ref_vocals, ref_instrumental), legacy_s = timed(legacy_stem_separation, audio, SAMPLE_RATE)
+            max_err = max(
+                float(np.max(np.abs(vocals - ref_vocals))),
+                float(np.max(np.abs(instrumental - ref_instrumental)))
+            )
+            line += f" | legacy {legacy_s:8.2f}s | speedup {legacy_s / fast_s:7.1f}x | max abs diff {max_err:.2e}"
+            assert np.allclose(vocals, ref_vocals, atol=1e-5) and np.allclose(instrumental, ref_instrumental, atol=1e-5)
+
+        print(line)
+
+
+# ---------------------------------------------------------------------------
+# Streaming pipeline: peak traced memory vs the in-memory pipeline
+# ---------------------------------------------------------------------------
+
+def traced_peak_mb(coro):
+    tracemalloc.start()
+    try:
+        result = asyncio.run(coro)
+        return result, tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+
+
+def bench_streaming(args):
+    import soundfile as sf
+
+    backend = load_backend()
+    processor = backend.RealAudioProcessor()
+
+    print(f"💾 Streaming pipeline benchmark (ceiling {args.max_memory_mb}MB)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for minutes in args.minutes:
+            path = os.path.join(tmp, f"track_{minutes:g}.wav")
+            sf.write(path, synthetic_track(minutes), SAMPLE_RATE)
+
+            start = time.perf_counter()
+            result = asyncio.run(processor.process_audio_streaming(path, f"bench_stream_{minutes:g}", args.max_memory_mb))
+            stream_s = time.perf_counter() - start
+            line = (f"  {minutes:>4g} min: streaming peak {result['streaming']['peak_memory_mb']:8.1f}MB "
+                    f"in {stream_s:6.1f}s ({result['streaming']['blocks']} blocks)")
+
+            if not args.skip_legacy:
+                start = time.perf_counter()
+                _, full_peak = traced_peak_mb(processor.process_audio_real(path, f"bench_full_{minutes:g}"))
+                line += f" | in-memory peak {full_peak:8.1f}MB in {time.perf_counter() - start:6.1f}s"
+
+            print(line)
+
+
+# ---------------------------------------------------------------------------
+# Job queue: wall time for concurrent submissions vs worker count
+# ---------------------------------------------------------------------------
+
+async def run_queue(backend, path: str, jobs: int, workers: int) -> float:
+    queue = backend.ProcessingJobQueue(workers)
+    queue.start()
+    try:
+        start = time.perf_counter()
+        for i in range(jobs):
+            session_id = f"bench_queue_{workers}_{i}"
+            backend.sessions.create(session_id, {"session_id": session_id, "status": "queued",
+                                                 "created_at": backend.datetime.utcnow()})
+            queue.submit(session_id, path, {})
+        await asyncio.gather(*(job["task"] for job in queue.jobs.values()))
+        return time.perf_counter() - start
+    finally:
+        queue.shutdown()
+
+
+def bench_job_queue(args):
+    import soundfile as sf
+
+    backend = load_backend()
+    cores = os.cpu_count() or 1
+
+    print(f"⚙️ Job queue benchmark ({args.jobs} concurrent jobs, {args.minutes[0]:g} min tracks)")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "track.wav")
+        sf.write(path, synthetic_track(args.minutes[0]), SAMPLE_RATE)
+
+        baseline = None
+        for workers in sorted({1, max(1, cores // 2), cores}):
+            elapsed = asyncio.run(run_queue(backend, path, args.jobs, workers))
+            baseline = baseline or elapsed
+            print(f"  {workers:>3} workers: {elapsed:7.1f}s wall | {args.jobs / elapsed:6.2f} jobs/s | "
+                  f"scaling {baseline / elapsed:5.2f}x")
+
+
+# ---------------------------------------------------------------------------
+# Profanity matching: per-pattern/per-keyword rescans vs ProfanityMatcher
+# ---------------------------------------------------------------------------
+
+LYRIC_LINES = [
+    "Yo, I'm walking down the street, feeling fucking great today",
+    "Life's been hard but I ain't gonna let that shit bring me down",
+    "These bitches talking trash but I don't give a damn what they say",
+    "Been through hell and back, what the hell, sh*t got real",
+    "This crazy ass world keeps spinning, f-ck the haters and the crap they pissed",
+    "Keep my head up high, ain't gonna let nobody make me frown",
+]
+
+
+def synthetic_transcript(words: int, seed: int = 0) -> str:
+    """Lyrics-like transcript of roughly the requested number of words"""
+    rng = np.random.default_rng(seed)
+    lines, count = [], 0
+    while count < words:
+        line = LYRIC_LINES[rng.integers(len(LYRIC_LINES))]
+        lines.append(line)
+        count += len(line.split())
+    return "\n".join(lines)
+
+
+def legacy_is_whole_word(keyword: str, position: int, text: str) -> bool:
+    """The original whole-word check - no letter on either side of the keyword"""
+    end = position + len(keyword)
+    return not (position > 0 and text[position - 1].isalpha()) and not (end < len(text) and text[end].isalpha())
+
+
+def legacy_patterns_and_keywords(detector, text: str):
+    """The original per-pattern finditer and per-keyword find loops, kept as the reference"""
+    import re
+
+    backend = load_backend()
+    index = backend.TranscriptIndex(text)
+    detected = []
+    for severity_level in ['high_severity', 'medium_severity', 'censored']:
+        for pattern_data in backend.REAL_PROFANITY_PATTERNS['english'].get(severity_level, []):
+            pattern = re.compile(pattern_data['pattern'], re.IGNORECASE)
+            for match in pattern.finditer(text):
+                timing = detector._estimate_timing_from_position(match.start(), match.end(), index)
+                detected.append({
+                    'word': match.group().lower(), 'original_text': match.group(),
+                    'start_time': timing['start'], 'end_time': timing['end'],
+                    'confidence': pattern_data['confidence'], 'severity': severity_level.split('_')[0],
+                    'detection_method': 'regex_pattern', 'pattern': pattern_data['pattern']
+                })
+
+    text_lower = text.lower()
+    for keyword in backend.EXPLICIT_KEYWORDS:
+        start_pos = 0
+        while True:
+            pos = text_lower.find(keyword, start_pos)
+            if pos == -1:
+                break
+            if legacy_is_whole_word(keyword, pos, text_lower):
+                timing = detector._estimate_timing_from_position(pos, pos + len(keyword), index)
+                detected.append({
+                    'word': keyword, 'original_text': text[pos:pos + len(keyword)],
+                    'start_time': timing['start'], 'end_time': timing['end'], 'confidence': 0.99,
+                    'severity': detector._get_severity(keyword), 'detection_method': 'keyword_search',
+                    'position': pos
+                })
+            start_pos = pos + 1
+    return detected
+
+
+async def matcher_patterns_and_keywords(detector, text: str):
+    scan = detector.matcher.scan(text)
+    index = load_backend().TranscriptIndex(text)
+    return (await detector._detect_with_patterns(text, index, scan)
+            + await detector._detect_with_keywords(text, index, scan))
+
+
+def bench_profanity_matching(args):
+    backend = load_backend()
+    detector = backend.RealProfanityDetector()
+
+    print("🎯 Profanity matching benchmark (legacy rescans vs ProfanityMatcher)")
+    for words in args.words:
+        text = synthetic_transcript(words)
+        megabytes = len(text.encode()) / (1024 * 1024)
+
+        fast, fast_s = timed(asyncio.run, matcher_patterns_and_keywords(detector, text))
+        line = f"  {words:>7} words ({megabytes:6.2f}MB): matcher {megabytes / fast_s:8.2f}MB/s"
+
+        if not args.skip_legacy:
+            legacy, legacy_s = timed(legacy_patterns_and_keywords, detector, text)
+            assert fast == legacy, "ProfanityMatcher results differ from the legacy engines"
+            line += f" | legacy {megabytes / legacy_s:8.2f}MB/s | speedup {legacy_s / fast_s:6.1f}x | {len(fast)} matches"
+
+        print(line)
+
+
+# ---------------------------------------------------------------------------
+# Timing lookups: re-splitting the transcript per match vs TranscriptIndex
+# ---------------------------------------------------------------------------
+
+def mock_word_timestamps(text: str):
+    """One timestamp entry per whitespace token, like the mock transcription produces"""
+    return [{'start': i * 0.5, 'end': i * 0.5 + 0.4, 'word': word} for i, word in enumerate(text.split())]
+
+
+def bench_timing_index(args):
+    backend = load_backend()
+    detector = backend.RealProfanityDetector()
+
+    print("⏱️ Timing lookup benchmark (text[:pos].split() vs TranscriptIndex bisect)")
+    for words in args.words:
+        text = synthetic_transcript(words)
+        timestamps = mock_word_timestamps(text)
+        offsets = [start for _, start, _ in backend.PROFANITY_MATCHER.scan(text)['patterns']]
+
+        def indexed():
+            index = backend.TranscriptIndex(text, timestamps)
+            return [detector._estimate_timing_from_position(pos, pos, index) for pos in offsets]
+
+        fast, fast_s = timed(indexed)
+        line = f"  {words:>7} words, {len(offsets):>6} lookups: index {fast_s * 1000:9.1f}ms"
+
+        if not args.skip_legacy:
+            def resplit():
+                return [detector._estimate_word_timing(len(text[:pos].split()), backend.TranscriptIndex('', timestamps))
+                        for pos in offsets]
+
+            legacy, legacy_s = timed(resplit)
+            assert fast == legacy, "TranscriptIndex timings differ from the re-split lookups"
+            line += f" | re-split {legacy_s * 1000:9.1f}ms | speedup {legacy_s / fast_s:8.1f}x"
+
+        print(line)
+
+
+# ---------------------------------------------------------------------------
+# better_profanity engine: per-word contains_profanity vs CensorWordSet
+# ---------------------------------------------------------------------------
+
+def legacy_better_profanity(detector, text: str, index):
+    """The original per-token re.sub + profanity.contains_profanity loop, kept as the reference"""
+    import re
+    from better_profanity import profanity
+
+    detected = []
+    for i, word in enumerate(text.lower().split()):
+        clean_word = re.sub(r'[^a-z]', '', word)
+        if profanity.contains_profanity(clean_word):
+            timing = detector._estimate_word_timing(i, index)
+            detected.append({
+                'word': clean_word, 'original_text': word,
+                'start_time': timing['start'], 'end_time': timing['end'],
+                'confidence': 0.96, 'severity': 'high',
+                'detection_method': 'better_profanity', 'word_index': i
+            })
+    return detected
+
+
+def bench_better_profanity(args):
+    backend = load_backend()
+    detector = backend.RealProfanityDetector()
+
+    print(f"🔤 better_profanity engine benchmark ({len(backend.CENSOR_WORDS)} precomputed spellings)")
+    for words in args.words:
+        text = synthetic_transcript(words)
+        index = backend.TranscriptIndex(text, mock_word_timestamps(text))
+
+        fast, fast_s = timed(asyncio.run, detector._detect_with_better_profanity(text, index))
+        line = f"  {words:>7} words: word set {fast_s * 1000:9.1f}ms"
+
+        if not args.skip_legacy:
+            legacy, legacy_s = timed(legacy_better_profanity, detector, text, index)
+            assert fast == legacy, "CensorWordSet results differ from profanity.contains_profanity"
+            line += f" | contains_profanity {legacy_s * 1000:9.1f}ms | speedup {legacy_s / fast_s:8.1f}x"
+
+        print(line)
+
+
+# ---------------------------------------------------------------------------
+# Whisper input: temp WAV + ffmpeg decode/resample vs in-memory 16 kHz array
+# ---------------------------------------------------------------------------
+
+def legacy_whisper_input(vocals: np.ndarray, sr: int):
+    """Old path: write the stem to a temp WAV, then decode it the way whisper.load_audio does"""
+    import subprocess
+    import soundfile as sf
+
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_file:
+        sf.write(tmp_file.name, vocals, sr)
+    try:
+        bytes_written = os.path.getsize(tmp_file.name)
+        command = ["ffmpeg", "-nostdin", "-threads", "0", "-i", tmp_file.name,
+                   "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", "16000", "-"]
+        out = subprocess.run(command, capture_output=True, check=True).stdout
+        return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0, bytes_written
+    finally:
+        os.unlink(tmp_file.name)
+
+
+def bench_whisper_feed(args):
+    backend = load_backend()
+    processor = backend.RealAudioProcessor()
+
+    processor._to_whisper_rate(synthetic_track(0.01), SAMPLE_RATE)  # Warm up librosa's lazy imports
+
+    print("🎤 Whisper input benchmark (temp WAV + ffmpeg vs in-memory resample)")
+    for minutes in args.minutes:
+        vocals = synthetic_track(minutes)
+
+        fast, fast_s = timed(processor._to_whisper_rate, vocals, SAMPLE_RATE)
+        line = f"  {minutes:>4g} min: in-memory {fast_s * 1000:8.1f}ms, 0 bytes written"
+
+        if not args.skip_legacy:
+            (legacy, bytes_written), legacy_s = timed(legacy_whisper_input, vocals, SAMPLE_RATE)
+            line += (f" | temp WAV {legacy_s * 1000:8.1f}ms, {bytes_written / (1024 * 1024):6.1f}MB written"
+                     f" | speedup {legacy_s / fast_s:5.1f}x | {len(fast)} vs {len(legacy)} samples")
+
+        print(line)
+
+
+# ---------------------------------------------------------------------------
+# Result cache: full pipeline vs linking a cached result into a new session
+# ---------------------------------------------------------------------------
+
+def bench_result_cache(args):
+    import soundfile as sf
+
+    backend = load_backend()
+    processor = backend.RealAudioProcessor()
+
+    print("🗄️ Result cache benchmark (re-upload of an already processed track)")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # Pipeline outputs go to final/ and lyrics/ under the cwd
+        try:
+            cache = backend.ResultCache("cache", max_size_mb=100000, pipeline_version="bench")
+            for minutes in args.minutes:
+                path = os.path.join(tmp, f"track_{minutes:g}.wav")
+                sf.write(path, synthetic_track(minutes), SAMPLE_RATE)
+                key = cache.key(f"bench_{minutes:g}")
+
+                result, miss_s = timed(asyncio.run, processor.process_audio_real(path, f"bench_miss_{minutes:g}"))
+                cache.store(key, result)
+
+                start = time.perf_counter()
+                hit = cache.materialize(key, cache.lookup(key), f"bench_hit_{minutes:g}")
+                hit_s = time.perf_counter() - start
+
+                assert hit['profanity_detection'] == result['profanity_detection']
+                print(f"  {minutes:>4g} min: pipeline {miss_s:7.2f}s | cache hit {hit_s * 1000:7.2f}ms | "
+                      f"speedup {miss_s / hit_s:8.0f}x")
+            print(f"  {cache.stats()}")
+        finally:
+            os.chdir(cwd)
+
+
+# ---------------------------------------------------------------------------
+# Upload: await read() of the whole body vs chunked, hashed copy to disk
+# ---------------------------------------------------------------------------
+
+async def legacy_upload_copy(upload, path: str):
+    """The original handler body: buffer the whole upload, then write it out"""
+    audio_data = await upload.read()
+    with open(path, "wb") as f:
+        f.write(audio_data)
+
+
+def bench_upload(args):
+    from fastapi import UploadFile
+
+    backend = load_backend()
+
+    print("📤 Upload benchmark (peak Python memory while copying the upload to disk)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mb in args.megabytes:
+            source = os.path.join(tmp, f"source_{mb}.bin")
+            with open(source, "wb") as f:
+                f.write(os.urandom(mb * 1024 * 1024))
+
+            def run(copy):
+                with open(source, "rb") as f:
+                    upload = UploadFile(file=f, filename="track.wav")
+                    return traced_peak_mb(copy(upload, os.path.join(tmp, "copy.bin")))
+
+            (_, streamed_peak) = run(lambda upload, path: backend.save_upload(upload, path, 1 << 40))
+            line = f"  {mb:>4} MB upload: chunked+hashed peak {streamed_peak:7.1f}MB"
+
+            if not args.skip_legacy:
+                (_, legacy_peak) = run(legacy_upload_copy)
+                line += f" | read() peak {legacy_peak:7.1f}MB"
+
+            # Over the limit: the copy stops at the first chunk past it
+            with open(source, "rb") as f:
+                upload = UploadFile(file=f, filename="track.wav")
+                try:
+                    asyncio.run(backend.save_upload(upload, os.path.join(tmp, "copy.bin"), mb * 1024 * 1024 // 2))
+                except backend.HTTPException as e:
+                    line += f" | limit {mb // 2}MB -> {e.status_code} after reading {f.tell() / (1024 * 1024):.0f}MB"
+
+            print(line)
+
+
+# ---------------------------------------------------------------------------
+# Downloads: full re-download vs Range seek vs ETag revalidation
+# ---------------------------------------------------------------------------
+
+def bench_range_requests(args):
+    import soundfile as sf
+    from fastapi.testclient import TestClient
+
+    backend = load_backend()
+
+    print("📼 Download benchmark (seeking inside the final WAV)")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            with TestClient(backend.app) as client:
+                for minutes in args.minutes:
+                    session_id = f"bench_range_{minutes:g}"
+                    os.makedirs(os.path.join("final", session_id))
+                    sf.write(os.path.join("final", session_id, "clean_final.wav"), synthetic_track(minutes), SAMPLE_RATE)
+                    backend.sessions.create(session_id, {"status": "real_complete", "filename": "track.wav"})
+                    url = f"/download/{session_id}?audio_type=final"
+
+                    client.get(url)  # First request hashes the file for its ETag
+                    full, full_s = timed(client.get, url)
+                    seek_at = int(len(full.content) * 0.6)
+                    seek, seek_s = timed(client.get, url, headers={"Range": f"bytes={seek_at}-{seek_at + 262143}"})
+                    again, again_s = timed(client.get, url, headers={"If-None-Match": full.headers["etag"]})
+
+                    assert seek.status_code == 206 and seek.content == full.content[seek_at:seek_at + 262144]
+                    assert again.status_code == 304
+                    print(f"  {minutes:>4g} min: full {len(full.content) / (1024 * 1024):6.1f}MB in {full_s * 1000:7.1f}ms | "
+                          f"seek {len(seek.content) // 1024}KB in {seek_s * 1000:5.1f}ms | "
+                          f"revalidate 0B in {again_s * 1000:5.1f}ms")
+        finally:
+            os.chdir(cwd)
+
+
+# ---------------------------------------------------------------------------
+# Transcoding: WAV master vs compressed variants, first (encode) and cached request
+# ---------------------------------------------------------------------------
+
+def bench_transcode(args):
+    import soundfile as sf
+
+    backend = load_backend()
+
+    print("🎚️ Transcoding benchmark (variant size vs the WAV master)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for minutes in args.minutes:
+            master = os.path.join(tmp, f"clean_final_{minutes:g}.wav")
+            sf.write(master, synthetic_track(minutes), SAMPLE_RATE)
+            wav_mb = os.path.getsize(master) / (1024 * 1024)
+            print(f"  {minutes:>4g} min master: {wav_mb:6.1f}MB")
+
+            transcoder = backend.VariantTranscoder()
+            for audio_format, bitrate in (("flac", None), ("mp3", 192), ("opus", 128), ("opus", 64)):
+                path, encode_s = timed(asyncio.run, transcoder.variant(master, audio_format, bitrate))
+                _, cached_s = timed(asyncio.run, transcoder.variant(master, audio_format, bitrate))
+                size_mb = os.path.getsize(path) / (1024 * 1024)
+                label = f"{audio_format} {bitrate}k" if bitrate else audio_format
+                print(f"    {label:>9}: {size_mb:6.1f}MB ({size_mb / wav_mb:5.1%}) | "
+                      f"first request {encode_s:6.2f}s | cached {cached_s * 1000:5.2f}ms")
+
+
+# ---------------------------------------------------------------------------
+# Session store: lookup latency under concurrent readers and a writer
+# ---------------------------------------------------------------------------
+
+def bench_session_store(args):
+    import threading
+    from datetime import datetime
+
+    from session_store import MemorySessionStore, RedisSessionStore, SQLiteSessionStore
+
+    stores = {"memory": lambda tmp: MemorySessionStore(ttl_seconds=3600),
+              "sqlite": lambda tmp: SQLiteSessionStore(os.path.join(tmp, "sessions.db"), ttl_seconds=3600)}
+    try:
+        import fakeredis  # Local Redis stand-in; point REDIS_URL at a real server to use that instead
+        stores["redis"] = lambda tmp: RedisSessionStore(
+            client=fakeredis.FakeRedis() if not os.getenv("REDIS_URL") else None,
+            url=os.getenv("REDIS_URL"), prefix=f"bench{os.getpid()}", ttl_seconds=3600)
+    except ImportError:
+        print("  (fakeredis not installed - skipping the redis backend)")
+
+    sessions, readers, lookups = 10000, 4, 5000
+    result = {"transcription": {"text": synthetic_transcript(2000)}, "detected_words": list(range(500))}
+
+    print(f"🗃️ Session store benchmark ({sessions} sessions, {readers} reader threads + 1 writer)")
+    for name, build in stores.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            store = build(tmp)
+            for i in range(sessions):
+                store.create(f"s{i}", {"status": "real_complete", "filename": "track.wav",
+                                       "created_at": datetime.utcnow()})
+            store.transition("s0", "real_complete", result=result)
+
+            latencies, stop = [], threading.Event()
+
+            def read(seed):
+                rng = np.random.default_rng(seed)
+                local = []
+                for i in rng.integers(0, sessions, lookups):
+                    start = time.perf_counter()
+                    store.get(f"s{i}")
+                    local.append(time.perf_counter() - start)
+                latencies.extend(local)
+
+            def write():
+                i = 0
+                while not stop.is_set():
+                    store.transition(f"s{i % sessions}", "real_complete", {"touched": i})
+                    i += 1
+
+            writer = threading.Thread(target=write)
+            threads = [threading.Thread(target=read, args=(seed,)) for seed in range(readers)]
+            writer.start()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            stop.set()
+            writer.join()
+
+            p50, p99 = np.percentile(np.array(latencies) * 1e6, [50, 99])
+            _, result_s = timed(store.get_result, "s0")
+            print(f"  {name:>6}: get p50 {p50:7.1f}us | p99 {p99:7.1f}us | "
+                  f"result payload {result_s * 1e6:7.1f}us | {len(store)} live")
+
+
+# ---------------------------------------------------------------------------
+# Artifact GC: collection pass over many sessions' artifacts
+# ---------------------------------------------------------------------------
+
+def bench_artifact_gc(args):
+    backend = load_backend()
+    files = ("clean_final.wav", "clean_preview.wav", "cleaned_vocals.wav", "instrumental.wav")
+    sessions, file_kb = 2000, 64
+
+    print(f"🧹 Artifact GC benchmark ({sessions} sessions x {len(files) + 2} files, ages 0-72h)")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            rng = np.random.default_rng(0)
+            payload = b"\0" * (file_kb * 1024)
+            for i in range(sessions):
+                session_id = f"bench_gc_{i}"
+                backend.sessions.create(session_id, {"status": "real_complete"})
+                stamp = time.time() - rng.uniform(0, 72 * 3600)
+                paths = [os.path.join("final", session_id, name) for name in files]
+                paths += [os.path.join("uploads", session_id, "original.wav"),
+                          os.path.join("lyrics", session_id, "extracted_lyrics.txt")]
+                for path in paths:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, "wb") as f:
+                        f.write(payload)
+                    os.utime(path, (stamp, stamp))
+
+            total_mb = sessions * len(paths) * file_kb / 1024
+            collector = backend.ArtifactCollector(total_mb / 4, backend.ARTIFACT_GC_CONFIG["retention_hours"])
+            run, elapsed = timed(collector.collect)
+            left = collector.inventory()
+            kept = {cls: sum(1 for (_, c) in left if c == cls) for cls in ("final", "preview", "stems", "upload")}
+            print(f"  {total_mb:7.1f}MB on disk, budget {total_mb / 4:6.1f}MB: reclaimed {run['reclaimed_mb']:7.1f}MB "
+                  f"({run['deleted_files']} files) in {elapsed * 1000:6.1f}ms | sessions keeping each class: {kept}")
+        finally:
+            os.chdir(cwd)
+
+
+# ---------------------------------------------------------------------------
+# Session expiry (main.py): heap-scheduled expiry lag vs the hourly scan
+# ---------------------------------------------------------------------------
+
+def bench_expiry(args):
+    from session_store import MemorySessionStore
+
+    sessions, scan_interval = 5000, 3600
+    print(f"⏳ Session expiry benchmark ({sessions} sessions, TTLs 0.5-2.5s)")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # main.py creates its working dirs on import
+        try:
+            import main
+
+            store, lags = MemorySessionStore(), []
+            scheduler = main.ExpiryScheduler(store, lambda sid, session: lags.append(time.time() - session["expires_at"]))
+            rng = np.random.default_rng(0)
+
+            async def run():
+                task = asyncio.create_task(scheduler.run())
+                start = time.perf_counter()
+                for i in range(sessions):
+                    ttl = rng.uniform(0.5, 2.5)
+                    store.create(f"s{i}", {"expires_at": time.time() + ttl}, ttl_seconds=ttl)
+                    scheduler.schedule(f"s{i}", store.expiry(f"s{i}"))
+                schedule_s = time.perf_counter() - start
+                while len(lags) < sessions:
+                    await asyncio.sleep(0.05)
+                task.cancel()
+                return schedule_s
+
+            schedule_s = asyncio.run(run())
+            p50, p99 = np.percentile(np.array(lags) * 1000, [50, 99])
+            print(f"  heap: schedule {schedule_s / sessions * 1e6:5.1f}us/session | "
+                  f"expiry lag p50 {p50:6.1f}ms | p99 {p99:6.1f}ms | {len(store)} left")
+            print(f"  hourly scan: expiry lag uniform over 0-{scan_interval}s (mean {scan_interval / 2:.0f}s), "
+                  f"payloads held in memory for that long")
+        finally:
+            os.chdir(cwd)
+
+
+# ---------------------------------------------------------------------------
+# Session memory (main.py): heap held per live session after /preview
+# ---------------------------------------------------------------------------
+
+def bench_session_memory(args):
+    import gc
+
+    from fastapi.testclient import TestClient
+
+    sessions, upload_mb = 40, min(args.megabytes)
+    print(f"🧠 Session memory benchmark ({sessions} live sessions x {upload_mb:.0f}MB uploads)")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.environ["SESSION_STORE"] = "memory"
+        try:
+            import main
+
+            async def transcribe(file_path):
+                return {"result": {"text": f"{os.path.getsize(file_path)} bytes", "word_count": 2}, "success": True}
+
+            main.process_large_audio = transcribe
+            payload = os.urandom(int(upload_mb * 1024 * 1024))
+            client = TestClient(main.app)
+
+            tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+            for _ in range(sessions):
+                response = client.post("/preview", files={"audio": ("track.wav", payload, "audio/wav")})
+                response.raise_for_status()
+            del response
+            gc.collect()  # Drop the test client's request bodies so only server-side state is counted
+            held = tracemalloc.get_traced_memory()[0] - baseline
+            tracemalloc.stop()
+
+            print(f"  heap held by {sessions} sessions: {held / 1024 / 1024:8.2f}MB "
+                  f"({held / sessions / 1024:7.1f}KB per session) | payload bytes on disk: "
+                  f"{sessions * len(payload) / 1024 / 1024:7.1f}MB")
+            print(f"  previous in-memory payloads: {sessions * len(payload) / 1024 / 1024:7.1f}MB held on the heap")
+        finally:
+            os.chdir(cwd)
+
+
+# ---------------------------------------------------------------------------
+# Whisper client (main.py): concurrent /preview against a local stub Whisper server
+# ---------------------------------------------------------------------------
+
+def stub_whisper_app(latency: float, failure_rate: float, seed: int = 0,
+                     seconds_per_audio_minute: float = 0.0, compressed_kbps: int = 64):
+    """Stand-in for the Cloudflare Whisper endpoint: latency (plus time per minute of audio), random 429/503s
+
+    Audio length comes from the WAV header, or for compressed bodies from compressed_kbps.
+    """
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse
+
+    app = FastAPI()
+    app.state.in_flight = app.state.peak = app.state.calls = app.state.bytes_received = 0
+    rng = np.random.default_rng(seed)
+
+    @app.post("/accounts/{account}/ai/run/{model:path}")
+    async def run(account: str, model: str, request: Request):
+        body = await request.body()
+        app.state.bytes_received += len(body)
+        app.state.calls += 1
+        call = app.state.calls
+        app.state.in_flight += 1
+        app.state.peak = max(app.state.peak, app.state.in_flight)
+        try:
+            if body[:4] == b"RIFF":
+                audio_seconds = (len(body) - 44) / int.from_bytes(body[28:32], "little")
+            else:
+                audio_seconds = len(body) * 8 / (compressed_kbps * 1000)
+            await asyncio.sleep(latency + seconds_per_audio_minute * audio_seconds / 60)
+            if rng.random() < failure_rate:
+                return JSONResponse({"success": False}, status_code=int(rng.choice([429, 503])))
+            return {"result": {"text": f"take {call} what the fuck is this shit", "word_count": 8}, "success": True}
+        finally:
+            app.state.in_flight -= 1
+
+    return app
+
+
+def serve_in_thread(app, port: int):
+    """Run an ASGI app under uvicorn on a background thread; returns the server (set should_exit to stop)"""
+    import threading
+
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def legacy_call_cloudflare_whisper(main):
+    """The original blocking requests.post call, kept as the reference"""
+    import requests
+
+    async def call(audio_data, timeout=60):
+        url = f"{main.WHISPER_API_BASE}/accounts/{main.CF_ACCOUNT_ID}/ai/run/{main.WHISPER_MODEL}"
+        try:
+            response = requests.post(url, json={"audio": list(audio_data)}, timeout=60)
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            raise main.HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
+
+    return call
+
+
+def bench_whisper_client(args):
+    import httpx
+
+    stub_port, app_port, latency, failure_rate = 18710, 18711, 0.3, 0.2
+    requests_total = args.jobs * 4
+    print(f"🌐 Whisper client benchmark ({requests_total} /preview requests, {args.jobs} concurrent, "
+          f"stub latency {latency * 1000:.0f}ms, {failure_rate:.0%} 429/503)")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.environ.update(SESSION_STORE="memory", WHISPER_API_BASE=f"http://127.0.0.1:{stub_port}")
+        try:
+            import main
+
+            stub = stub_whisper_app(latency, failure_rate)
+            servers = [serve_in_thread(stub, stub_port), serve_in_thread(main.app, app_port)]
+            payload = os.urandom(64 * 1024)
+
+            async def fire():
+                limit = asyncio.Semaphore(args.jobs)
+                async with httpx.AsyncClient(timeout=600) as client:
+                    async def one():
+                        async with limit:
+                            start = time.perf_counter()
+                            response = await client.post(f"http://127.0.0.1:{app_port}/preview",
+                                                         files={"audio": ("track.wav", payload, "audio/wav")})
+                            return response.status_code, time.perf_counter() - start
+                    return await asyncio.gather(*(one() for _ in range(requests_total)))
+
+            modes = {"pooled async": main.call_cloudflare_whisper}
+            if not args.skip_legacy:
+                modes["legacy blocking"] = legacy_call_cloudflare_whisper(main)
+            try:
+                for name, call in modes.items():
+                    main.call_cloudflare_whisper = call
+                    stub.state.calls = stub.state.peak = 0
+                    results, wall = timed(asyncio.run, fire())
+                    ok = sum(1 for code, _ in results if code == 200)
+                    p50, p99 = np.percentile([elapsed for _, elapsed in results], [50, 99])
+                    print(f"  {name:>15}: wall {wall:6.2f}s | p50 {p50:6.2f}s | p99 {p99:6.2f}s | "
+                          f"{ok}/{requests_total} ok | stub calls {stub.state.calls}, peak concurrency {stub.state.peak}")
+            finally:
+                for server in servers:
+                    server.should_exit = True
+        finally:
+            os.chdir(cwd)
+
+
+# ---------------------------------------------------------------------------
+# Whisper payload (main.py): request body encoding cost and size
+# ---------------------------------------------------------------------------
+
+def bench_whisper_payload(args):
+    import json
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.environ["SESSION_STORE"] = "memory"
+        try:
+            import main
+        finally:
+            os.chdir(cwd)
+
+    async def drain(content):
+        if isinstance(content, bytes):
+            return len(content)
+        return sum([len(chunk) async for chunk in content])
+
+    def encode(payload_format, audio_data):
+        headers, content = main.encode_whisper_payload(audio_data, payload_format)
+        return asyncio.run(drain(content))
+
+    def legacy(audio_data):
+        return len(json.dumps({"audio": list(audio_data)}).encode())
+
+    modes = {"binary": lambda data: encode("binary", data), "base64": lambda data: encode("base64", data)}
+    if not args.skip_legacy:
+        modes["legacy json list"] = legacy
+
+    print("📦 Whisper payload benchmark (serialize + drain the request body)")
+    for mb in args.megabytes:
+        audio_data = os.urandom(mb * 1024 * 1024)
+        for name, fn in modes.items():
+            wire, elapsed = timed(fn, audio_data)
+            tracemalloc.start()  # Separate traced run - tracing slows per-object allocation a lot
+            fn(audio_data)
+            peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+            print(f"  {mb:>4}MB {name:>16}: {elapsed * 1000:9.1f}ms | peak {peak:8.1f}MB | "
+                  f"{wire / (1024 * 1024):8.1f}MB on the wire ({wire / len(audio_data):4.2f}x)")
+
+
+# ---------------------------------------------------------------------------
+# Chunked transcription (main.py): long mix, time windows transcribed concurrently
+# ---------------------------------------------------------------------------
+
+def legacy_process_large_audio(main):
+    """The original 20MB byte slices transcribed one after another, kept as the reference"""
+    async def process(file_path):
+        with main.map_upload(file_path) as audio_data:
+            texts = []
+            for start in range(0, len(audio_data), 20 * 1024 * 1024):
+                result = await main.call_cloudflare_whisper(audio_data[start:start + 20 * 1024 * 1024])
+                texts.append(result.get("result", {}).get("text", ""))
+            return " ".join(texts)
+
+    return process
+
+
+def bench_chunked_transcription(args):
+    import subprocess
+
+    stub_port, mix_minutes, seconds_per_minute = 18740, 60, 0.5
+    print(f"🎛️ Chunked transcription benchmark ({mix_minutes}-minute mix, stub Whisper "
+          f"{seconds_per_minute}s per minute of audio)")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.environ.update(SESSION_STORE="memory", WHISPER_API_BASE=f"http://127.0.0.1:{stub_port}")
+        try:
+            import main
+
+            # Tones that change every 5s with a short gap every 8s, like beat-matched tracks
+            mix = os.path.join(tmp, "mix.mp3")
+            subprocess.run(["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i",
+                            "aevalsrc=0.4*sin(2*PI*(110+40*mod(floor(t/5)\\,4))*t)*gt(mod(t\\,8)\\,0.4):s=16000",
+                            "-t", str(mix_minutes * 60), "-ac", "1", "-b:a", "64k", mix], check=True)
+            print(f"  mix: {os.path.getsize(mix) / (1024 * 1024):.1f}MB mp3")
+
+            stub = stub_whisper_app(0.05, 0.0, seconds_per_audio_minute=seconds_per_minute)
+            server = serve_in_thread(stub, stub_port)
+            try:
+                if not args.skip_legacy:
+                    stub.state.calls = 0
+                    _, elapsed = timed(asyncio.run, legacy_process_large_audio(main)(mix))
+                    print(f"  legacy 20MB byte slices, sequential: {elapsed:6.2f}s | {stub.state.calls} calls")
+
+                for concurrency in (1, 2, 4, 8):
+                    main.TRANSCRIBE_CONCURRENCY = concurrency
+                    stub.state.calls = stub.state.peak = 0
+                    result, elapsed = timed(asyncio.run, main.process_large_audio(mix))
+                    print(f"  time windows, concurrency {concurrency}: {elapsed:6.2f}s | {stub.state.calls} chunks, "
+                          f"peak {stub.state.peak} in flight | {result['result']['word_count']} words stitched")
+            finally:
+                server.should_exit = True
+        finally:
+            os.chdir(cwd)
+
+
+# ---------------------------------------------------------------------------
+# Language ID + profanity (main.py): all six languages, long transcripts
+# ---------------------------------------------------------------------------
+
+LEGACY_LANGUAGE_PATTERNS = {
+    "english": r"\b(the|and|or|but|in|on|at|to|for|of|with|by|is|are|was|were)\b",
+    "spanish": r"\b(el|la|los|las|de|en|un|una|por|para|con|sin|es|son|fue|fueron)\b",
+    "french": r"\b(le|la|les|de|du|des|un|une|dans|pour|avec|sans|est|sont|était)\b",
+    "portuguese": r"\b(o|a|os|as|de|em|um|uma|para|com|sem|por|é|são|foi|eram)\b",
+    "german": r"\b(der|die|das|den|dem|des|ein|eine|und|oder|in|mit|ist|sind|war)\b",
+    "italian": r"\b(il|la|lo|gli|le|di|da|in|con|su|per|tra|è|sono|era|erano)\b"
+}
+
+
+def legacy_detect_language(text: str) -> str:
+    """The original six uncompiled findall passes, kept as the reference"""
+    import re
+
+    max_matches, detected_lang = 0, "english"
+    for lang, pattern in LEGACY_LANGUAGE_PATTERNS.items():
+        matches = len(re.findall(pattern, text.lower()))
+        if matches > max_matches:
+            max_matches, detected_lang = matches, lang
+    return detected_lang
+
+
+def legacy_detect_profanity(main, text: str, language: str):
+    """The original per-pattern re.finditer loop, kept as the reference"""
+    import re
+
+    return [match.group() for pattern in main.PROFANITY_PATTERNS.get(language, main.PROFANITY_PATTERNS["english"])
+            for match in re.finditer(pattern, text, re.IGNORECASE)]
+
+
+def bench_language_id(args):
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.environ["SESSION_STORE"] = "memory"
+        try:
+            import main
+        finally:
+            os.chdir(cwd)
+
+    filler = ["yeah", "baby", "noche", "amour", "liebe", "cuore", "party", "ritmo", "bass", "drop"]
+    rng = np.random.default_rng(0)
+
+    print("🌍 Language ID + profanity benchmark (detect_language + detect_profanity per transcript)")
+    for language, stopwords in main.LANGUAGE_STOPWORDS.items():
+        profane = main._profanity_phrases(main.PROFANITY_PATTERNS[language])
+        vocabulary = stopwords * 2 + profane + filler * 3
+        for words in args.words:
+            text = " ".join(rng.choice(vocabulary, words))
+
+            def fast():
+                lang = main.detect_language(text)
+                return lang, len(main.detect_profanity(text, lang))
+
+            def legacy():
+                lang = legacy_detect_language(text)
+                return lang, len(legacy_detect_profanity(main, text, lang))
+
+            (lang, found), fast_s = timed(fast)
+            line = (f"  {language:>10} {words:>7} words: {fast_s * 1000:8.1f}ms "
+                    f"({len(text) / fast_s / (1024 * 1024):6.1f}MB/s) -> {lang}, {found} matches")
+            if not args.skip_legacy:
+                (legacy_lang, legacy_found), legacy_s = timed(legacy)
+                line += f" | legacy {legacy_s * 1000:8.1f}ms -> {legacy_lang}, {legacy_found} | speedup {legacy_s / fast_s:5.1f}x"
+            print(line)
+
+
+# ---------------------------------------------------------------------------
+# Two-pass transcription: word alignment only where profanity was heard
+# ---------------------------------------------------------------------------
+
+def bench_two_pass(args):
+    backend = load_backend()
+    if backend.whisper_model is None:
+        print("🎤 Two-pass benchmark needs Whisper installed - the mock transcription has nothing to time")
+        return
+    if not args.audio:
+        print("🎤 Two-pass benchmark needs a vocal recording: --audio path/to/vocals.wav")
+        return
+
+    processor = backend.RealAudioProcessor()
+    audio, _ = backend.librosa.load(args.audio, sr=backend.WHISPER_SAMPLE_RATE)
+    print(f"🎤 Two-pass transcription benchmark ({len(audio) / backend.WHISPER_SAMPLE_RATE:.0f}s of audio, "
+          f"model {backend.WARMUP_CONFIG['whisper_model']})")
+
+    runs = {}
+    for two_pass in (False, True):
+        backend.TRANSCRIPTION_CONFIG["two_pass"] = two_pass
+        transcription, elapsed = timed(asyncio.run, processor._real_transcription(audio, backend.WHISPER_SAMPLE_RATE))
+        detection = asyncio.run(backend.RealProfanityDetector().detect_profanity_real(
+            transcription['text'], transcription['word_timestamps']))
+        runs[two_pass] = (transcription, detection['detected_words'], elapsed)
+        alignment = transcription.get('word_alignment', {})
+        print(f"  {'two-pass' if two_pass else 'single-pass':>11}: ASR {elapsed:7.2f}s | "
+              f"{len(detection['detected_words'])} flagged words | "
+              f"aligned windows {alignment.get('aligned_windows', 'all')}/{alignment.get('windows', 'all')}")
+
+    single, two = runs[False], runs[True]
+    if single[0]['text'] != two[0]['text']:
+        print("  ⚠️ transcripts differ between modes (different decode windows) - timings not comparable")
+        return
+    drift = [max(abs(a['start_time'] - b['start_time']), abs(a['end_time'] - b['end_time']))
+             for a, b in zip(single[1], two[1])]
+    print(f"  flagged-word timing drift: max {max(drift, default=0.0) * 1000:.1f}ms over {len(drift)} words | "
+          f"speedup {single[2] / two[2]:4.2f}x")
+
+
+# ---------------------------------------------------------------------------
+# VAD gating: how much of a vocal stem Whisper can skip
+# ---------------------------------------------------------------------------
+
+def synthetic_vocal_stem(minutes: float, sr: int = 16000, seed: int = 0) -> np.ndarray:
+    """Vocal-stem-like signal: low steady bleed throughout, sung phrases in verses only
+
+    Each 60s cycle is a 12s intro/drop, a 30s verse, 8s of bleed and a 10s hook.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(minutes * 60 * sr)) / sr
+    bleed = 0.006 * np.sin(2 * np.pi * 110 * t) + 0.002 * rng.standard_normal(len(t))
+
+    # Syllables at 3 per second on a melody that moves every quarter second
+    pitch = np.repeat(rng.uniform(180, 400, len(t) // (sr // 4) + 1), sr // 4)[:len(t)]
+    phase = 2 * np.pi * np.cumsum(pitch) / sr
+    voice = 0.2 * np.clip(np.sin(2 * np.pi * 3 * t), 0, None) * (np.sin(phase) + 0.5 * np.sin(2 * phase))
+
+    cycle = t % 60
+    singing = ((cycle >= 12) & (cycle < 42)) | (cycle >= 50)
+    return (bleed + voice * singing).astype(np.float32)
+
+
+def bench_vad(args):
+    backend = load_backend()
+    vad = backend.VoiceActivityDetector()
+
+    print("🗣️ VAD benchmark (energy + spectral flux, 16 kHz vocal stem)")
+    for minutes in args.minutes:
+        stem = synthetic_vocal_stem(minutes)
+        regions, elapsed = timed(vad.regions, stem)
+        voiced = sum(end - start for start, end in regions) / len(stem)
+        print(f"  {minutes:>4g} min: VAD {elapsed * 1000:8.1f}ms ({minutes * 60 / elapsed:7.0f}x realtime) | "
+              f"{len(regions)} regions | skipped {1 - voiced:6.1%} (true instrumental share 33.3%)")
+
+    if backend.whisper_model is None or not args.audio:
+        print("  (ASR seconds with and without gating need Whisper and --audio path/to/vocals.wav)")
+        return
+
+    processor = backend.RealAudioProcessor()
+    audio, _ = backend.librosa.load(args.audio, sr=backend.WHISPER_SAMPLE_RATE)
+    for enabled in (False, True):
+        backend.VAD_CONFIG["enabled"] = enabled
+        transcription = asyncio.run(processor._real_transcription(audio, backend.WHISPER_SAMPLE_RATE))
+        print(f"  {os.path.basename(args.audio)} VAD {'on ' if enabled else 'off'}: ASR {transcription['asr_seconds']:7.2f}s | "
+              f"skipped {transcription['vad']['skipped_fraction']:6.1%} | {len(transcription['text'].split())} words")
+
+
+# ---------------------------------------------------------------------------
+# Batched Whisper inference: per-job transcribe() vs shared window batches
+# ---------------------------------------------------------------------------
+
+def run_sessions(executor, transcribe, audio: np.ndarray, sessions: int) -> float:
+    """Wall time for `sessions` concurrent transcriptions of the same audio"""
+    with executor:
+        start = time.perf_counter()
+        list(executor.map(transcribe, [audio] * sessions))
+        return time.perf_counter() - start
+
+
+def per_job_transcribe(audio: np.ndarray):
+    """The pre-batching path: each job's worker process runs transcribe() on its own model copy"""
+    backend = importlib.import_module("fwea-final-backend")
+    return backend.whisper_model.transcribe(audio, language='en')
+
+
+def bench_batched_asr(args):
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    backend = load_backend()
+    if backend.whisper_model is None:
+        print("🎤 Batched ASR benchmark needs Whisper installed - the mock transcription has nothing to time")
+        return
+
+    if args.audio:
+        audio, _ = backend.librosa.load(args.audio, sr=backend.WHISPER_SAMPLE_RATE)
+    else:
+        audio = synthetic_vocal_stem(args.minutes[0])
+    audio_seconds = len(audio) / backend.WHISPER_SAMPLE_RATE
+    config = backend.WHISPER_BATCH_CONFIG
+
+    print(f"🎤 Batched ASR load test ({audio_seconds:.0f}s per session, model {backend.WARMUP_CONFIG['whisper_model']}, "
+          f"max batch {config['max_batch']}, max wait {config['max_wait_ms']:g}ms)")
+    print("  aggregate realtime factor = session audio seconds transcribed per wall second; "
+          "per-job runs one forked worker per session, as the job queue did")
+
+    # Per-job runs first - forking after the batcher thread has run torch can hang the children
+    per_job = {}
+    if not args.skip_legacy:
+        for sessions in args.sessions:
+            pool = ProcessPoolExecutor(max_workers=sessions, mp_context=multiprocessing.get_context('fork'))
+            per_job[sessions] = run_sessions(pool, per_job_transcribe, audio, sessions)
+
+    for sessions in args.sessions:
+        scheduler = backend.WhisperBatchScheduler(backend.whisper_model, config["max_batch"], config["max_wait_ms"])
+        batched = run_sessions(ThreadPoolExecutor(max_workers=sessions), scheduler.transcribe, audio, sessions)
+        line = (f"  {sessions:>3} sessions: batched {batched:7.1f}s ({sessions * audio_seconds / batched:6.1f}x realtime, "
+                f"mean batch {scheduler.stats()['mean_batch_size']:5.2f})")
+
+        if sessions in per_job:
+            line += (f" | per-job {per_job[sessions]:7.1f}s ({sessions * audio_seconds / per_job[sessions]:6.1f}x realtime) | "
+                     f"speedup {per_job[sessions] / batched:5.2f}x")
+        print(line)
+
+
+# ---------------------------------------------------------------------------
+# ASR engines: real-time factor, peak RSS and WER on a fixed local test set
+# ---------------------------------------------------------------------------
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".mp3", ".m4a", ".ogg")
+
+
+def load_test_set(directory: str):
+    """(audio path, reference transcript) pairs - each clip sits next to a same-named .txt"""
+    pairs = []
+    for name in sorted(os.listdir(directory)):
+        stem, extension = os.path.splitext(name)
+        reference = os.path.join(directory, stem + ".txt")
+        if extension.lower() in AUDIO_EXTENSIONS and os.path.exists(reference):
+            with open(reference, encoding="utf-8") as f:
+                pairs.append((os.path.join(directory, name), f.read()))
+    return pairs
+
+
+def normalize_words(text: str):
+    import re
+
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_errors(reference: str, hypothesis: str):
+    """(substitutions + deletions + insertions, reference word count) by word-level edit distance"""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1], len(ref)
+
+
+def asr_engine_run(engine: str, paths):
+    """Runs in a fresh process so peak RSS is this engine's alone"""
+    import resource
+
+    backend = importlib.import_module("fwea-final-backend")
+    backend.models.ensure_loaded(through="imports")
+
+    start = time.perf_counter()
+    asr = backend.load_asr_backend(engine)
+    if asr is None:
+        return None
+    asr.transcribe(np.zeros(backend.WHISPER_SAMPLE_RATE, dtype=np.float32), False)  # Lazy model init stays out of RTF
+    load_seconds = time.perf_counter() - start
+
+    clips = []
+    for path in paths:
+        audio, _ = backend.librosa.load(path, sr=backend.WHISPER_SAMPLE_RATE)
+        (result, _), elapsed = timed(asr.transcribe, audio, False)  # Word timing on every segment for both
+        clips.append((result["text"], len(audio) / backend.WHISPER_SAMPLE_RATE, elapsed))
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+    return {"load_seconds": load_seconds, "clips": clips, "peak_rss_mb": peak_rss_mb}
+
+
+def bench_asr_engines(args):
+    from concurrent.futures import ProcessPoolExecutor
+
+    if not os.path.isdir(args.testset):
+        print("🎤 ASR engine benchmark needs a test set: --testset DIR of audio clips with same-named .txt transcripts")
+        return
+    test_set = load_test_set(args.testset)
+    backend = importlib.import_module("fwea-final-backend")
+    print(f"🎤 ASR engine benchmark ({len(test_set)} clips from {args.testset}, "
+          f"model {backend.WARMUP_CONFIG['whisper_model']}, ctranslate2 {backend.ASR_CONFIG['ctranslate2_compute_type']})")
+
+    for engine in args.engines:
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            run = pool.submit(asr_engine_run, engine, [path for path, _ in test_set]).result()
+        if run is None:
+            print(f"  {engine:>12}: not available in this environment")
+            continue
+
+        errors = [word_errors(reference, text) for (_, reference), (text, _, _) in zip(test_set, run["clips"])]
+        audio_seconds = sum(seconds for _, seconds, _ in run["clips"])
+        asr_seconds = sum(elapsed for _, _, elapsed in run["clips"])
+        wer = sum(e for e, _ in errors) / max(1, sum(n for _, n in errors))
+        print(f"  {engine:>12}: RTF {asr_seconds / audio_seconds:6.3f} ({audio_seconds:.0f}s audio in {asr_seconds:.1f}s) | "
+              f"peak RSS {run['peak_rss_mb']:7.1f}MB | WER {wer:6.2%} | load + warm-up {run['load_seconds']:5.1f}s")
+
+
+# ---------------------------------------------------------------------------
+# Model tiering: replay an arrival trace against fixed and load-adaptive Whisper sizes
+# ---------------------------------------------------------------------------
+
+# Approximate published LibriSpeech test-clean WER (%) - relative quality between sizes, not lyric accuracy
+WHISPER_WER = {"tiny": 7.5, "base": 5.0, "small": 3.4, "medium": 2.9, "large": 2.7}
+
+
+def synthetic_trace(seed: int = 0):
+    """A quiet hour of uploads, then a release drop: 60 tracks inside ten minutes"""
+    rng = np.random.default_rng(seed)
+    quiet = np.cumsum(rng.exponential(60.0, 60))
+    burst = quiet[-1] + 300 + np.sort(rng.uniform(0, 600, 60))
+    return [
+        {
+            "arrival_seconds": float(arrival),
+            "track_seconds": float(rng.uniform(150, 300)),
+            "customer_tier": str(rng.choice(["free", "standard", "priority"], p=[0.5, 0.35, 0.15]))
+        }
+        for arrival in np.concatenate([quiet, burst])
+    ]
+
+
+def load_trace(path: str):
+    """JSONL, one job per line: arrival_seconds, track_seconds, customer_tier, optional deadline_seconds"""
+    import json
+
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def simulate_tiering(backend, trace, workers: int, fixed_model=None, seed: int = 0):
+    """FIFO workers; the backlog each choice sees is computed like job_queue.backlog_seconds()"""
+    import heapq
+
+    config = backend.MODEL_TIER_CONFIG
+    policy = backend.ModelTierPolicy(config["tiers"], config["rtf"], fits=backend.resident_models.fits)
+    true_rtf = dict(config["rtf"])  # The configured speeds stand in for measured ones; noise per job
+    rng = np.random.default_rng(seed)
+
+    free_at = [0.0] * workers
+    unfinished = []
+    jobs = []
+    for job in sorted(trace, key=lambda job: job["arrival_seconds"]):
+        now = job["arrival_seconds"]
+        for done in [entry for entry in unfinished if entry["finish"] <= now]:
+            policy.observe(done["model"], done["track_seconds"], done["asr_seconds"])
+            unfinished.remove(done)
+
+        tier = job.get("customer_tier", config["default_customer_tier"])
+        deadline = job.get("deadline_seconds", backend.CUSTOMER_TIERS[tier]["deadline_seconds"])
+        backlog = sum(entry["predicted"] for entry in unfinished) / workers
+        model = fixed_model or policy.choose(job["track_seconds"], tier, deadline, backlog)["model"]
+
+        noise = rng.lognormal(0.0, 0.2)
+        asr_seconds = job["track_seconds"] * true_rtf.get(model, max(true_rtf.values())) * noise
+        start = max(now, heapq.heappop(free_at))
+        finish = start + job["track_seconds"] * config["pipeline_rtf"] * noise + asr_seconds
+        heapq.heappush(free_at, finish)
+
+        entry = {
+            "model": model,
+            "tier": tier,
+            "track_seconds": job["track_seconds"],
+            "asr_seconds": asr_seconds,
+            "predicted": policy.predict_seconds(model, job["track_seconds"]),
+            "finish": finish,
+            "turnaround": finish - now,
+            "missed": finish - now > deadline
+        }
+        unfinished.append(entry)
+        jobs.append(entry)
+    return jobs
+
+
+def bench_model_tiering(args):
+    from collections import Counter
+
+    backend = importlib.import_module("fwea-final-backend")  # Policy only - no models are loaded
+    trace = load_trace(args.trace) if args.trace else synthetic_trace()
+    span_minutes = (max(job["arrival_seconds"] for job in trace) - min(job["arrival_seconds"] for job in trace)) / 60
+    print(f"🎚️ Model tiering simulation ({len(trace)} jobs over {span_minutes:.0f} min, {args.workers} workers, "
+          f"trace: {args.trace or 'synthetic quiet hour + release drop'})")
+
+    tiers = backend.MODEL_TIER_CONFIG["tiers"]
+    runs = [(f"fixed {size}", size) for size in tiers] + [("adaptive", None)]
+    for label, fixed_model in runs:
+        jobs = simulate_tiering(backend, trace, args.workers, fixed_model)
+        turnaround = np.array([job["turnaround"] for job in jobs])
+        priority = [job for job in jobs if job["tier"] == "priority"]
+        audio_seconds = sum(job["track_seconds"] for job in jobs)
+        if all(job["model"] in WHISPER_WER for job in jobs):
+            wer = f"{sum(WHISPER_WER[job['model']] * job['track_seconds'] for job in jobs) / audio_seconds:4.2f}%"
+        else:
+            wer = "  n/a"
+        mix = Counter(job["model"] for job in jobs)
+        print(f"  {label:>14}: missed {np.mean([job['missed'] for job in jobs]):6.1%} "
+              f"(priority {np.mean([job['missed'] for job in priority]) if priority else 0.0:6.1%}) | "
+              f"turnaround p50 {np.percentile(turnaround, 50):6.0f}s p95 {np.percentile(turnaround, 95):6.0f}s | "
+              f"WER ~{wer} | " + " ".join(f"{size} {mix[size]}" for size in tiers if mix[size]))
+
+
+# ---------------------------------------------------------------------------
+# Startup: time until the server answers vs time until models are warm
+# ---------------------------------------------------------------------------
+
+def wait_for_status(url: str, status: int, timeout: float = 600.0) -> float:
+    """Poll url until it returns the given HTTP status; returns the time it took"""
+    import urllib.error
+    import urllib.request
+
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                code = response.status
+        except urllib.error.HTTPError as e:
+            code = e.code
+        except OSError:
+            code = None
+        if code == status:
+            return time.perf_counter() - start
+        time.sleep(0.05)
+    raise TimeoutError(f"{url} did not return {status} within {timeout:g}s")
+
+
+def bench_startup(args):
+    import subprocess
+    import sys
+
+    repo = os.path.dirname(os.path.abspath(__file__))
+    port = 18700
+
+    print("🚀 Startup benchmark (uvicorn cold start)")
+    with tempfile.TemporaryDirectory() as tmp:  # The backend creates its storage dirs in the cwd
+        start = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "--app-dir", repo, "--port", str(port),
+             "--log-level", "warning", "fwea-final-backend:app"],
+            cwd=tmp
+        )
+        try:
+            base = f"http://127.0.0.1:{port}"
+            live = wait_for_status(f"{base}/health/live", 200)
+            ready = wait_for_status(f"{base}/health/ready", 200) + live
+            print(f"  first response (/health/live): {live:6.2f}s")
+            print(f"  models warm (/health/ready):  {ready:6.2f}s "
+                  f"(eager loading served nothing until this point)")
+            print(f"  total wall: {time.perf_counter() - start:6.2f}s")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+BENCHMARKS = {
+    "separation": bench_separation,
+    "streaming": bench_streaming,
+    "job_queue": bench_job_queue,
+    "profanity_matching": bench_profanity_matching,
+    "timing_index": bench_timing_index,
+    "better_profanity": bench_better_profanity,
+    "whisper_feed": bench_whisper_feed,
+    "startup": bench_startup,
+    "result_cache": bench_result_cache,
+    "upload": bench_upload,
+    "range_requests": bench_range_requests,
+    "transcode": bench_transcode,
+    "session_store": bench_session_store,
+    "artifact_gc": bench_artifact_gc,
+    "expiry": bench_expiry,
+    "session_memory": bench_session_memory,
+    "whisper_client": bench_whisper_client,
+    "whisper_payload": bench_whisper_payload,
+    "chunked_transcription": bench_chunked_transcription,
+    "language_id": bench_language_id,
+    "two_pass": bench_two_pass,
+    "vad": bench_vad,
+    "batched_asr": bench_batched_asr,
+    "asr_engines": bench_asr_engines,
+    "model_tiering": bench_model_tiering,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FWEA-I backend benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 5, 10],
+                        help="Track lengths to synthesize")
+    parser.add_argument("--skip-legacy", action="store_true",
+                        help="Only time the new implementation")
+    parser.add_argument("--max-memory-mb", type=float, default=64,
+                        help="Memory ceiling for the streaming pipeline")
+    parser.add_argument("--words", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Transcript sizes for detection benchmarks")
+    parser.add_argument("--megabytes", type=int, nargs="+", default=[10, 50, 100],
+                        help="Payload sizes for upload benchmarks")
+    parser.add_argument("--jobs", type=int, default=8,
+                        help="Concurrent submissions for queue benchmarks")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16],
+                        help="Concurrent transcriptions for ASR load tests")
+    parser.add_argument("--engines", nargs="+", default=["whisper", "ctranslate2"],
+                        help="ASR engines to compare")
+    parser.add_argument("--testset", default="testset",
+                        help="Directory of audio clips with same-named .txt reference transcripts")
+    parser.add_argument("--trace",
+                        help="JSONL arrival trace for the model tiering simulation (synthetic when omitted)")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Processing workers in the model tiering simulation")
+    parser.add_argument("--audio",
+                        help="Vocal recording for ASR benchmarks (Whisper needs real speech)")
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,20 +8,37 @@ import json
 import uuid
 import logging
 import asyncio
-import librosa
+import bisect
+import hashlib
+import itertools
+import string
+import multiprocessing
+import queue
+import shutil
+import subprocess
+import threading
+import time
+import tracemalloc
 import soundfile as sf
 import numpy as np
-from typing import Dict, List, Tuple, Optional, Any
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple, Optional, Any, Callable
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from fastapi import FastAPI, UploadFile, File, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
-from pydub import AudioSegment
-from pydub.silence import detect_nonsilent
-import scipy.signal
-from better_profanity import profanity
-import whisper
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, Response
 import stripe
+from session_store import open_session_store
+from upload_limits import UploadLimitMiddleware, save_upload
+
+# Heavy audio/ML modules - imported by the background warm-up (ModelWarmup), not at import time,
+# so the server binds and answers liveness checks before librosa/scipy/torch are loaded
+librosa = None
+scipy = None
+soxr = None
+whisper = None
+profanity = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -52,8 +69,170 @@ FINAL_CONFIG = {
     "instrumental_preservation": 100
 }
 
-# Initialize profanity detection
-profanity.load_censor_words()
+# Streaming mode - processes audio in overlapping STFT blocks with bounded memory
+STREAMING_CONFIG = {
+    "enabled": os.getenv("FWEA_STREAMING", "false").lower() == "true",
+    "max_memory_mb": int(os.getenv("FWEA_STREAMING_MAX_MEMORY_MB", "256")),
+    "min_memory_mb": 16,  # Lowest ceiling a /process request may ask for - below it blocks shrink to a few frames
+    "block_memory_fraction": 0.5  # Share of the ceiling given to STFT block buffers
+}
+
+# Pipeline stages reported to /status with the percent complete when each one starts
+PIPELINE_STAGES = {
+    "queued": 0,
+    "starting": 2,
+    "loading": 5,
+    "separation": 10,
+    "transcription": 35,
+    "detection": 70,
+    "cleaning": 75,
+    "saving": 85,
+    "lyrics": 95,
+    "complete": 100,
+    "error": 100
+}
+
+# Job queue - processing runs in a pool of worker processes, off the event loop
+JOB_QUEUE_CONFIG = {
+    "max_workers": int(os.getenv("FWEA_PROCESSING_WORKERS", str(os.cpu_count() or 1)))
+}
+
+# Uploads are copied to disk (and hashed) chunk by chunk and aborted once they cross max_bytes
+UPLOAD_CONFIG = {
+    "chunk_size": 1024 * 1024,
+    "max_bytes": int(os.getenv("FWEA_MAX_UPLOAD_MB", "100")) * 1024 * 1024,
+    "multipart_overhead": 64 * 1024  # Allowance for form boundaries and headers in the body
+}
+app.add_middleware(
+    UploadLimitMiddleware,
+    paths=["/upload"],
+    max_bytes=UPLOAD_CONFIG["max_bytes"],
+    overhead=UPLOAD_CONFIG["multipart_overhead"]
+)
+
+# Result cache - finished results keyed by upload content hash, shared by every re-upload of a track
+RESULT_CACHE_CONFIG = {
+    "enabled": os.getenv("FWEA_RESULT_CACHE", "true").lower() == "true",
+    "directory": os.getenv("FWEA_RESULT_CACHE_DIR", "cache"),
+    "max_size_mb": int(os.getenv("FWEA_RESULT_CACHE_MAX_MB", "4096")),
+    "pipeline_version": "4"  # Bump whenever processing output changes so stale results are never served
+}
+
+# Download formats - encoded from the WAV masters on first request and kept per session
+TRANSCODE_FORMATS = {
+    "wav": {"extension": "wav", "media_type": "audio/wav", "codec": None, "default_kbps": None},
+    "flac": {"extension": "flac", "media_type": "audio/flac", "codec": ["-c:a", "flac"], "default_kbps": None},
+    "mp3": {"extension": "mp3", "media_type": "audio/mpeg", "codec": ["-c:a", "libmp3lame"], "default_kbps": 192},
+    "opus": {"extension": "opus", "media_type": "audio/ogg", "codec": ["-c:a", "libopus"], "default_kbps": 128}
+}
+TRANSCODE_CONFIG = {
+    "bitrate_range_kbps": (32, 320),
+    "preview_format": os.getenv("FWEA_PREVIEW_FORMAT", "opus"),
+    "preview_kbps": int(os.getenv("FWEA_PREVIEW_KBPS", "64"))
+}
+
+# Session store - persistent and shared by every uvicorn worker (sqlite, redis or memory)
+SESSION_CONFIG = {
+    "backend": os.getenv("FWEA_SESSION_STORE", "sqlite"),
+    "path": os.getenv("FWEA_SESSION_DB", "fwea_sessions.db"),
+    "redis_url": os.getenv("FWEA_REDIS_URL", "redis://localhost:6379/0"),
+    "ttl_hours": float(os.getenv("FWEA_SESSION_TTL_HOURS", "24"))  # 0 keeps sessions until deleted
+}
+
+# Artifact garbage collection - disk budget for uploads/, final/, lyrics/ and per-class retention.
+# Under budget pressure, artifacts are evicted by age relative to their class retention, so the
+# final mix outlives previews, stems and re-encodable variants of the same age
+ARTIFACT_GC_CONFIG = {
+    "enabled": os.getenv("FWEA_ARTIFACT_GC", "true").lower() == "true",
+    "budget_mb": int(os.getenv("FWEA_ARTIFACT_BUDGET_MB", "20480")),
+    "interval_seconds": int(os.getenv("FWEA_ARTIFACT_GC_INTERVAL", "300")),
+    "retention_hours": {
+        "final": float(os.getenv("FWEA_FINAL_RETENTION_HOURS", "168")),
+        "preview": 24.0,
+        "stems": 48.0,
+        "variants": 12.0,
+        "upload": 24.0
+    }
+}
+
+# Model warm-up - which Whisper checkpoint to load and whether to run a dummy inference before ready
+WARMUP_CONFIG = {
+    "whisper_model": os.getenv("FWEA_WHISPER_MODEL", "base"),
+    "dummy_inference": os.getenv("FWEA_WARMUP_INFERENCE", "1") != "0"
+}
+
+# Transcription - two-pass mode decodes without word timestamps, then runs word alignment only on
+# the 30-second decode windows whose segments contain profanity
+TRANSCRIPTION_CONFIG = {
+    "two_pass": os.getenv("FWEA_TWO_PASS", "true").lower() == "true"
+}
+
+# ASR engine - selectable per deployment (FWEA_ASR_ENGINE) and per job ("asr_engine" in /process).
+# "whisper" is openai-whisper in float32; "ctranslate2" is faster-whisper with int8 weights on CPU.
+ASR_CONFIG = {
+    "engine": os.getenv("FWEA_ASR_ENGINE", "whisper"),
+    "ctranslate2_model": os.getenv("FWEA_CT2_MODEL", WARMUP_CONFIG["whisper_model"]),  # Size name or converted model directory
+    "ctranslate2_compute_type": os.getenv("FWEA_CT2_COMPUTE_TYPE", "int8"),
+    # Every pool worker builds its own model - split the cores between them rather than each taking all
+    "ctranslate2_threads": int(os.getenv(
+        "FWEA_CT2_THREADS",
+        str(max(1, (os.cpu_count() or 1) // JOB_QUEUE_CONFIG["max_workers"]))
+    )),
+    "ctranslate2_beam_size": int(os.getenv("FWEA_CT2_BEAM_SIZE", "1")),  # Greedy, like whisper's transcribe()
+    # A failed model load is retried after a backoff that doubles per failure, up to the max
+    "load_retry_seconds": float(os.getenv("FWEA_ASR_LOAD_RETRY_SECONDS", "30")),
+    "load_retry_max_seconds": float(os.getenv("FWEA_ASR_LOAD_RETRY_MAX_SECONDS", "900"))
+}
+
+# Batched Whisper inference - pending 30-second windows from every concurrent job share one
+# encoder/decoder pass. Windows decode without the previous window's text as a prompt (a batch
+# shares one prompt), with transcribe()'s temperature fallback and thresholds.
+WHISPER_BATCH_CONFIG = {
+    "enabled": os.getenv("FWEA_WHISPER_BATCHING", "true").lower() == "true",
+    "max_batch": int(os.getenv("FWEA_WHISPER_MAX_BATCH", "16")),
+    "max_wait_ms": float(os.getenv("FWEA_WHISPER_BATCH_WAIT_MS", "50")),
+    "temperatures": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+    "compression_ratio_threshold": 2.4,
+    "logprob_threshold": -1.0,
+    "no_speech_threshold": 0.6,
+    "timeout_seconds": float(os.getenv("FWEA_WHISPER_TIMEOUT_SECONDS", "3600"))  # Per pass - a stuck job errors instead of hanging
+}
+
+# Model tiering - each job's Whisper size is picked from queue backlog, track length, customer tier and
+# deadline: the most accurate size predicted to finish in time. Several sizes stay resident in the
+# server process within the memory budget; the deployment default (FWEA_WHISPER_MODEL) is pinned.
+MODEL_TIER_CONFIG = {
+    "enabled": os.getenv("FWEA_MODEL_TIERING", "true").lower() == "true",
+    "tiers": [size.strip() for size in os.getenv("FWEA_MODEL_TIERS", "tiny,base,small").split(",")],  # Fastest first
+    "memory_budget_mb": float(os.getenv("FWEA_MODEL_MEMORY_MB", "2048")),
+    "model_memory_mb": {"tiny": 160, "base": 300, "small": 970, "medium": 3100, "large": 6300},  # fp32 weights, until measured
+    "rtf": {"tiny": 0.04, "base": 0.08, "small": 0.25, "medium": 0.7, "large": 1.4},  # ASR seconds per track second, refined by observed jobs
+    "rtf_smoothing": 0.2,
+    "pipeline_rtf": 0.1,  # Decode, separation, cleaning and mixing per track second
+    "safety_factor": 1.3,  # Headroom on every prediction before it is compared with a deadline
+    "upgrade_backlog_seconds": float(os.getenv("FWEA_TIER_UPGRADE_BACKLOG_SECONDS", "180")),  # Per worker - the priority deadline
+    "default_customer_tier": "standard"
+}
+
+# Customer tiers - the largest model a tier may get and its default turnaround deadline
+CUSTOMER_TIERS = {
+    "free": {"max_model": "base", "deadline_seconds": 1800},
+    "standard": {"max_model": "small", "deadline_seconds": 600},
+    "priority": {"max_model": "small", "deadline_seconds": 180}
+}
+
+# Voice-activity gating - Whisper only hears the regions of the vocal stem where someone is singing;
+# intros, drops and outros that hold nothing but separation bleed are skipped
+VAD_CONFIG = {
+    "enabled": os.getenv("FWEA_VAD", "true").lower() == "true",
+    "frame_ms": 30,
+    "dynamic_range_db": 30.0,  # Frames this far below the loudest vocals count as bleed
+    "floor_dbfs": -55.0,  # Nothing quieter than this is ever voice
+    "min_region_ms": 300,  # Shorter bursts are dropped
+    "merge_gap_ms": 700,  # Pauses shorter than this stay inside one region
+    "pad_ms": 250,  # Kept either side of a region so word onsets and tails survive
+    "packing_gap_ms": 300  # Silence between packed regions so words never run together
+}
 
 # REAL PROFANITY PATTERNS - Comprehensive and accurate
 REAL_PROFANITY_PATTERNS = {
@@ -101,19 +280,1335 @@ REAL_PROFANITY_PATTERNS = {
     }
 }
 
-# Initialize Whisper model
-try:
-    whisper_model = whisper.load_model("base")
-    logger.info("✅ Whisper model loaded successfully")
-except Exception as e:
-    logger.warning(f"⚠️ Whisper model failed to load: {e}")
-    whisper_model = None
+# Explicit keywords - whole-word search (most reliable)
+EXPLICIT_KEYWORDS = [
+    'fuck', 'fucking', 'fucked', 'fucker', 'fuckers',
+    'shit', 'shitting', 'shitted', 'shitter', 'shitty',
+    'bitch', 'bitching', 'bitchy', 'bitches',
+    'damn', 'damned', 'dammit', 'goddamn',
+    'hell', 'hellish', 'what the hell',
+    'ass', 'asshole', 'assholes', 'dumbass', 'badass',
+    'bastard', 'bastards',
+    'crap', 'crappy', 'crapping', 'crapped',
+    'piss', 'pissed', 'pissing', 'pissoff'
+]
+
+HIGH_SEVERITY_WORDS = ['fuck', 'fucking', 'fucked', 'fucker', 'shit', 'shitting', 'bitch', 'bitching', 'nigger', 'nigga']
+
+class ProfanityMatcher:
+    """Regex patterns and explicit keywords compiled once, matched in a single pass over the text
+
+    One zero-width scanner (the union of every pattern plus the whole-word keyword alternation)
+    finds each position where anything can match. Only those positions are examined in Python:
+    patterns are dispatched on the first letter, so overlapping matches from different patterns
+    are all reported, and matches come back in the order the old per-pattern and per-keyword
+    scans produced them.
+    """
+
+    SEVERITY_LEVELS = ['high_severity', 'medium_severity', 'censored']
+
+    def __init__(self, patterns: Dict[str, List[Dict]], keywords: List[str]):
+        self.patterns = []
+        self._by_letter: Dict[str, List[int]] = {}
+        self._unanchored: List[int] = []
+
+        for severity_level in self.SEVERITY_LEVELS:
+            for pattern_data in patterns.get(severity_level, []):
+                index = len(self.patterns)
+                self.patterns.append({
+                    **pattern_data,
+                    'severity': severity_level.split('_')[0],  # high, medium, censored
+                    'compiled': re.compile(pattern_data['pattern'], re.IGNORECASE)
+                })
+
+                # Patterns open with \b and a letter - IGNORECASE also lets 's' match the long s
+                source = pattern_data['pattern']
+                if source.startswith('\\b') and source[2:3].isalpha():
+                    letter = source[2].lower()
+                    self._by_letter.setdefault(letter, []).append(index)
+                    if letter == 's':
+                        self._by_letter.setdefault('\u017f', []).append(index)
+                else:
+                    self._unanchored.append(index)
+
+        self.keywords = keywords
+        self._keyword_index = {keyword: i for i, keyword in enumerate(keywords)}
+
+        # Longest first; the lookarounds only admit a keyword that is an entire ASCII letter run
+        alternation = '|'.join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+        keyword_source = f'(?<![a-z\u017f])(?:{alternation})(?![a-z\u017f])'
+        self._keyword_regex = re.compile(keyword_source)
+
+        # Cheap guards first: only a letter-run start with a possible first letter reaches the union
+        first_letters = ''.join(sorted(set(self._by_letter) | {k[0] for k in keywords}))
+        pattern_source = '|'.join(self.patterns[i]['pattern'] for i in sorted(sum(self._by_letter.values(), [])))
+        self._scanner = re.compile(
+            f'(?<![a-z\u017f])(?=[{re.escape(first_letters)}])(?=(?i:{pattern_source})|{keyword_source})'
+        )
+
+    def scan(self, text: str) -> Dict[str, List[Tuple[int, int, int]]]:
+        """Return (pattern_index, start, end) and (keyword_index, start, end) matches"""
+
+        text_lower = text.lower()
+        if len(text_lower) != len(text):
+            # lower() changed offsets (e.g. dotted capital I) - keep pattern offsets on the original text
+            return {'patterns': self._scan_patterns_separately(text), 'keywords': self._scan_keywords(text_lower)}
+
+        pattern_matches = []
+        keyword_matches = []
+        last_end = [0] * len(self.patterns)
+
+        for hit in self._scanner.finditer(text_lower):
+            start = hit.start()
+
+            for index in self._by_letter.get(text_lower[start], ()):
+                if start < last_end[index]:
+                    continue  # finditer resumes after the previous match of the same pattern
+                match = self.patterns[index]['compiled'].match(text, start)
+                if match:
+                    pattern_matches.append((index, start, match.end()))
+                    last_end[index] = max(match.end(), start + 1)
+
+            self._match_keyword(text_lower, start, keyword_matches)
+
+        for index in self._unanchored:
+            pattern_matches.extend((index, m.start(), m.end()) for m in self.patterns[index]['compiled'].finditer(text))
+
+        pattern_matches.sort(key=lambda m: (m[0], m[1]))
+        keyword_matches.sort(key=lambda m: (m[0], m[1]))
+
+        return {'patterns': pattern_matches, 'keywords': keyword_matches}
+
+    def _match_keyword(self, text_lower: str, start: int, matches: List[Tuple[int, int, int]]):
+        """Whole-word keyword at start (non-ASCII neighbours must not be alphabetic either)"""
+
+        match = self._keyword_regex.match(text_lower, start)
+        if not match:
+            return
+
+        end = match.end()
+        if start > 0 and text_lower[start - 1].isalpha():
+            return
+        if end < len(text_lower) and text_lower[end].isalpha():
+            return
+
+        matches.append((self._keyword_index[match.group()], start, end))
+
+    def _scan_patterns_separately(self, text: str) -> List[Tuple[int, int, int]]:
+        return [
+            (index, m.start(), m.end())
+            for index, pattern_data in enumerate(self.patterns)
+            for m in pattern_data['compiled'].finditer(text)
+        ]
+
+    def _scan_keywords(self, text_lower: str) -> List[Tuple[int, int, int]]:
+        matches = []
+        for hit in re.finditer(f'(?={self._keyword_regex.pattern})', text_lower):
+            self._match_keyword(text_lower, hit.start(), matches)
+        matches.sort(key=lambda m: (m[0], m[1]))
+        return matches
+
+PROFANITY_MATCHER = ProfanityMatcher(REAL_PROFANITY_PATTERNS['english'], EXPLICIT_KEYWORDS)
+
+class _LowercaseLetterTable(dict):
+    """str.translate table keeping a-z and deleting every other character (cached on first sight)"""
+
+    def __init__(self):
+        super().__init__((ord(c), ord(c)) for c in string.ascii_lowercase)
+
+    def __missing__(self, codepoint: int):
+        self[codepoint] = None
+        return None
+
+class CensorWordSet:
+    """better_profanity's wordlist expanded once into a frozenset of a-z spellings
+
+    Tokens are cleaned down to a-z before the lookup, so only the letter substitutions in the
+    library's leetspeak map (i/l, u/v) can ever match - every such variant is precomputed and
+    profanity.contains_profanity(clean_word) becomes a set membership test. As in the library,
+    single characters never count.
+    """
+
+    def __init__(self, censor):
+        letters = set(string.ascii_lowercase)
+        char_map = {
+            char: tuple(sub for sub in subs if set(sub) <= letters)
+            for char, subs in censor.CHARS_MAPPING.items()
+        }
+
+        variants = set()
+        for entry in censor.CENSOR_WORDSET:
+            word = str(entry).lower()
+            choices = [char_map.get(char, (char,)) for char in word]
+            for spelling in itertools.product(*choices):
+                candidate = ''.join(spelling)
+                if set(candidate) <= letters:
+                    variants.add(candidate)
+
+        self.words = frozenset(variants)
+        self.clean_table = _LowercaseLetterTable()
+
+    def clean(self, word: str) -> str:
+        return word.translate(self.clean_table)
+
+    def __contains__(self, clean_word: str) -> bool:
+        return len(clean_word) > 1 and clean_word in self.words
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+CENSOR_WORDS: Optional[CensorWordSet] = None  # Built by ModelWarmup once the wordlist is loaded
+
+class TranscriptIndex:
+    """Character offset -> word index -> word timestamp lookups for one transcript
+
+    Token start offsets are computed once, so the word index for an offset (the number of
+    whitespace-separated tokens starting before it, as len(text[:offset].split()) counts them)
+    is a bisect instead of a re-split of the transcript for every match.
+    """
+
+    TOKEN_PATTERN = re.compile(r'\S+')
+
+    def __init__(self, text: str, word_timestamps: Optional[List[Dict]] = None):
+        self.token_starts = [m.start() for m in self.TOKEN_PATTERN.finditer(text)]
+        self.word_count = len(self.token_starts)
+
+        # Whisper returns segments carrying their own 'words' - flatten to one entry per word
+        self.word_timestamps = []
+        for entry in word_timestamps or []:
+            if 'words' in entry:
+                self.word_timestamps.extend(entry['words'])
+            else:
+                self.word_timestamps.append(entry)
+
+    def word_index_at(self, offset: int) -> int:
+        return bisect.bisect_left(self.token_starts, offset)
+
+    def timestamp(self, word_index: int) -> Optional[Dict]:
+        if word_index < len(self.word_timestamps):
+            return self.word_timestamps[word_index]
+        return None
+
+# Whisper consumes 16 kHz mono float32 audio
+WHISPER_SAMPLE_RATE = 16000
+
+class VoiceActivityDetector:
+    """Energy + spectral-flux VAD over fixed frames, vectorized in NumPy
+
+    A frame is voiced when its level clears the bleed threshold (a dynamic range under the
+    loudest frames, and above the noise floor) by a margin, or clears it while the spectrum is
+    changing faster than usual - sung syllables move, steady bleed does not. Voiced frames are
+    merged into padded regions, which pack() concatenates for Whisper with a timeline to map
+    timestamps back.
+    """
+
+    FLUX_BLOCK_FRAMES = 8192  # Bounds the FFT working set on long tracks
+
+    def __init__(self, sr: int = WHISPER_SAMPLE_RATE, config: Optional[Dict[str, Any]] = None):
+        self.sr = sr
+        self.config = config or VAD_CONFIG
+        self.frame = int(sr * self.config["frame_ms"] / 1000)
+
+    def _ms_to_frames(self, ms: float) -> int:
+        return max(1, int(round(ms / self.config["frame_ms"])))
+
+    def features(self, audio: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-frame level in dBFS and normalized positive spectral flux"""
+
+        n_frames = len(audio) // self.frame
+        frames = np.asarray(audio[:n_frames * self.frame], dtype=np.float32).reshape(n_frames, self.frame)
+        level_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+
+        window = np.hanning(self.frame).astype(np.float32)
+        flux = np.zeros(n_frames, dtype=np.float32)
+        previous = None
+        for start in range(0, n_frames, self.FLUX_BLOCK_FRAMES):
+            spectrum = np.abs(np.fft.rfft(frames[start:start + self.FLUX_BLOCK_FRAMES] * window, axis=1)).astype(np.float32)
+            spectrum /= spectrum.sum(axis=1, keepdims=True) + 1e-10
+            shifted = np.vstack([spectrum[:1] if previous is None else previous, spectrum[:-1]])
+            flux[start:start + len(spectrum)] = np.maximum(spectrum - shifted, 0).sum(axis=1)
+            previous = spectrum[-1:]
+
+        return level_db, flux
+
+    def regions(self, audio: np.ndarray) -> List[Tuple[int, int]]:
+        """(start, end) sample ranges of vocal activity"""
+
+        level_db, flux = self.features(audio)
+        if len(level_db) == 0:
+            return []
+
+        threshold = max(
+            np.percentile(level_db, 10) + 6,  # Noise floor
+            np.percentile(level_db, 99) - self.config["dynamic_range_db"],
+            self.config["floor_dbfs"]
+        )
+        smoothing = self._ms_to_frames(300)
+        flux = np.convolve(flux, np.ones(smoothing, dtype=np.float32) / smoothing, mode='same')
+        voiced = (level_db > threshold + 6) | ((level_db > threshold) & (flux > np.median(flux)))
+
+        # Run boundaries of the voiced mask, then merge short pauses and drop short bursts
+        edges = np.flatnonzero(np.diff(np.concatenate([[0], voiced.astype(np.int8), [0]])))
+        runs = edges.reshape(-1, 2)
+        merge_gap = self._ms_to_frames(self.config["merge_gap_ms"])
+        min_region = self._ms_to_frames(self.config["min_region_ms"])
+        pad = self._ms_to_frames(self.config["pad_ms"])
+
+        merged: List[List[int]] = []
+        for start, end in runs:
+            if merged and start - merged[-1][1] < merge_gap:
+                merged[-1][1] = end
+            else:
+                merged.append([start, end])
+
+        regions = []
+        for start, end in merged:
+            if end - start < min_region:
+                continue
+            start, end = int(max(0, start - pad) * self.frame), int(min(len(level_db), end + pad) * self.frame)
+            if regions and start <= regions[-1][1]:
+                regions[-1] = (regions[-1][0], end)  # Padding made neighbours touch
+            else:
+                regions.append((start, end))
+
+        return regions
+
+    def pack(self, audio: np.ndarray, regions: List[Tuple[int, int]]) -> Tuple[np.ndarray, 'VoicedTimeline']:
+        """Voiced regions back to back (with a short silence between) and the packed -> original map"""
+
+        gap = np.zeros(int(self.sr * self.config["packing_gap_ms"] / 1000), dtype=np.float32)
+        pieces, packed_starts, position = [], [], 0
+        for start, end in regions:
+            packed_starts.append(position)
+            pieces.extend([audio[start:end], gap])
+            position += end - start + len(gap)
+
+        packed = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+        return np.ascontiguousarray(packed, dtype=np.float32), VoicedTimeline(regions, packed_starts, self.sr)
+
+class VoicedTimeline:
+    """Maps times in the packed voiced audio back to the original track"""
+
+    def __init__(self, regions: List[Tuple[int, int]], packed_starts: List[int], sr: int):
+        self.sr = sr
+        self.regions = regions
+        self.packed_starts = [p / sr for p in packed_starts]
+
+    def to_original(self, packed_time: float) -> float:
+        i = max(0, bisect.bisect_right(self.packed_starts, packed_time) - 1)
+        start, end = self.regions[i]
+        offset = min(packed_time - self.packed_starts[i], (end - start) / self.sr)  # Times in a gap stick to the region end
+        return round(start / self.sr + offset, 2)
+
+    def map_segments(self, segments: List[Dict]):
+        """Rewrite segment and word start/end times in place"""
+
+        for segment in segments:
+            for item in [segment] + segment.get('words', []):
+                item['start'] = self.to_original(item['start'])
+                item['end'] = self.to_original(item['end'])
+
+class WindowedTranscription:
+    """One audio's walk through its 30-second decode windows, advanced one decode result at a time
+
+    Follows whisper.transcribe()'s seek loop - timestamp-token segments, temperature fallback,
+    no-speech skipping - except that windows are decoded without the previous window's text as a
+    prompt, which is what lets windows from different jobs share one batched decoder pass.
+    """
+
+    def __init__(self, model, audio: np.ndarray, language: str):
+        self.language = language
+        self.mel = whisper.log_mel_spectrogram(audio, model.dims.n_mels, padding=whisper.audio.N_SAMPLES)
+        self.content_frames = self.mel.shape[-1] - whisper.audio.N_FRAMES
+        self.input_stride = whisper.audio.N_FRAMES // model.dims.n_audio_ctx  # Mel frames per timestamp step
+        self.time_precision = self.input_stride * whisper.audio.HOP_LENGTH / whisper.audio.SAMPLE_RATE
+        self.seek = 0
+        self.temperature_index = 0
+        self.queued_at = 0.0
+        self.segments: List[Dict] = []
+        self.tokens: List[int] = []
+        self.future: Future = Future()
+
+    @property
+    def done(self) -> bool:
+        return self.seek >= self.content_frames
+
+    @property
+    def window_size(self) -> int:
+        return min(whisper.audio.N_FRAMES, self.content_frames - self.seek)
+
+    def window(self):
+        """The current window's mel frames, padded to 30 seconds"""
+        return whisper.pad_or_trim(self.mel[:, self.seek:self.seek + self.window_size], whisper.audio.N_FRAMES)
+
+    def needs_fallback(self, result) -> bool:
+        """transcribe()'s retry rule: too repetitive or too improbable, unless it is just silence"""
+
+        config = WHISPER_BATCH_CONFIG
+        if result.no_speech_prob > config["no_speech_threshold"] and result.avg_logprob < config["logprob_threshold"]:
+            return False
+        return result.compression_ratio > config["compression_ratio_threshold"] or result.avg_logprob < config["logprob_threshold"]
+
+    def advance(self, result, tokenizer):
+        """Turn the current window's decode into segments and move seek past what it covered"""
+
+        config = WHISPER_BATCH_CONFIG
+        size = self.window_size
+        previous_seek = self.seek
+        time_offset = self.seek * whisper.audio.HOP_LENGTH / whisper.audio.SAMPLE_RATE
+
+        if result.no_speech_prob > config["no_speech_threshold"] and result.avg_logprob <= config["logprob_threshold"]:
+            self.seek += size  # Silence - nothing to keep from this window
+            return
+
+        tokens = list(result.tokens)
+        begin = tokenizer.timestamp_begin
+        is_timestamp = [token >= begin for token in tokens]
+        single_timestamp_ending = is_timestamp[-2:] == [False, True]
+        consecutive = [i + 1 for i in range(len(tokens) - 1) if is_timestamp[i] and is_timestamp[i + 1]]
+
+        window_segments = []
+        if consecutive:
+            slices = consecutive + ([len(tokens)] if single_timestamp_ending else [])
+            last_slice = 0
+            for current_slice in slices:
+                piece = tokens[last_slice:current_slice]
+                window_segments.append(self._segment(
+                    time_offset + (piece[0] - begin) * self.time_precision,
+                    time_offset + (piece[-1] - begin) * self.time_precision,
+                    piece, result, tokenizer
+                ))
+                last_slice = current_slice
+
+            if single_timestamp_ending:
+                self.seek += size
+            else:
+                # Drop the unfinished segment and pick up again from its opening timestamp
+                self.seek += (tokens[last_slice - 1] - begin) * self.input_stride
+        else:
+            duration = size * whisper.audio.HOP_LENGTH / whisper.audio.SAMPLE_RATE
+            timestamps = [token for token, stamp in zip(tokens, is_timestamp) if stamp]
+            if timestamps and timestamps[-1] != begin:
+                duration = (timestamps[-1] - begin) * self.time_precision
+            window_segments.append(self._segment(time_offset, time_offset + duration, tokens, result, tokenizer))
+            self.seek += size
+
+        if self.seek <= previous_seek:
+            self.seek = previous_seek + size  # Never decode the same window twice
+
+        for segment in window_segments:
+            if segment['start'] == segment['end'] or not segment['text'].strip():
+                segment['text'], segment['tokens'] = '', []
+
+            segment['id'] = len(self.segments)
+            self.segments.append(segment)
+            self.tokens.extend(segment['tokens'])
+
+    def _segment(self, start: float, end: float, tokens: List[int], result, tokenizer) -> Dict:
+        return {
+            'seek': self.seek,
+            'start': start,
+            'end': end,
+            'text': tokenizer.decode([token for token in tokens if token < tokenizer.eot]),
+            'tokens': tokens,
+            'temperature': result.temperature,
+            'avg_logprob': result.avg_logprob,
+            'compression_ratio': result.compression_ratio,
+            'no_speech_prob': result.no_speech_prob
+        }
+
+    def result(self, tokenizer) -> Dict[str, Any]:
+        return {'text': tokenizer.decode(self.tokens), 'segments': self.segments, 'language': self.language}
+
+class WhisperBatchScheduler:
+    """Decodes pending 30-second windows from every concurrent transcription in shared batches
+
+    One inference thread owns the model: it gathers up to max_batch queued windows - holding a
+    partial batch at most max_wait_ms for jobs still computing their mel - runs a single batched
+    encoder and decoder pass, and hands each result back to its job, which queues its next window.
+    Windows only share a batch when they decode at the same language and fallback temperature.
+    """
+
+    def __init__(self, model, max_batch: int, max_wait_ms: float):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._cond = threading.Condition()
+        self._pending: List[WindowedTranscription] = []
+        self._calls: List[Tuple[Callable[[], Any], Future]] = []
+        self._closed = False
+        self._preparing = 0  # Jobs submitted but still computing their mel
+        self._active = 0
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._tokenizers: Dict[str, Any] = {}
+        self.jobs = 0
+        self.windows = 0
+        self.batches = 0
+
+    def transcribe(self, audio: np.ndarray, language: str = 'en') -> Dict[str, Any]:
+        """Blocking transcription - same result shape as whisper_model.transcribe()"""
+        return self.submit(audio, language).result(timeout=WHISPER_BATCH_CONFIG["timeout_seconds"])
+
+    def submit(self, audio: np.ndarray, language: str = 'en') -> Future:
+        self._ensure_thread()
+
+        with self._cond:
+            self._preparing += 1
+        try:
+            job = WindowedTranscription(self.model, audio, language)
+        finally:
+            with self._cond:
+                self._preparing -= 1
+                self._cond.notify()
+
+        if job.done:
+            job.future.set_result(job.result(self._tokenizer(language)))  # Shorter than one mel frame
+            return job.future
+
+        with self._cond:
+            self.jobs += 1
+            self._active += 1
+            self._enqueue(job)
+
+        return job.future
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': True,
+            'max_batch': self.max_batch,
+            'max_wait_ms': round(self.max_wait * 1000, 1),
+            'active_jobs': self._active,
+            'jobs': self.jobs,
+            'windows': self.windows,
+            'batches': self.batches,
+            'mean_batch_size': round(self.windows / self.batches, 2) if self.batches else 0.0
+        }
+
+    def _ensure_thread(self):
+        # A forked worker inherits the object but not the thread - start one per process
+        with self._cond:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='whisper-batcher', daemon=True)
+                self._thread.start()
+
+    def _enqueue(self, job: WindowedTranscription):
+        job.queued_at = time.monotonic()
+        self._pending.append(job)
+        self._cond.notify()
+
+    def _tokenizer(self, language: str):
+        if language not in self._tokenizers:
+            self._tokenizers[language] = whisper.tokenizer.get_tokenizer(
+                self.model.is_multilingual,
+                num_languages=self.model.num_languages,
+                language=language,
+                task='transcribe'
+            )
+        return self._tokenizers[language]
+
+    def call(self, fn: Callable[[], Any]) -> Future:
+        """Run fn on the inference thread between batches - for other passes over the same model"""
+
+        self._ensure_thread()
+        future = Future()
+        with self._cond:
+            self._calls.append((fn, future))
+            self._cond.notify()
+        return future
+
+    def close(self):
+        """Stop the inference thread once it is idle (the model is being unloaded)"""
+
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def _next_batch(self) -> Optional[List[WindowedTranscription]]:
+        with self._cond:
+            while not self._pending and not self._calls:
+                if self._closed:
+                    return None
+                self._cond.wait()
+            if self._calls:
+                return []  # Run the queued calls first
+
+            # Hold a partial batch open for jobs that are about to queue their first window
+            deadline = self._pending[0].queued_at + self.max_wait
+            while len(self._pending) < self.max_batch and self._preparing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            first = self._pending[0]
+            key = (first.language, first.temperature_index)
+            batch = [job for job in self._pending if (job.language, job.temperature_index) == key][:self.max_batch]
+            self._pending = [job for job in self._pending if job not in batch]
+            return batch
+
+    def _run(self):
+        while True:
+            self._run_calls()
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if not batch:
+                continue
+
+            try:
+                results = self._decode(batch)
+            except Exception as e:
+                logger.error(f"❌ Batched Whisper decode failed: {e}")
+                with self._cond:
+                    self._active -= len(batch)
+                for job in batch:
+                    job.future.set_exception(e)
+                continue
+
+            finished, failed = [], []
+            with self._cond:
+                self.batches += 1
+                self.windows += len(batch)
+                for job, result in zip(batch, results):
+                    # A job that can't take its result fails alone - the inference thread keeps serving
+                    try:
+                        if self._route(job, result):
+                            finished.append(job)
+                    except Exception as e:
+                        self._active -= 1
+                        failed.append((job, e))
+
+            # Resolved outside the lock - callbacks may block on IPC
+            for job, e in failed:
+                logger.error(f"❌ Batched Whisper window failed: {e}")
+                job.future.set_exception(e)
+            for job in finished:
+                try:
+                    job.future.set_result(job.result(self._tokenizer(job.language)))
+                except Exception as e:
+                    job.future.set_exception(e)
+
+    def _run_calls(self):
+        with self._cond:
+            calls, self._calls = self._calls, []
+
+        for fn, future in calls:
+            try:
+                future.set_result(fn())
+            except Exception as e:
+                future.set_exception(e)
+
+    def _decode(self, batch: List[WindowedTranscription]):
+        import torch
+
+        language, temperature_index = batch[0].language, batch[0].temperature_index
+        mel = torch.stack([job.window() for job in batch]).to(self.model.device)
+        cuda = self.model.device.type == 'cuda'
+        if cuda:
+            mel = mel.half()  # transcribe() decodes in fp16 on GPU
+
+        options = whisper.DecodingOptions(
+            task='transcribe',
+            language=language,
+            temperature=WHISPER_BATCH_CONFIG["temperatures"][temperature_index],
+            fp16=cuda
+        )
+        return whisper.decode(self.model, mel, options)
+
+    def _route(self, job: WindowedTranscription, result) -> bool:
+        """Retry the window hotter, or take its segments and queue the job's next window
+
+        Returns True once the job has covered all of its audio.
+        """
+
+        if job.needs_fallback(result) and job.temperature_index + 1 < len(WHISPER_BATCH_CONFIG["temperatures"]):
+            job.temperature_index += 1
+        else:
+            job.temperature_index = 0
+            job.advance(result, self._tokenizer(job.language))
+
+        if not job.done:
+            self._enqueue(job)
+            return False
+
+        self._active -= 1
+        return True
+
+class RemoteTranscriber:
+    """A worker process's handle on the server process's resident Whisper models
+
+    Samples travel through a .npy file in the session's work directory; requests and replies
+    through manager queues. The server decodes (in the model's shared batches) and aligns, so
+    workers never need their own copy of the job's model.
+    """
+
+    def __init__(self, session_id: str, requests, replies):
+        self.session_id = session_id
+        self.requests = requests
+        self.replies = replies
+
+    def transcribe(
+        self,
+        audio: np.ndarray,
+        two_pass: bool,
+        model_size: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        work_dir = os.path.join('processed', self.session_id)
+        os.makedirs(work_dir, exist_ok=True)
+        audio_path = os.path.join(work_dir, 'whisper_input.npy')
+        np.save(audio_path, np.asarray(audio, dtype=np.float32))
+
+        try:
+            self.requests.put((self.session_id, audio_path, two_pass, model_size))
+            # The server gives decode and alignment the timeout each - past both, assume it is gone
+            reply = self.replies.get(timeout=2 * WHISPER_BATCH_CONFIG["timeout_seconds"])
+        except queue.Empty:
+            raise RuntimeError("batched transcription failed: no reply from the server process")
+        finally:
+            os.remove(audio_path)
+
+        if 'error' in reply:
+            raise RuntimeError(f"batched transcription failed: {reply['error']}")
+        return reply['result'], reply['alignment']
+
+class ResidentModels:
+    """Whisper models kept loaded in this process within a memory budget
+
+    acquire() loads a size on first use, evicting the least recently used idle sizes to make room;
+    the deployment default is pinned. When every other model is busy and the budget cannot be met,
+    the job runs on the closest resident size instead - callers record entry['size'].
+    """
+
+    def __init__(self, budget_mb: float, pinned: str):
+        self.budget_mb = budget_mb
+        self.pinned = pinned
+        self.entries: Dict[str, Dict[str, Any]] = {}  # Size -> model, batcher, memory_mb, users, last_used
+        self._loading: Dict[str, threading.Event] = {}  # Sizes being loaded, set once they are resident (or failed)
+        self._lock = threading.RLock()  # Never held across a model load - /health reads stats meanwhile
+        self.loads = 0
+        self.evictions = 0
+        self.substitutions = 0
+
+    def load(self, size: str, use: bool = False) -> Dict[str, Any]:
+        """Load a size (or mark it used) - raises when whisper cannot load it
+
+        use=True also counts the caller as a user before the lock is released, so the entry
+        cannot be evicted between being returned and being used.
+        """
+
+        while True:
+            with self._lock:
+                entry = self.entries.get(size)
+                if entry is not None:
+                    entry['last_used'] = time.monotonic()
+                    entry['users'] += use
+                    return entry
+
+                loading = self._loading.get(size)
+                if loading is None:
+                    self._make_room(self._estimate_mb(size))
+                    loading = self._loading[size] = threading.Event()
+                    break
+
+            loading.wait()  # Another thread is loading this size - use its entry (or retry if it failed)
+
+        try:
+            model = whisper.load_model(size)
+        except Exception:
+            with self._lock:
+                del self._loading[size]
+            loading.set()
+            raise
+
+        entry = {
+            'size': size,
+            'model': model,
+            'batcher': WhisperBatchScheduler(
+                model,
+                WHISPER_BATCH_CONFIG["max_batch"],
+                WHISPER_BATCH_CONFIG["max_wait_ms"]
+            ) if WHISPER_BATCH_CONFIG["enabled"] else None,
+            'memory_mb': sum(p.numel() * p.element_size() for p in model.parameters()) / (1024 * 1024),
+            'users': int(use),
+            'last_used': time.monotonic()
+        }
+        with self._lock:
+            del self._loading[size]
+            self.entries[size] = entry
+            self.loads += 1
+            self._make_room(0, keep=size)  # The estimate may have been low - trim to the measured size
+        loading.set()
+
+        logger.info(f"🧠 Whisper {size} resident ({entry['memory_mb']:.0f}MB, {self.resident_mb():.0f}/{self.budget_mb:.0f}MB)")
+        return entry
+
+    def preload(self, sizes: List[str]):
+        """Load every size that fits next to what is already resident - nothing is evicted"""
+
+        for size in sizes:
+            if size in self.entries or self.resident_mb() + self._estimate_mb(size) > self.budget_mb:
+                continue
+            try:
+                self.load(size)
+            except Exception as e:
+                logger.warning(f"⚠️ Whisper {size} failed to preload: {e}")
+
+    def acquire(self, size: str) -> Dict[str, Any]:
+        """The resident entry to run a job on - release() it when the job is done"""
+
+        with self._lock:
+            if size not in self.entries and size not in self._loading and not self._make_room(self._estimate_mb(size)):
+                size = self._closest_resident(size)
+                self.substitutions += 1
+        return self.load(size, use=True)
+
+    def release(self, entry: Dict[str, Any]):
+        with self._lock:
+            entry['users'] -= 1
+            self._make_room(0)  # Settle back under the budget once busy models free up
+
+    def fits(self, size: str) -> bool:
+        """Whether a size can be resident next to the pinned default at all"""
+
+        if size == self.pinned:
+            return True
+        pinned = self.entries.get(self.pinned)
+        pinned_mb = pinned['memory_mb'] if pinned else self._estimate_mb(self.pinned)
+        return pinned_mb + self._estimate_mb(size) <= self.budget_mb
+
+    def resident_mb(self) -> float:
+        """Loaded sizes plus the estimates of those still loading"""
+
+        loading = sum(MODEL_TIER_CONFIG["model_memory_mb"].get(size, 0) for size in list(self._loading))
+        return sum(entry['memory_mb'] for entry in list(self.entries.values())) + loading
+
+    def stats(self) -> Dict[str, Any]:
+        # Lock-free snapshot - called from the event loop, which must not wait on a model load
+        entries = list(self.entries.items())
+        return {
+            'resident': {size: {'memory_mb': round(e['memory_mb']), 'users': e['users']} for size, e in entries},
+            'loading': list(self._loading),
+            'resident_mb': round(self.resident_mb()),
+            'budget_mb': self.budget_mb,
+            'loads': self.loads,
+            'evictions': self.evictions,
+            'substitutions': self.substitutions
+        }
+
+    def _estimate_mb(self, size: str) -> float:
+        entry = self.entries.get(size)
+        return entry['memory_mb'] if entry else MODEL_TIER_CONFIG["model_memory_mb"].get(size, 0)
+
+    def _make_room(self, needed_mb: float, keep: Optional[str] = None) -> bool:
+        idle = sorted(
+            (e for e in self.entries.values() if e['users'] == 0 and e['size'] not in (self.pinned, keep)),
+            key=lambda e: e['last_used']
+        )
+        for entry in idle:
+            if self.resident_mb() + needed_mb <= self.budget_mb:
+                break
+            self._evict(entry)
+
+        return self.resident_mb() + needed_mb <= self.budget_mb
+
+    def _evict(self, entry: Dict[str, Any]):
+        if entry['batcher'] is not None:
+            entry['batcher'].close()
+        del self.entries[entry['size']]
+        self.evictions += 1
+        logger.info(f"🧠 Whisper {entry['size']} evicted ({self.resident_mb():.0f}/{self.budget_mb:.0f}MB)")
+
+    def _closest_resident(self, size: str) -> str:
+        """The largest resident size not above the requested one, else the smallest resident"""
+
+        tiers = MODEL_TIER_CONFIG["tiers"]
+        rank = lambda s: tiers.index(s) if s in tiers else len(tiers)
+        resident = sorted(self.entries, key=rank)
+        below = [s for s in resident if rank(s) <= rank(size)]
+        return below[-1] if below else resident[0]
+
+class ModelTierPolicy:
+    """Picks each job's Whisper size: the most accurate one predicted to meet its deadline
+
+    A prediction is the backlog wait plus the track's pipeline and ASR time on that size, padded
+    by safety_factor. Candidates are capped by the customer tier and limited to sizes that can be
+    resident within the memory budget; when none can make the deadline the fastest is used.
+    Past upgrade_backlog_seconds of backlog every job takes the fastest size until the queue drains.
+    ASR speeds start from MODEL_TIER_CONFIG["rtf"] and follow what finished jobs measure.
+    """
+
+    def __init__(self, tiers: List[str], rtf: Dict[str, float], fits: Optional[Callable[[str], bool]] = None):
+        self.tiers = list(tiers)
+        self.rtf = dict(rtf)
+        self.fits = fits or (lambda size: True)
+        self.choices: Dict[str, int] = {size: 0 for size in self.tiers}
+
+    def predict_seconds(self, size: str, track_seconds: float) -> float:
+        rtf = self.rtf.get(size, max(self.rtf.values()))
+        return track_seconds * (MODEL_TIER_CONFIG["pipeline_rtf"] + rtf) * MODEL_TIER_CONFIG["safety_factor"]
+
+    def choose(
+        self,
+        track_seconds: float,
+        customer_tier: str,
+        deadline_seconds: float,
+        backlog_seconds: float
+    ) -> Dict[str, Any]:
+        cap = CUSTOMER_TIERS[customer_tier]["max_model"]
+        allowed = self.tiers[:self.tiers.index(cap) + 1] if cap in self.tiers else self.tiers
+        candidates = [size for size in allowed if self.fits(size)] or self.tiers[:1]
+
+        if backlog_seconds > MODEL_TIER_CONFIG["upgrade_backlog_seconds"]:
+            # The queue is falling behind - slower sizes would eat the slack later tight deadlines need
+            model, reason = candidates[0], 'backlog_protection'
+        else:
+            model, reason = candidates[0], 'deadline_unreachable'
+            for size in reversed(candidates):
+                if backlog_seconds + self.predict_seconds(size, track_seconds) <= deadline_seconds:
+                    model, reason = size, 'most_accurate_within_deadline'
+                    break
+
+        self.choices[model] = self.choices.get(model, 0) + 1
+        return {
+            'model': model,
+            'reason': reason,
+            'customer_tier': customer_tier,
+            'track_seconds': round(track_seconds, 1),
+            'backlog_seconds': round(backlog_seconds, 1),
+            'deadline_seconds': deadline_seconds,
+            'predicted_seconds': round(self.predict_seconds(model, track_seconds), 1)
+        }
+
+    def observe(self, size: str, track_seconds: float, asr_seconds: float):
+        """Fold a finished job's measured ASR speed into the size's estimate"""
+
+        if size in self.rtf and track_seconds > 0:
+            self.rtf[size] += MODEL_TIER_CONFIG["rtf_smoothing"] * (asr_seconds / track_seconds - self.rtf[size])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': MODEL_TIER_CONFIG["enabled"],
+            'tiers': self.tiers,
+            'rtf': {size: round(rtf, 4) for size, rtf in self.rtf.items() if size in self.tiers},
+            'choices': dict(self.choices)
+        }
+
+whisper_model = None  # The pinned default size, loaded by ModelWarmup
+whisper_batcher: Optional[WhisperBatchScheduler] = None  # Its batch scheduler, when batching is enabled
+resident_models = ResidentModels(MODEL_TIER_CONFIG["memory_budget_mb"], WARMUP_CONFIG["whisper_model"])
+model_tiers = ModelTierPolicy(MODEL_TIER_CONFIG["tiers"], MODEL_TIER_CONFIG["rtf"], fits=resident_models.fits)
+
+class ASRBackend(ABC):
+    """Speech-to-text engine behind _real_transcription
+
+    transcribe() returns whisper's result shape - {'text', 'language', 'segments'}, every segment
+    with 'seek', 'start', 'end', 'text' and 'words' [{'word', 'start', 'end', ...}] - plus the
+    word alignment summary, so detection and VAD remapping never depend on the engine.
+    """
+
+    name = ''
+    load_failures = 0  # Consecutive failed loads - a broken engine is retried with backoff, not on every job
+    load_retry_at = 0.0
+
+    def __init__(self, transcriber: Optional[RemoteTranscriber] = None, model_size: Optional[str] = None):
+        self.transcriber = transcriber  # Cross-job batch scheduler handle, for engines that batch
+        self.model_size = model_size  # Chosen by ModelTierPolicy, for engines with resident sizes
+
+    @classmethod
+    @abstractmethod
+    def load(cls):
+        """Load the engine's model (warm-up, or the first job that asks) - failures back off before a retry"""
+
+    @classmethod
+    @abstractmethod
+    def loaded(cls) -> bool:
+        ...
+
+    @classmethod
+    def can_load(cls) -> bool:
+        return time.monotonic() >= cls.load_retry_at
+
+    @classmethod
+    def _load_succeeded(cls):
+        cls.load_failures = 0
+        cls.load_retry_at = 0.0
+
+    @classmethod
+    def _load_failed(cls):
+        cls.load_failures += 1
+        delay = min(
+            ASR_CONFIG["load_retry_seconds"] * 2 ** (cls.load_failures - 1),
+            ASR_CONFIG["load_retry_max_seconds"]
+        )
+        cls.load_retry_at = time.monotonic() + delay
+        logger.info(f"🔁 {cls.name} load failed {cls.load_failures}x - retrying in {delay:.0f}s")
+
+    def warm_up(self):
+        """One tiny inference so the first real request doesn't pay for lazy init"""
+
+    @abstractmethod
+    def transcribe(self, audio: np.ndarray, two_pass: bool) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """(result, word alignment summary) - result['model'] names the model that ran"""
+
+class WhisperASRBackend(ASRBackend):
+    """openai-whisper in float32 on the job's resident model size - batched across jobs when enabled"""
+
+    name = 'whisper'
+
+    @classmethod
+    def load(cls):
+        global whisper, whisper_model, whisper_batcher
+        if whisper_model is not None:
+            return
+
+        try:
+            import whisper
+            pinned = resident_models.load(WARMUP_CONFIG["whisper_model"])
+            whisper_model, whisper_batcher = pinned['model'], pinned['batcher']
+            logger.info("✅ Whisper model loaded successfully")
+        except Exception as e:
+            logger.warning(f"⚠️ Whisper model failed to load: {e}")
+            whisper_model = None
+            cls._load_failed()
+            return
+
+        cls._load_succeeded()
+
+        # Other tiers load before the pool forks, so workers share them too
+        if MODEL_TIER_CONFIG["enabled"]:
+            resident_models.preload(MODEL_TIER_CONFIG["tiers"])
+
+    @classmethod
+    def loaded(cls) -> bool:
+        return whisper_model is not None
+
+    def warm_up(self):
+        # Straight through the model - starting the batcher thread before the pool forks would hang workers
+        whisper_model.transcribe(np.zeros(WHISPER_SAMPLE_RATE, dtype=np.float32), language='en', word_timestamps=True)
+        # Silence aligns no words - JIT the DTW kernel here rather than first on the inference thread,
+        # where numba's compile leaves the interpreter unable to exit
+        whisper.timing.dtw_cpu(np.zeros((2, 2)))
+
+    def transcribe(self, audio: np.ndarray, two_pass: bool) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        if self.transcriber is not None:
+            return self.transcriber.transcribe(audio, two_pass, self.model_size)  # The server process runs both passes
+
+        entry = resident_models.acquire(self.model_size or WARMUP_CONFIG["whisper_model"])
+        try:
+            model, batcher = entry['model'], entry['batcher']
+            if batcher is not None:
+                # Decoded alongside every other job's windows; word timing comes from the alignment
+                # pass, run on the inference thread so it never overlaps a batch on the same model
+                result = batcher.transcribe(audio, language='en')
+                alignment = batcher.call(
+                    lambda: self._align_flagged_windows(audio, result, every_window=not two_pass, model=model)
+                ).result(timeout=WHISPER_BATCH_CONFIG["timeout_seconds"])
+            else:
+                result = model.transcribe(audio, word_timestamps=not two_pass, language='en')
+                alignment = self._align_flagged_windows(audio, result, model=model) if two_pass else {'mode': 'single_pass'}
+        finally:
+            resident_models.release(entry)
+
+        result['model'] = entry['size']
+        return result, alignment
+
+    def _align_flagged_windows(
+        self,
+        whisper_audio: np.ndarray,
+        result: Dict[str, Any],
+        every_window: bool = False,
+        model=None
+    ) -> Dict[str, Any]:
+        """Second pass: word-level DTW alignment for the decode windows holding flagged segments
+
+        Segments decoded from one 30-second window share its 'seek' and are aligned together on
+        that window's mel frames, exactly as transcribe(word_timestamps=True) aligns them. Every
+        other segment gets evenly spaced per-token estimates, so word indices still line up with
+        the transcript. every_window aligns them all (single-pass output from a batched decode).
+        """
+
+        model = model if model is not None else whisper_model
+        segments = result.get('segments', [])
+        flagged = RealProfanityDetector().flag_segments(segments)
+
+        windows: Dict[int, List[Dict]] = {}
+        for segment in segments:
+            windows.setdefault(segment['seek'], []).append(segment)
+        flagged_windows = set(windows) if every_window else {segments[i]['seek'] for i in flagged}
+
+        if flagged_windows:
+            n_frames = whisper.audio.N_FRAMES
+            mel = whisper.log_mel_spectrogram(whisper_audio, model.dims.n_mels, padding=whisper.audio.N_SAMPLES)
+            content_frames = mel.shape[-1] - n_frames
+            tokenizer = whisper.tokenizer.get_tokenizer(
+                model.is_multilingual,
+                num_languages=model.num_languages,
+                language=result['language'],
+                task='transcribe'
+            )
+
+            last_speech_timestamp = 0.0
+            for seek in sorted(windows):
+                if seek in flagged_windows:
+                    segment_size = min(n_frames, content_frames - seek)
+                    mel_segment = whisper.pad_or_trim(mel[:, seek:seek + segment_size], n_frames).to(model.device)
+                    if model.device.type == 'cuda':
+                        mel_segment = mel_segment.half()  # transcribe() decodes in fp16 on GPU
+
+                    whisper.timing.add_word_timestamps(
+                        segments=windows[seek],
+                        model=model,
+                        tokenizer=tokenizer,
+                        mel=mel_segment,
+                        num_frames=segment_size,
+                        last_speech_timestamp=last_speech_timestamp
+                    )
+                last_speech_timestamp = windows[seek][-1]['end']
+
+        for segment in segments:
+            if 'words' not in segment:
+                segment['words'] = self._estimate_segment_words(segment)
+
+        return {
+            'mode': 'single_pass' if every_window else 'two_pass',
+            'segments': len(segments),
+            'flagged_segments': len(flagged),
+            'windows': len(windows),
+            'aligned_windows': len(flagged_windows)
+        }
+
+    def _estimate_segment_words(self, segment: Dict) -> List[Dict]:
+        """Spread a segment's whitespace tokens evenly over its time span"""
+
+        tokens = segment.get('text', '').split()
+        if not tokens:
+            return []
+
+        step = (segment['end'] - segment['start']) / len(tokens)
+        return [
+            {
+                'word': f' {token}',
+                'start': round(segment['start'] + i * step, 2),
+                'end': round(segment['start'] + (i + 1) * step, 2),
+                'estimated': True
+            }
+            for i, token in enumerate(tokens)
+        ]
+
+class CTranslate2ASRBackend(ASRBackend):
+    """faster-whisper on CTranslate2 with int8-quantized weights - the CPU engine
+
+    Word timestamps come from the engine's own alignment in the decode pass, for every segment.
+    The model is built per process on first use: CTranslate2's thread pool does not survive a fork,
+    so warm-up only fetches the converted weights and each pool worker loads its own copy.
+    """
+
+    name = 'ctranslate2'
+    model_path: Optional[str] = None
+    _model = None
+    _model_pid: Optional[int] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def load(cls):
+        if cls.model_path is not None:
+            return
+
+        try:
+            import faster_whisper
+            model = ASR_CONFIG["ctranslate2_model"]
+            cls.model_path = model if os.path.isdir(model) else faster_whisper.download_model(model)
+            logger.info(f"✅ CTranslate2 Whisper model ready: {cls.model_path} ({ASR_CONFIG['ctranslate2_compute_type']})")
+        except Exception as e:
+            logger.warning(f"⚠️ CTranslate2 Whisper model failed to load: {e}")
+            cls.model_path = None
+            cls._load_failed()
+            return
+
+        cls._load_succeeded()
+
+    @classmethod
+    def loaded(cls) -> bool:
+        return cls.model_path is not None
+
+    @classmethod
+    def model(cls):
+        with cls._lock:
+            if cls._model is None or cls._model_pid != os.getpid():
+                from faster_whisper import WhisperModel
+                cls._model = WhisperModel(
+                    cls.model_path,
+                    device='cpu',
+                    compute_type=ASR_CONFIG["ctranslate2_compute_type"],
+                    cpu_threads=ASR_CONFIG["ctranslate2_threads"]
+                )
+                cls._model_pid = os.getpid()
+        return cls._model
+
+    def transcribe(self, audio: np.ndarray, two_pass: bool) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        segments, info = self.model().transcribe(
+            audio,
+            language='en',
+            beam_size=ASR_CONFIG["ctranslate2_beam_size"],
+            word_timestamps=True
+        )
+
+        result_segments = [
+            {
+                'id': segment.id,
+                'seek': segment.seek,
+                'start': segment.start,
+                'end': segment.end,
+                'text': segment.text,
+                'tokens': list(segment.tokens),
+                'temperature': segment.temperature,
+                'avg_logprob': segment.avg_logprob,
+                'compression_ratio': segment.compression_ratio,
+                'no_speech_prob': segment.no_speech_prob,
+                'words': [
+                    {'word': word.word, 'start': word.start, 'end': word.end, 'probability': word.probability}
+                    for word in segment.words or []
+                ]
+            }
+            for segment in segments  # A generator - decoding happens while this is consumed
+        ]
+
+        result = {
+            'text': ''.join(segment['text'] for segment in result_segments),
+            'language': info.language,
+            'segments': result_segments,
+            'model': os.path.basename(os.path.normpath(ASR_CONFIG["ctranslate2_model"]))
+        }
+        return result, {'mode': 'single_pass', 'segments': len(result_segments)}
+
+ASR_BACKENDS = {
+    WhisperASRBackend.name: WhisperASRBackend,
+    CTranslate2ASRBackend.name: CTranslate2ASRBackend
+}
+
+def load_asr_backend(
+    engine: str,
+    transcriber: Optional[RemoteTranscriber] = None,
+    model_size: Optional[str] = None
+) -> Optional[ASRBackend]:
+    """The named engine with its model loaded, or None when it cannot load (mock transcription)"""
+
+    backend = ASR_BACKENDS[engine]
+    if not backend.loaded() and backend.can_load():
+        backend.load()
+    return backend(transcriber, model_size) if backend.loaded() else None
+
+class ModelWarmup:
+    """Imports the audio/ML stack and loads models in stages, off the request path
+
+    ensure_loaded() is idempotent and thread-safe. The startup hook runs it in a thread so the
+    server answers /health/live immediately, while /health/ready reports the stage reached.
+    """
+
+    STAGES = ['imports', 'profanity_wordlist', 'whisper_model', 'dummy_inference']
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ready = False
+        self.stage = 'pending'
+        self.completed: List[str] = []
+        self.stage_seconds: Dict[str, float] = {}
+        self.error: Optional[str] = None
+
+    def ensure_loaded(self, through: Optional[str] = None):
+        """Run every stage up to and including `through` (all stages by default)"""
+
+        stages = self.STAGES if through is None else self.STAGES[:self.STAGES.index(through) + 1]
+        if all(stage in self.completed for stage in stages):
+            return
+
+        with self._lock:
+            for stage in stages:
+                if stage in self.completed:
+                    continue
+
+                self.stage = stage
+                start = time.perf_counter()
+                try:
+                    getattr(self, f'_load_{stage}')()
+                except Exception as e:
+                    self.stage = 'error'
+                    self.error = f"{stage}: {e}"
+                    logger.error(f"❌ Warm-up failed at {stage}: {e}")
+                    raise
+                self.stage_seconds[stage] = round(time.perf_counter() - start, 3)
+                self.completed.append(stage)
+
+            if len(self.completed) == len(self.STAGES):
+                self.stage = 'ready'
+                self.ready = True
+                logger.info(f"🔥 Models warm and ready: {self.stage_seconds}")
+
+    async def wait_until_ready(self):
+        if not self.ready:
+            await asyncio.to_thread(self.ensure_loaded)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "stage": self.stage,
+            "progress": round(100 * len(self.completed) / len(self.STAGES)),
+            "completed_stages": list(self.completed),
+            "stage_seconds": dict(self.stage_seconds),
+            "whisper_loaded": whisper_model is not None,
+            "error": self.error
+        }
+
+    # Step 1: Audio DSP stack
+    def _load_imports(self):
+        global librosa, scipy, soxr
+        import librosa
+        import scipy.fft
+        import scipy.signal
+        import soxr
+
+    # Step 2: Profanity wordlist and its precomputed word set
+    def _load_profanity_wordlist(self):
+        global profanity, CENSOR_WORDS
+        from better_profanity import profanity
+        profanity.load_censor_words()
+        CENSOR_WORDS = CensorWordSet(profanity)
+
+    # Step 3: The deployment's ASR engine - a failed load leaves the mock transcription path
+    def _load_whisper_model(self):
+        ASR_BACKENDS[ASR_CONFIG["engine"]].load()
+
+    # Step 4: One dummy pass so the first real request doesn't pay for lazy init
+    def _load_dummy_inference(self):
+        if not WARMUP_CONFIG["dummy_inference"]:
+            return
+
+        try:
+            silence = np.zeros(44100, dtype=np.float32)
+            BandGainSeparator(44100).separate(silence)
+            RealAudioProcessor()._to_whisper_rate(silence, 44100)
+            PROFANITY_MATCHER.scan("warm up")
+            engine = ASR_BACKENDS[ASR_CONFIG["engine"]]
+            if engine.loaded():
+                engine().warm_up()
+        except Exception as e:
+            logger.warning(f"⚠️ Warm-up inference failed: {e}")
+
+models = ModelWarmup()
 
 # Session storage
-sessions: Dict[str, Dict] = {}
+sessions = open_session_store(
+    SESSION_CONFIG["backend"],
+    SESSION_CONFIG["path"],
+    redis_url=SESSION_CONFIG["redis_url"],
+    prefix="fwea",
+    ttl_seconds=SESSION_CONFIG["ttl_hours"] * 3600
+)
 
 # Create storage directories
-for directory in ['uploads', 'processed', 'vocals', 'instrumentals', 'cleaned', 'final', 'lyrics']:
+for directory in ['uploads', 'processed', 'final', 'lyrics']:
     os.makedirs(directory, exist_ok=True)
 
 class RealProfanityDetector:
@@ -122,6 +1617,7 @@ class RealProfanityDetector:
     def __init__(self):
         self.confidence_threshold = 0.90
         self.patterns = REAL_PROFANITY_PATTERNS
+        self.matcher = PROFANITY_MATCHER
         self.detection_engines = ['better_profanity', 'regex_patterns', 'whisper_ai']
 
     async def detect_profanity_real(
@@ -133,20 +1629,26 @@ class RealProfanityDetector:
 
         logger.info(f"🎯 Starting REAL profanity detection on transcription: '{transcription_text[:100]}...'")
 
+        models.ensure_loaded(through='profanity_wordlist')
         detected_words = []
 
+        # One pass over the transcript feeds both the regex and keyword engines,
+        # and one token index serves every engine's timing lookups
+        scan = self.matcher.scan(transcription_text)
+        index = TranscriptIndex(transcription_text, word_timestamps)
+
         # Engine 1: Better-profanity library detection
-        better_profanity_results = await self._detect_with_better_profanity(transcription_text, word_timestamps)
+        better_profanity_results = await self._detect_with_better_profanity(transcription_text, index)
         detected_words.extend(better_profanity_results)
         logger.info(f"Better-profanity detected: {len(better_profanity_results)} words")
 
         # Engine 2: Advanced regex pattern matching
-        pattern_results = await self._detect_with_patterns(transcription_text, word_timestamps)
+        pattern_results = await self._detect_with_patterns(transcription_text, index, scan)
         detected_words.extend(pattern_results)
         logger.info(f"Pattern matching detected: {len(pattern_results)} words")
 
         # Engine 3: Manual keyword search (most reliable)
-        keyword_results = await self._detect_with_keywords(transcription_text, word_timestamps)
+        keyword_results = await self._detect_with_keywords(transcription_text, index, scan)
         detected_words.extend(keyword_results)
         logger.info(f"Keyword search detected: {len(keyword_results)} words")
 
@@ -165,7 +1667,32 @@ class RealProfanityDetector:
             'real_detection': True
         }
 
-    async def _detect_with_better_profanity(self, text: str, word_timestamps: List[Dict]) -> List[Dict]:
+    def flag_segments(self, segments: List[Dict]) -> List[int]:
+        """Indices of transcript segments holding anything the detection engines report
+
+        The segments are joined the way Whisper joins them into the transcript and scanned once;
+        a hit straddling a segment boundary flags both segments.
+        """
+
+        models.ensure_loaded(through='profanity_wordlist')
+        texts = [segment.get('text', '') for segment in segments]
+        text = ''.join(texts)
+        segment_starts = list(itertools.accumulate((len(t) for t in texts[:-1]), initial=0))
+
+        scan = self.matcher.scan(text)
+        hits = [(start, end) for _, start, end in scan['patterns'] + scan['keywords']]
+        hits.extend(m.span() for m in TranscriptIndex.TOKEN_PATTERN.finditer(text)
+                    if CENSOR_WORDS.clean(m.group().lower()) in CENSOR_WORDS)
+
+        flagged = set()
+        for start, end in hits:
+            first = bisect.bisect_right(segment_starts, start) - 1
+            last = bisect.bisect_right(segment_starts, end - 1) - 1
+            flagged.update(range(first, last + 1))
+
+        return sorted(flagged)
+
+    async def _detect_with_better_profanity(self, text: str, index: TranscriptIndex) -> List[Dict]:
         """Use better-profanity library for detection"""
 
         detected = []
@@ -173,10 +1700,10 @@ class RealProfanityDetector:
 
         for i, word in enumerate(words):
             # Clean word of punctuation
-            clean_word = re.sub(r'[^a-z]', '', word)
+            clean_word = CENSOR_WORDS.clean(word)
 
-            if profanity.contains_profanity(clean_word):
-                timing = self._estimate_word_timing(i, len(words), word_timestamps)
+            if clean_word in CENSOR_WORDS:
+                timing = self._estimate_word_timing(i, index)
 
                 detected.append({
                     'word': clean_word,
@@ -191,119 +1718,71 @@ class RealProfanityDetector:
 
         return detected
 
-    async def _detect_with_patterns(self, text: str, word_timestamps: List[Dict]) -> List[Dict]:
+    async def _detect_with_patterns(self, text: str, index: TranscriptIndex, scan: Optional[Dict] = None) -> List[Dict]:
         """Advanced regex pattern detection"""
 
         detected = []
+        scan = scan or self.matcher.scan(text)
 
         # Check all severity levels
-        for severity_level in ['high_severity', 'medium_severity', 'censored']:
-            patterns = self.patterns['english'].get(severity_level, [])
-
-            for pattern_data in patterns:
-                pattern = re.compile(pattern_data['pattern'], re.IGNORECASE)
-
-                for match in pattern.finditer(text):
-                    start_pos = match.start()
-                    end_pos = match.end()
-                    matched_word = match.group().lower()
-
-                    # Estimate timing based on character position
-                    timing = self._estimate_timing_from_position(start_pos, end_pos, text, word_timestamps)
-
-                    detected.append({
-                        'word': matched_word,
-                        'original_text': match.group(),
-                        'start_time': timing['start'],
-                        'end_time': timing['end'],
-                        'confidence': pattern_data['confidence'],
-                        'severity': severity_level.split('_')[0],  # high, medium, censored
-                        'detection_method': 'regex_pattern',
-                        'pattern': pattern_data['pattern']
-                    })
+        for pattern_index, start_pos, end_pos in scan['patterns']:
+            pattern_data = self.matcher.patterns[pattern_index]
+            original = text[start_pos:end_pos]
+
+            # Estimate timing based on character position
+            timing = self._estimate_timing_from_position(start_pos, end_pos, index)
+
+            detected.append({
+                'word': original.lower(),
+                'original_text': original,
+                'start_time': timing['start'],
+                'end_time': timing['end'],
+                'confidence': pattern_data['confidence'],
+                'severity': pattern_data['severity'],  # high, medium, censored
+                'detection_method': 'regex_pattern',
+                'pattern': pattern_data['pattern']
+            })
 
         return detected
 
-    async def _detect_with_keywords(self, text: str, word_timestamps: List[Dict]) -> List[Dict]:
+    async def _detect_with_keywords(self, text: str, index: TranscriptIndex, scan: Optional[Dict] = None) -> List[Dict]:
         """Manual keyword search - most reliable method"""
 
         detected = []
+        scan = scan or self.matcher.scan(text)
 
-        # Define explicit keywords to search for
-        explicit_keywords = [
-            'fuck', 'fucking', 'fucked', 'fucker', 'fuckers',
-            'shit', 'shitting', 'shitted', 'shitter', 'shitty',
-            'bitch', 'bitching', 'bitchy', 'bitches',
-            'damn', 'damned', 'dammit', 'goddamn',
-            'hell', 'hellish', 'what the hell',
-            'ass', 'asshole', 'assholes', 'dumbass', 'badass',
-            'bastard', 'bastards',
-            'crap', 'crappy', 'crapping', 'crapped',
-            'piss', 'pissed', 'pissing', 'pissoff'
-        ]
-
-        text_lower = text.lower()
-        words = text_lower.split()
-
-        for keyword in explicit_keywords:
-            # Search for keyword in text
-            if keyword in text_lower:
-                # Find all occurrences
-                start_pos = 0
-                while True:
-                    pos = text_lower.find(keyword, start_pos)
-                    if pos == -1:
-                        break
-
-                    # Check if it's a whole word (not part of another word)
-                    if self._is_whole_word(keyword, pos, text_lower):
-                        # Estimate timing
-                        timing = self._estimate_timing_from_position(pos, pos + len(keyword), text, word_timestamps)
+        for keyword_index, pos, end_pos in scan['keywords']:
+            keyword = self.matcher.keywords[keyword_index]
 
-                        detected.append({
-                            'word': keyword,
-                            'original_text': text[pos:pos + len(keyword)],
-                            'start_time': timing['start'],
-                            'end_time': timing['end'],
-                            'confidence': 0.99,
-                            'severity': self._get_severity(keyword),
-                            'detection_method': 'keyword_search',
-                            'position': pos
-                        })
+            # Estimate timing
+            timing = self._estimate_timing_from_position(pos, end_pos, index)
 
-                    start_pos = pos + 1
+            detected.append({
+                'word': keyword,
+                'original_text': text[pos:end_pos],
+                'start_time': timing['start'],
+                'end_time': timing['end'],
+                'confidence': 0.99,
+                'severity': self._get_severity(keyword),
+                'detection_method': 'keyword_search',
+                'position': pos
+            })
 
         return detected
 
-    def _is_whole_word(self, keyword: str, position: int, text: str) -> bool:
-        """Check if keyword at position is a whole word"""
-
-        # Check character before
-        if position > 0 and text[position - 1].isalpha():
-            return False
-
-        # Check character after
-        end_pos = position + len(keyword)
-        if end_pos < len(text) and text[end_pos].isalpha():
-            return False
-
-        return True
-
     def _get_severity(self, word: str) -> str:
         """Get severity level for word"""
 
-        high_severity = ['fuck', 'fucking', 'fucked', 'fucker', 'shit', 'shitting', 'bitch', 'bitching', 'nigger', 'nigga']
-
-        if word in high_severity:
+        if word in HIGH_SEVERITY_WORDS:
             return 'high'
         else:
             return 'medium'
 
-    def _estimate_word_timing(self, word_index: int, total_words: int, word_timestamps: List[Dict]) -> Dict:
+    def _estimate_word_timing(self, word_index: int, index: TranscriptIndex) -> Dict:
         """Estimate timing for word by index"""
 
-        if word_timestamps and word_index < len(word_timestamps):
-            timestamp = word_timestamps[word_index]
+        timestamp = index.timestamp(word_index)
+        if timestamp is not None:
             return {
                 'start': timestamp.get('start', word_index * 0.5),
                 'end': timestamp.get('end', word_index * 0.5 + 0.4)
@@ -316,21 +1795,18 @@ class RealProfanityDetector:
 
         return {'start': start_time, 'end': end_time}
 
-    def _estimate_timing_from_position(self, start_pos: int, end_pos: int, text: str, word_timestamps: List[Dict]) -> Dict:
+    def _estimate_timing_from_position(self, start_pos: int, end_pos: int, index: TranscriptIndex) -> Dict:
         """Estimate timing based on character position in text"""
 
-        if not word_timestamps:
+        if not index.word_timestamps:
             # Fallback: assume 6 characters per second of speech
             chars_per_second = 6
             start_time = start_pos / chars_per_second
             end_time = end_pos / chars_per_second
             return {'start': start_time, 'end': end_time}
 
-        # Find approximate word index from character position
-        text_words = text[:start_pos].split()
-        estimated_word_index = len(text_words)
-
-        return self._estimate_word_timing(estimated_word_index, len(text.split()), word_timestamps)
+        # Word index from character position - O(log n) over the token offsets
+        return self._estimate_word_timing(index.word_index_at(start_pos), index)
 
     def _deduplicate_and_validate(self, detected_words: List[Dict]) -> List[Dict]:
         """Remove duplicates and validate detections"""
@@ -353,37 +1829,368 @@ class RealProfanityDetector:
 
         return deduplicated
 
+class BandGainSeparator:
+    """Vectorized vocal/instrumental separation using per-frequency band gains"""
+
+    def __init__(
+        self,
+        sr: int,
+        n_fft: int = 2048,
+        hop_length: int = 512,
+        vocal_band: Tuple[float, float] = (200.0, 2000.0),
+        vocal_gains: Tuple[float, float] = (0.8, 0.2),
+        instrumental_gains: Tuple[float, float] = (0.3, 0.9)
+    ):
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.vocal_band = vocal_band
+        self.vocal_gains = vocal_gains  # (inside band, outside band)
+        self.instrumental_gains = instrumental_gains
+
+    def gain_vectors(self, freq_bins: int, dtype=np.float32) -> Tuple[np.ndarray, np.ndarray]:
+        """Build (freq_bins, 1) vocal and instrumental gain columns for broadcasting"""
+
+        # Vocals typically dominate mid frequencies (200Hz - 2kHz)
+        vocal_freq_start = int(self.vocal_band[0] * freq_bins / (self.sr / 2))
+        vocal_freq_end = int(self.vocal_band[1] * freq_bins / (self.sr / 2))
+
+        in_band = np.zeros(freq_bins, dtype=bool)
+        in_band[vocal_freq_start:vocal_freq_end + 1] = True  # Inclusive upper bin
+
+        vocal_gain = np.where(in_band, *self.vocal_gains).astype(dtype)
+        instrumental_gain = np.where(in_band, *self.instrumental_gains).astype(dtype)
+
+        return vocal_gain[:, np.newaxis], instrumental_gain[:, np.newaxis]
+
+    def apply(self, stft: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Scale a complex STFT into vocal and instrumental STFTs (phase is preserved)"""
+
+        vocal_gain, instrumental_gain = self.gain_vectors(stft.shape[0], dtype=stft.real.dtype)
+
+        return stft * vocal_gain, stft * instrumental_gain
+
+    def separate(self, audio_data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Separate a mono signal into (vocals, instrumental) time-domain signals"""
+
+        stft = librosa.stft(audio_data, n_fft=self.n_fft, hop_length=self.hop_length)
+        vocal_stft, instrumental_stft = self.apply(stft)
+        del stft
+
+        vocals = librosa.istft(vocal_stft, hop_length=self.hop_length)
+        instrumental = librosa.istft(instrumental_stft, hop_length=self.hop_length)
+
+        return vocals, instrumental
+
+class StreamingBandSeparator(BandGainSeparator):
+    """Block-wise BandGainSeparator with overlap-add reconstruction and bounded memory"""
+
+    def __init__(self, sr: int, max_memory_mb: float, **kwargs):
+        super().__init__(sr, **kwargs)
+
+        if self.n_fft % self.hop_length:
+            raise ValueError("Streaming separation requires n_fft to be a multiple of hop_length")
+
+        self.window = scipy.signal.get_window('hann', self.n_fft, fftbins=True).astype(np.float32)
+        self.window_sq = self.window ** 2
+        self.vocal_gain, self.instrumental_gain = self.gain_vectors(self.n_fft // 2 + 1)
+
+        # Frames per block sized from the memory ceiling
+        block_bytes = max_memory_mb * 1024 * 1024 * STREAMING_CONFIG["block_memory_fraction"]
+        self.block_frames = max(1, int(block_bytes // self.bytes_per_frame()))
+        self.block_samples = self.block_frames * self.hop_length
+
+        self.reset()
+
+    def bytes_per_frame(self) -> int:
+        """Approximate working-set bytes per STFT frame (frames, spectra, synthesis buffers)"""
+
+        freq_bins = self.n_fft // 2 + 1
+        return self.n_fft * 4 * 4 + freq_bins * 8 * 3
+
+    def reset(self):
+        """Start a new stream (centered STFT: n_fft // 2 zeros of leading padding)"""
+
+        pad = self.n_fft // 2
+        overlap = self.n_fft - self.hop_length
+
+        self._input = np.zeros(pad, dtype=np.float32)
+        self._vocal_tail = np.zeros(overlap, dtype=np.float32)
+        self._instrumental_tail = np.zeros(overlap, dtype=np.float32)
+        self._wss_tail = np.zeros(overlap, dtype=np.float32)
+        self._skip = pad  # Leading padded samples still to drop from the output
+        self._samples_in = 0
+        self._samples_out = 0
+
+    def _overlap_add(self, frames: np.ndarray, tail: np.ndarray) -> np.ndarray:
+        """Overlap-add (n_frames, n_fft) frames onto the carried tail"""
+
+        n_frames = frames.shape[0]
+        ratio = self.n_fft // self.hop_length
+
+        out = np.zeros((n_frames + ratio - 1) * self.hop_length, dtype=np.float32)
+        out[:tail.shape[0]] += tail
+
+        segments = frames.reshape(n_frames, ratio, self.hop_length)
+        for r in range(ratio):
+            start = r * self.hop_length
+            out[start:start + n_frames * self.hop_length] += segments[:, r, :].reshape(-1)
+
+        return out
+
+    def _process_frames(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Consume every complete frame in the input buffer and return finished samples"""
+
+        if self._input.shape[0] < self.n_fft:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+
+        n_frames = 1 + (self._input.shape[0] - self.n_fft) // self.hop_length
+        frames = np.lib.stride_tricks.sliding_window_view(self._input, self.n_fft)[::self.hop_length][:n_frames]
+
+        # Forward STFT of the block (freq_bins, n_frames), band gains, inverse STFT
+        stft = scipy.fft.rfft(frames * self.window, axis=1).T
+        vocal_frames = scipy.fft.irfft(stft * self.vocal_gain, n=self.n_fft, axis=0).T * self.window
+        instrumental_frames = scipy.fft.irfft(stft * self.instrumental_gain, n=self.n_fft, axis=0).T * self.window
+        del stft, frames
+
+        vocals = self._overlap_add(vocal_frames.astype(np.float32, copy=False), self._vocal_tail)
+        instrumental = self._overlap_add(instrumental_frames.astype(np.float32, copy=False), self._instrumental_tail)
+        wss = self._overlap_add(np.broadcast_to(self.window_sq, (n_frames, self.n_fft)), self._wss_tail)
+
+        # Samples before the next frame start receive no further contributions
+        done = n_frames * self.hop_length
+        self._vocal_tail = vocals[done:]
+        self._instrumental_tail = instrumental[done:]
+        self._wss_tail = wss[done:]
+        self._input = self._input[done:]
+
+        vocals, instrumental, wss = vocals[:done], instrumental[:done], wss[:done]
+        nonzero = wss > np.finfo(np.float32).tiny
+        vocals[nonzero] /= wss[nonzero]
+        instrumental[nonzero] /= wss[nonzero]
+
+        return self._trim(vocals, instrumental)
+
+    def _trim(self, vocals: np.ndarray, instrumental: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Drop centering padding at the start and never emit more samples than were fed"""
+
+        if self._skip:
+            skipped = min(self._skip, vocals.shape[0])
+            vocals, instrumental = vocals[skipped:], instrumental[skipped:]
+            self._skip -= skipped
+
+        remaining = self._samples_in - self._samples_out
+        vocals, instrumental = vocals[:remaining], instrumental[:remaining]
+        self._samples_out += vocals.shape[0]
+
+        return vocals, instrumental
+
+    def process_block(self, samples: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Feed mono samples, get back the (vocals, instrumental) samples that are complete"""
+
+        self._samples_in += samples.shape[0]
+        self._input = np.concatenate([self._input, samples.astype(np.float32, copy=False)])
+
+        return self._process_frames()
+
+    def flush(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Pad the end of the stream (centered STFT) and emit the remaining samples"""
+
+        pad = self.n_fft // 2
+        short = (self.hop_length - (self._input.shape[0] + pad - self.n_fft) % self.hop_length) % self.hop_length
+        self._input = np.concatenate([self._input, np.zeros(pad + short, dtype=np.float32)])
+
+        vocals, instrumental = self._process_frames()
+
+        # The carried tail only overlaps frames that have all been seen now
+        nonzero = self._wss_tail > np.finfo(np.float32).tiny
+        vocal_tail, instrumental_tail = self._vocal_tail, self._instrumental_tail
+        vocal_tail[nonzero] /= self._wss_tail[nonzero]
+        instrumental_tail[nonzero] /= self._wss_tail[nonzero]
+        vocal_tail, instrumental_tail = self._trim(vocal_tail, instrumental_tail)
+
+        return np.concatenate([vocals, vocal_tail]), np.concatenate([instrumental, instrumental_tail])
+
 class RealAudioProcessor:
     """Real audio processing with accurate profanity cleaning"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        transcriber: Optional[RemoteTranscriber] = None,
+        asr_engine: Optional[str] = None,
+        model_size: Optional[str] = None
+    ):
         self.sample_rate = 44100
         self.real_processing = True
+        self.transcriber = transcriber  # Set in worker processes - decodes in the server's batch scheduler
+        self.asr_engine = asr_engine or ASR_CONFIG["engine"]
+        self.model_size = model_size  # Picked per job by ModelTierPolicy (None - the deployment default)
+
+        # Mixing - instrumental is NEVER modified, full level
+        self.vocal_level = 0.8
+        self.instrumental_level = 1.0
+        self.peak_limit = 0.95
+        self.preview_seconds = 30
 
     async def process_audio_real(
         self,
         audio_path: str,
-        session_id: str
+        session_id: str,
+        progress: Optional[Callable[[str, int], None]] = None
     ) -> Dict[str, Any]:
         """Real audio processing pipeline with accurate cleaning"""
 
         logger.info(f"🎯 Starting REAL audio processing for session: {session_id}")
+        models.ensure_loaded()  # No-op once the startup warm-up has finished
 
         try:
             # Step 1: Load audio file
+            self._report_progress(progress, 'loading')
             audio_data, sr = librosa.load(audio_path, sr=self.sample_rate)
             duration = len(audio_data) / sr
             logger.info(f"Loaded audio: {duration:.1f} seconds, {sr}Hz")
 
             # Step 2: Advanced stem separation
+            self._report_progress(progress, 'separation')
             stems = await self._real_stem_separation(audio_data, sr)
             logger.info("✅ Stem separation completed")
 
             # Step 3: Real transcription
+            self._report_progress(progress, 'transcription')
             transcription = await self._real_transcription(stems['vocals'], sr)
             logger.info(f"✅ Transcription completed: '{transcription['text'][:100]}...'")
 
             # Step 4: REAL profanity detection
+            self._report_progress(progress, 'detection')
+            detector = RealProfanityDetector()
+            profanity_result = await detector.detect_profanity_real(
+                transcription['text'],
+                transcription.get('word_timestamps', [])
+            )
+            logger.info(f"✅ Profanity detection: {profanity_result['total_detected']} words found")
+
+            # Step 5: REAL audio cleaning (actually mutes curse words)
+            self._report_progress(progress, 'cleaning')
+            cleaned_audio = await self._real_audio_cleaning(
+                stems['vocals'],
+                stems['instrumental'],
+                profanity_result['detected_words'],
+                sr
+            )
+            logger.info("✅ Audio cleaning completed")
+
+            # Step 6: Save processed files
+            self._report_progress(progress, 'saving')
+            file_paths = await self._save_processed_audio(
+                cleaned_audio,
+                session_id,
+                sr
+            )
+            logger.info("✅ Files saved")
+
+            # Step 7: Extract and save lyrics
+            self._report_progress(progress, 'lyrics')
+            lyrics_path = await self._save_lyrics(transcription['text'], session_id)
+            logger.info("✅ Lyrics extracted and saved")
+
+            result = {
+                'success': True,
+                'session_id': session_id,
+                'duration': duration,
+                'transcription': transcription,
+                'profanity_detection': profanity_result,
+                'cleaning_results': {
+                    'words_cleaned': len(profanity_result['detected_words']),
+                    'cleaning_accuracy': cleaned_audio['accuracy'],
+                    'instrumental_preservation': 100,
+                    'final_quality': cleaned_audio['quality']
+                },
+                'file_paths': file_paths,
+                'lyrics_path': lyrics_path,
+                'processing_time': cleaned_audio.get('processing_time', 0),
+                'real_processing': True
+            }
+
+            logger.info(f"🎯 REAL processing completed successfully for session: {session_id}")
+            return result
+
+        except Exception as e:
+            logger.error(f"❌ REAL processing error for {session_id}: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+
+    async def process_audio_streaming(
+        self,
+        audio_path: str,
+        session_id: str,
+        max_memory_mb: Optional[float] = None,
+        progress: Optional[Callable[[str, int], None]] = None
+    ) -> Dict[str, Any]:
+        """Streaming pipeline - overlapping STFT blocks, stems written to disk as they are produced
+
+        Separation and cleaning stay under the memory ceiling whatever the track length. Transcription
+        does not: the 16 kHz vocals are spilled to disk and memory-mapped (paged in, not heap), but VAD
+        packing and Whisper's mel spectrogram still build whole-track arrays - up to ~6MB per minute
+        of track (~350MB per hour), reported separately as asr_peak_memory_mb.
+        """
+
+        memory_ceiling_mb = max_memory_mb or STREAMING_CONFIG["max_memory_mb"]
+        logger.info(f"🎯 Starting STREAMING audio processing for session: {session_id} (ceiling {memory_ceiling_mb}MB)")
+        models.ensure_loaded()
+
+        work_dir = os.path.join('processed', session_id)
+        os.makedirs(work_dir, exist_ok=True)
+        vocals_path = os.path.join(work_dir, 'vocals_raw.wav')
+        instrumental_path = os.path.join(work_dir, 'instrumental_raw.wav')
+        whisper_path = os.path.join(work_dir, 'vocals_16k.f32')
+
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+
+        try:
+            sr = self.sample_rate
+            separator = StreamingBandSeparator(sr, max_memory_mb=memory_ceiling_mb)
+
+            # Step 1+2: Decode and separate block by block, resampling the vocals for Whisper as they come
+            self._report_progress(progress, 'separation')
+            tracemalloc.reset_peak()
+            total_samples = 0
+            blocks = 0
+            whisper_resampler = soxr.ResampleStream(sr, WHISPER_SAMPLE_RATE, 1, dtype='float32', quality='HQ')
+            with sf.SoundFile(vocals_path, 'w', sr, 1, subtype='FLOAT') as vocals_out, \
+                    sf.SoundFile(instrumental_path, 'w', sr, 1, subtype='FLOAT') as instrumental_out, \
+                    open(whisper_path, 'wb') as whisper_out:
+                for block in self._decode_blocks(audio_path, sr, separator.block_samples):
+                    vocals, instrumental = separator.process_block(block)
+                    vocals_out.write(vocals)
+                    instrumental_out.write(instrumental)
+                    whisper_out.write(whisper_resampler.resample_chunk(vocals).tobytes())
+                    total_samples += block.shape[0]
+                    blocks += 1
+
+                vocals, instrumental = separator.flush()
+                vocals_out.write(vocals)
+                instrumental_out.write(instrumental)
+                whisper_out.write(whisper_resampler.resample_chunk(vocals, last=True).tobytes())
+            separation_peak = tracemalloc.get_traced_memory()[1]
+
+            duration = total_samples / sr
+            logger.info(f"✅ Streaming stem separation completed: {duration:.1f} seconds in {blocks} blocks")
+
+            # Step 3: Real transcription from the 16 kHz vocals spilled during separation (paged in, not copied)
+            self._report_progress(progress, 'transcription')
+            tracemalloc.reset_peak()
+            if os.path.getsize(whisper_path):
+                whisper_audio = np.memmap(whisper_path, dtype=np.float32, mode='r')
+            else:
+                whisper_audio = np.zeros(0, dtype=np.float32)
+            transcription = await self._real_transcription(whisper_audio, WHISPER_SAMPLE_RATE)
+            del whisper_audio
+            asr_peak = tracemalloc.get_traced_memory()[1]
+            logger.info(f"✅ Transcription completed: '{transcription['text'][:100]}...'")
+
+            # Step 4: REAL profanity detection
+            self._report_progress(progress, 'detection')
             detector = RealProfanityDetector()
             profanity_result = await detector.detect_profanity_real(
                 transcription['text'],
@@ -391,26 +2198,28 @@ class RealAudioProcessor:
             )
             logger.info(f"✅ Profanity detection: {profanity_result['total_detected']} words found")
 
-            # Step 5: REAL audio cleaning (actually mutes curse words)
-            cleaned_audio = await self._real_audio_cleaning(
-                stems['vocals'],
-                stems['instrumental'],
+            # Step 5+6: Mute, mix and write the final files block by block
+            self._report_progress(progress, 'cleaning')
+            tracemalloc.reset_peak()
+            cleaned_audio, file_paths = await self._stream_cleaning(
+                vocals_path,
+                instrumental_path,
                 profanity_result['detected_words'],
-                sr
-            )
-            logger.info("✅ Audio cleaning completed")
-
-            # Step 6: Save processed files
-            file_paths = await self._save_processed_audio(
-                cleaned_audio,
                 session_id,
-                sr
+                sr,
+                total_samples,
+                separator.block_samples
             )
-            logger.info("✅ Files saved")
+            cleaning_peak = tracemalloc.get_traced_memory()[1]
+            logger.info("✅ Streaming cleaning completed, files saved")
 
             # Step 7: Extract and save lyrics
+            self._report_progress(progress, 'lyrics')
             lyrics_path = await self._save_lyrics(transcription['text'], session_id)
-            logger.info("✅ Lyrics extracted and saved")
+
+            peak_memory_mb = max(separation_peak, cleaning_peak) / (1024 * 1024)
+            if peak_memory_mb > memory_ceiling_mb:
+                logger.warning(f"⚠️ Streaming peak {peak_memory_mb:.1f}MB exceeded ceiling {memory_ceiling_mb}MB")
 
             result = {
                 'success': True,
@@ -427,57 +2236,167 @@ class RealAudioProcessor:
                 'file_paths': file_paths,
                 'lyrics_path': lyrics_path,
                 'processing_time': cleaned_audio.get('processing_time', 0),
+                'streaming': {
+                    'enabled': True,
+                    'memory_ceiling_mb': memory_ceiling_mb,
+                    'peak_memory_mb': round(peak_memory_mb, 2),  # Separation and cleaning blocks
+                    'asr_peak_memory_mb': round(asr_peak / (1024 * 1024), 2),  # Transcription - grows with track length
+                    'block_frames': separator.block_frames,
+                    'blocks': blocks
+                },
                 'real_processing': True
             }
 
-            logger.info(f"🎯 REAL processing completed successfully for session: {session_id}")
+            logger.info(f"🎯 STREAMING processing completed for session: {session_id} (peak {peak_memory_mb:.1f}MB)")
             return result
 
         except Exception as e:
-            logger.error(f"❌ REAL processing error for {session_id}: {str(e)}")
+            logger.error(f"❌ STREAMING processing error for {session_id}: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
 
-    async def _real_stem_separation(self, audio_data: np.ndarray, sr: int) -> Dict[str, np.ndarray]:
-        """Real stem separation using advanced techniques"""
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+            shutil.rmtree(work_dir, ignore_errors=True)
 
-        logger.info("🎵 Performing REAL stem separation...")
+    def _report_progress(self, progress: Optional[Callable[[str, int], None]], stage: str):
+        """Forward the current pipeline stage and its percent complete to a progress callback"""
 
-        # Advanced spectral separation
-        stft = librosa.stft(audio_data, n_fft=2048, hop_length=512)
-        magnitude = np.abs(stft)
-        phase = np.angle(stft)
+        if progress is not None:
+            progress(stage, PIPELINE_STAGES[stage])
 
-        # Create separation masks using spectral characteristics
-        vocal_mask = np.zeros_like(magnitude)
-        instrumental_mask = np.zeros_like(magnitude)
+    def _decode_blocks(self, audio_path: str, sr: int, block_samples: int):
+        """Yield mono float32 blocks decoded and resampled by ffmpeg without loading the whole file"""
 
-        freq_bins = magnitude.shape[0]
+        command = [
+            'ffmpeg', '-nostdin', '-v', 'error', '-i', audio_path,
+            '-f', 'f32le', '-acodec', 'pcm_f32le', '-ac', '1', '-ar', str(sr), '-'
+        ]
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
 
-        # Improved vocal/instrumental separation
-        # Vocals typically dominate mid frequencies (200Hz - 2kHz)
-        vocal_freq_start = int(200 * freq_bins / (sr / 2))  # 200 Hz
-        vocal_freq_end = int(2000 * freq_bins / (sr / 2))   # 2000 Hz
-
-        # Create sophisticated masks
-        for f in range(freq_bins):
-            for t in range(magnitude.shape[1]):
-                mag = magnitude[f, t]
-
-                if vocal_freq_start <= f <= vocal_freq_end:
-                    # In vocal frequency range
-                    vocal_mask[f, t] = mag * 0.8  # Extract 80% for vocals
-                    instrumental_mask[f, t] = mag * 0.3  # Leave 30% for instrumental
-                else:
-                    # Outside vocal range - mostly instrumental
-                    vocal_mask[f, t] = mag * 0.2  # Extract 20% for vocals
-                    instrumental_mask[f, t] = mag * 0.9  # Extract 90% for instrumental
+        try:
+            while True:
+                data = process.stdout.read(block_samples * 4)
+                if not data:
+                    break
+                yield np.frombuffer(data[:len(data) - len(data) % 4], dtype=np.float32)
+        finally:
+            process.stdout.close()
+            stderr = process.stderr.read().decode(errors='ignore')
+            process.stderr.close()
+            if process.wait() != 0:
+                raise RuntimeError(f"ffmpeg decode failed: {stderr.strip()}")
+
+    async def _stream_cleaning(
+        self,
+        vocals_path: str,
+        instrumental_path: str,
+        profane_words: List[Dict],
+        session_id: str,
+        sr: int,
+        total_samples: int,
+        block_samples: int
+    ) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Block-wise version of _real_audio_cleaning + _save_processed_audio"""
+
+        # Mute ranges in samples, clamped like the in-memory cleaner
+        mute_ranges = []
+        for word in profane_words:
+            start_sample = max(0, min(int(word['start_time'] * sr), total_samples))
+            end_sample = max(start_sample, min(int(word['end_time'] * sr), total_samples))
+            if end_sample > start_sample:
+                mute_ranges.append([word, start_sample, end_sample, 0.0])
+
+        def read_cleaned_blocks(log_amplitude: bool):
+            with sf.SoundFile(vocals_path) as vocals_in, sf.SoundFile(instrumental_path) as instrumental_in:
+                offset = 0
+                while True:
+                    vocals = vocals_in.read(block_samples, dtype='float32')
+                    instrumental = instrumental_in.read(block_samples, dtype='float32')
+                    if not len(vocals):
+                        break
+
+                    # REAL MUTING: silence every profane range that touches this block
+                    block_end = offset + len(vocals)
+                    for entry in mute_ranges:
+                        start, end = max(entry[1], offset), min(entry[2], block_end)
+                        if end > start:
+                            if log_amplitude:
+                                entry[3] += float(np.sum(np.abs(vocals[start - offset:end - offset])))
+                            vocals[start - offset:end - offset] = 0
+
+                    yield offset, vocals, instrumental
+                    offset = block_end
+
+        session_dir = os.path.join('final', session_id)
+        os.makedirs(session_dir, exist_ok=True)
+        file_paths = {
+            'final': os.path.join(session_dir, 'clean_final.wav'),
+            'preview': os.path.join(session_dir, 'clean_preview.wav'),
+            'vocals': os.path.join(session_dir, 'cleaned_vocals.wav'),
+            'instrumental': os.path.join(session_dir, 'instrumental.wav')
+        }
+
+        # Pass 1: stems + mix peak for normalization
+        max_amplitude = 0.0
+        with sf.SoundFile(file_paths['vocals'], 'w', sr, 1) as vocals_out, \
+                sf.SoundFile(file_paths['instrumental'], 'w', sr, 1) as instrumental_out:
+            for _, vocals, instrumental in read_cleaned_blocks(log_amplitude=True):
+                vocals_out.write(vocals)
+                instrumental_out.write(instrumental)
+                mix = vocals * self.vocal_level + instrumental * self.instrumental_level
+                max_amplitude = max(max_amplitude, float(np.max(np.abs(mix))))
+
+        gain = self.peak_limit / max_amplitude if max_amplitude > self.peak_limit else 1.0
+        preview_samples = min(self.preview_seconds * sr, total_samples)
+
+        # Pass 2: normalized final mix and preview
+        with sf.SoundFile(file_paths['final'], 'w', sr, 1) as final_out, \
+                sf.SoundFile(file_paths['preview'], 'w', sr, 1) as preview_out:
+            for offset, vocals, instrumental in read_cleaned_blocks(log_amplitude=False):
+                mix = (vocals * self.vocal_level + instrumental * self.instrumental_level) * gain
+                final_out.write(mix)
+                if offset < preview_samples:
+                    preview_out.write(mix[:preview_samples - offset])
+
+        cleaning_log = []
+        for word, start_sample, end_sample, amplitude in mute_ranges:
+            cleaning_log.append({
+                'word': word['word'],
+                'start_time': word['start_time'],
+                'end_time': word['end_time'],
+                'start_sample': start_sample,
+                'end_sample': end_sample,
+                'duration': (end_sample - start_sample) / sr,
+                'original_amplitude': amplitude / (end_sample - start_sample),
+                'cleaned_amplitude': 0.0,  # Silenced
+                'cleaning_method': 'complete_mute'
+            })
+
+        cleaned_audio = {
+            'cleaning_log': cleaning_log,
+            'words_muted': len(cleaning_log),
+            'total_muted_duration': sum(entry['duration'] for entry in cleaning_log),
+            'accuracy': 0.99,
+            'quality': 0.96,
+            'instrumental_preservation': 1.0,
+            'processing_time': 4.2,
+            'cleaning_method': 'real_precision_muting'
+        }
+
+        logger.info(f"🧹 STREAMING cleaning completed: {len(cleaning_log)} words muted, {cleaned_audio['total_muted_duration']:.1f}s total")
+        logger.info(f"💾 All audio files saved for session: {session_id}")
+
+        return cleaned_audio, file_paths
+
+    async def _real_stem_separation(self, audio_data: np.ndarray, sr: int) -> Dict[str, np.ndarray]:
+        """Real stem separation using advanced techniques"""
 
-        # Reconstruct audio signals
-        vocal_stft = vocal_mask * np.exp(1j * phase)
-        instrumental_stft = instrumental_mask * np.exp(1j * phase)
+        logger.info("🎵 Performing REAL stem separation...")
 
-        vocals = librosa.istft(vocal_stft, hop_length=512)
-        instrumental = librosa.istft(instrumental_stft, hop_length=512)
+        # Advanced spectral separation - band gains applied straight to the complex STFT
+        separator = BandGainSeparator(sr)
+        vocals, instrumental = separator.separate(audio_data)
 
         # Ensure same length
         min_length = min(len(vocals), len(instrumental), len(audio_data))
@@ -498,10 +2417,74 @@ class RealAudioProcessor:
 
         logger.info("🎤 Performing REAL transcription...")
 
-        if whisper_model is None:
-            # Create realistic mock transcription with actual profanity
-            logger.info("Using realistic mock transcription with real profanity")
-            mock_lyrics = """
+        asr = load_asr_backend(self.asr_engine, self.transcriber, self.model_size)
+        if asr is None:
+            return self._mock_transcription()
+
+        try:
+            # Whisper takes 16 kHz float32 samples directly - no temp WAV, no ffmpeg re-decode
+            whisper_audio = self._to_whisper_rate(vocal_audio, sr)
+            audio_seconds = len(whisper_audio) / WHISPER_SAMPLE_RATE
+
+            # Gate on voice activity - only sung regions, packed back to back, reach Whisper
+            timeline = None
+            if VAD_CONFIG["enabled"]:
+                vad = VoiceActivityDetector()
+                regions = vad.regions(whisper_audio)
+                whisper_audio, timeline = vad.pack(whisper_audio, regions)
+            voiced_seconds = sum(end - start for start, end in timeline.regions) / WHISPER_SAMPLE_RATE if timeline else audio_seconds
+
+            # Transcribe with the job's ASR engine - word timing only where profanity was heard
+            asr_start = time.perf_counter()
+            if len(whisper_audio) == 0:
+                result, alignment = {'text': '', 'language': 'en', 'segments': []}, {'mode': 'skipped'}
+            else:
+                result, alignment = asr.transcribe(whisper_audio, TRANSCRIPTION_CONFIG["two_pass"])
+            asr_seconds = time.perf_counter() - asr_start
+
+            # Packed timestamps back onto the track's timeline
+            if timeline is not None:
+                timeline.map_segments(result.get('segments', []))
+
+            return {
+                'text': result['text'],
+                'language': result['language'],
+                'word_timestamps': result.get('segments', []),
+                'word_alignment': alignment,
+                'vad': {
+                    'enabled': timeline is not None,
+                    'regions': len(timeline.regions) if timeline else None,
+                    'audio_seconds': round(audio_seconds, 2),
+                    'transcribed_seconds': round(voiced_seconds, 2),
+                    'skipped_fraction': round(1 - voiced_seconds / audio_seconds, 4) if audio_seconds else 0.0
+                },
+                'asr_seconds': round(asr_seconds, 2),
+                'asr_engine': asr.name,
+                'asr_model': result.get('model'),
+                'confidence': 0.96,
+                'method': 'whisper_ai'
+            }
+
+        except Exception as e:
+            logger.error(f"Whisper transcription failed: {e}")
+            # Fallback to mock transcription
+            return self._mock_transcription()
+
+    def _to_whisper_rate(self, vocal_audio: np.ndarray, sr: int) -> np.ndarray:
+        """Resample (once) to Whisper's 16 kHz mono float32 input"""
+
+        vocal_audio = np.asarray(vocal_audio, dtype=np.float32)
+        if sr != WHISPER_SAMPLE_RATE:
+            vocal_audio = librosa.resample(vocal_audio, orig_sr=sr, target_sr=WHISPER_SAMPLE_RATE, res_type='soxr_hq')
+
+        return np.ascontiguousarray(vocal_audio, dtype=np.float32)
+
+    def _mock_transcription(self) -> Dict[str, Any]:
+        """Realistic mock transcription used when Whisper is unavailable"""
+
+        # Create realistic mock transcription with actual profanity
+        logger.info("Using realistic mock transcription with real profanity")
+        mock_lyrics = """
 Yo, I'm walking down the street, feeling fucking great today
 Life's been hard but I ain't gonna let that shit bring me down
 These bitches talking trash but I don't give a damn what they say
@@ -518,56 +2501,27 @@ Fuck the negativity, I'm staying true to me
 Living life my way, wild and fucking free
 """
 
-            # Create word timestamps for mock lyrics
-            words = mock_lyrics.strip().split()
-            word_timestamps = []
-            current_time = 0.0
-
-            for word in words:
-                word_duration = 0.4 + len(word) * 0.02  # Variable duration based on word length
-                word_timestamps.append({
-                    'start': current_time,
-                    'end': current_time + word_duration,
-                    'word': word
-                })
-                current_time += word_duration + 0.1  # Add pause between words
-
-            return {
-                'text': mock_lyrics.strip(),
-                'language': 'english',
-                'word_timestamps': word_timestamps,
-                'confidence': 0.94,
-                'method': 'mock_realistic'
-            }
-
-        try:
-            # Save vocal audio for Whisper processing
-            import tempfile
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_file:
-                sf.write(tmp_file.name, vocal_audio, sr)
-
-                # Transcribe with Whisper AI
-                result = whisper_model.transcribe(
-                    tmp_file.name,
-                    word_timestamps=True,
-                    language='en'
-                )
-
-                # Clean up temp file
-                os.unlink(tmp_file.name)
+        # Create word timestamps for mock lyrics
+        words = mock_lyrics.strip().split()
+        word_timestamps = []
+        current_time = 0.0
 
-                return {
-                    'text': result['text'],
-                    'language': result['language'],
-                    'word_timestamps': result.get('segments', []),
-                    'confidence': 0.96,
-                    'method': 'whisper_ai'
-                }
+        for word in words:
+            word_duration = 0.4 + len(word) * 0.02  # Variable duration based on word length
+            word_timestamps.append({
+                'start': current_time,
+                'end': current_time + word_duration,
+                'word': word
+            })
+            current_time += word_duration + 0.1  # Add pause between words
 
-        except Exception as e:
-            logger.error(f"Whisper transcription failed: {e}")
-            # Fallback to mock transcription
-            return await self._real_transcription(vocal_audio, sr)
+        return {
+            'text': mock_lyrics.strip(),
+            'language': 'english',
+            'word_timestamps': word_timestamps,
+            'confidence': 0.94,
+            'method': 'mock_realistic'
+        }
 
     async def _real_audio_cleaning(
         self,
@@ -623,18 +2577,15 @@ Living life my way, wild and fucking free
 
         # Mix cleaned vocals with untouched instrumental
         # Instrumental is NEVER modified - 100% preservation
-        vocal_level = 0.8
-        instrumental_level = 1.0  # Full level - completely preserved
-
-        final_audio = (cleaned_vocals * vocal_level) + (instrumental * instrumental_level)
+        final_audio = (cleaned_vocals * self.vocal_level) + (instrumental * self.instrumental_level)
 
         # Normalize to prevent clipping
         max_amplitude = np.max(np.abs(final_audio))
-        if max_amplitude > 0.95:
-            final_audio = final_audio * (0.95 / max_amplitude)
+        if max_amplitude > self.peak_limit:
+            final_audio = final_audio * (self.peak_limit / max_amplitude)
 
         # Create 30-second preview
-        preview_samples = min(30 * sr, len(final_audio))
+        preview_samples = min(self.preview_seconds * sr, len(final_audio))
         preview_audio = final_audio[:preview_samples]
 
         result = {
@@ -727,8 +2678,880 @@ This transcription may contain original explicit language for reference.
 
         return lyrics_path
 
+class ResultCache:
+    """Persistent, size-bounded LRU cache of finished processing results
+
+    Entries live in <directory>/<key>/ - the four output WAVs, the lyrics file and result.json
+    (everything else the pipeline returns). Files are hard-linked in and out, so storing and
+    serving a hit copies no audio, and evicting an entry never breaks a session linked to it.
+    An entry's result.json mtime is its last use, which keeps the LRU order across restarts.
+    """
+
+    AUDIO_FILES = {
+        'final': 'clean_final.wav',
+        'preview': 'clean_preview.wav',
+        'vocals': 'cleaned_vocals.wav',
+        'instrumental': 'instrumental.wav'
+    }
+    LYRICS_FILE = 'extracted_lyrics.txt'
+    RESULT_FILE = 'result.json'
+
+    def __init__(self, directory: str, max_size_mb: float, pipeline_version: str):
+        self.directory = directory
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.pipeline_version = pipeline_version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: Dict[str, int] = {}  # key -> size in bytes, least recently used first
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def key(
+        self,
+        content_hash: str,
+        streaming: bool = False,
+        asr_engine: Optional[str] = None,
+        asr_model: Optional[str] = None
+    ) -> str:
+        """Cache key for an upload - streaming output differs slightly at the track end, and each ASR
+        engine and model size transcribes a little differently, so all three are keyed apart"""
+
+        mode = 'streaming' if streaming else 'full'
+        # A model may be configured as a path - key by its name, as the engines report it in results
+        model = os.path.basename(os.path.normpath(asr_model or WARMUP_CONFIG['whisper_model']))
+        asr = f"{asr_engine or ASR_CONFIG['engine']}-{model}"
+        return f"{content_hash}-v{self.pipeline_version}-{mode}-{asr}"
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Stored result for key (and mark it most recently used), or None on a miss"""
+
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+
+            entry_dir = os.path.join(self.directory, key)
+            try:
+                with open(os.path.join(entry_dir, self.RESULT_FILE), encoding='utf-8') as f:
+                    result = json.load(f)
+                os.utime(os.path.join(entry_dir, self.RESULT_FILE))
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Dropping unreadable cache entry {key}: {e}")
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries[key] = self._entries.pop(key)
+            self.hits += 1
+            return result
+
+    def store(self, key: str, result: Dict[str, Any]):
+        """Link a finished session's outputs into the cache and evict down to the size limit"""
+
+        with self._lock:
+            if key in self._entries:
+                return
+
+        entry_dir = os.path.join(self.directory, key)
+        staging_dir = f"{entry_dir}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(staging_dir)
+
+        try:
+            for audio_type, filename in self.AUDIO_FILES.items():
+                self._link(result['file_paths'][audio_type], os.path.join(staging_dir, filename))
+            self._link(result['lyrics_path'], os.path.join(staging_dir, self.LYRICS_FILE))
+
+            cached = {k: v for k, v in result.items() if k not in ('file_paths', 'lyrics_path', 'session_id')}
+            with open(os.path.join(staging_dir, self.RESULT_FILE), 'w', encoding='utf-8') as f:
+                json.dump(cached, f, default=self._json_default)
+
+            # Publish atomically - a reader never sees a half-written entry
+            os.replace(staging_dir, entry_dir)
+        except Exception as e:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            logger.warning(f"⚠️ Could not cache result {key}: {e}")
+            return
+
+        with self._lock:
+            self._entries[key] = self._dir_size(entry_dir)
+            self._evict()
+
+        logger.info(f"🗄️ Cached result {key}")
+
+    def materialize(self, key: str, result: Dict[str, Any], session_id: str) -> Optional[Dict[str, Any]]:
+        """Link a cached entry's files into a session's output dirs and return its result for that session
+
+        None if the entry's files are gone or unreadable - the entry is dropped so the caller
+        (and every retry) processes the track normally instead of failing on it again.
+        """
+
+        entry_dir = os.path.join(self.directory, key)
+        session_dir = os.path.join('final', session_id)
+        lyrics_dir = os.path.join('lyrics', session_id)
+
+        try:
+            os.makedirs(session_dir, exist_ok=True)
+
+            file_paths = {}
+            for audio_type, filename in self.AUDIO_FILES.items():
+                file_paths[audio_type] = os.path.join(session_dir, filename)
+                self._link(os.path.join(entry_dir, filename), file_paths[audio_type])
+
+            # The lyrics header names the session, so that small file is rewritten rather than linked
+            os.makedirs(lyrics_dir, exist_ok=True)
+            lyrics_path = os.path.join(lyrics_dir, self.LYRICS_FILE)
+            with open(os.path.join(entry_dir, self.LYRICS_FILE), encoding='utf-8') as f:
+                lyrics = re.sub(r'^Session: .*$', f'Session: {session_id}', f.read(), count=1, flags=re.MULTILINE)
+            with open(lyrics_path, 'w', encoding='utf-8') as f:
+                f.write(lyrics)
+        except Exception as e:
+            logger.warning(f"⚠️ Dropping cache entry {key} that could not be materialized: {e}")
+            for directory in (session_dir, lyrics_dir):
+                shutil.rmtree(directory, ignore_errors=True)
+            with self._lock:
+                self._remove(key)
+                self.hits -= 1
+                self.misses += 1
+            return None
+
+        return {
+            **result,
+            'session_id': session_id,
+            'file_paths': file_paths,
+            'lyrics_path': lyrics_path,
+            'cache': {'hit': True, 'key': key}
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': True,
+                'entries': len(self._entries),
+                'size_mb': round(sum(self._entries.values()) / (1024 * 1024), 2),
+                'max_size_mb': round(self.max_bytes / (1024 * 1024), 2),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions
+            }
+
+    def _load_index(self):
+        """Rebuild the LRU order from disk, oldest result.json mtime first; drop unfinished entries"""
+
+        found = []
+        for name in os.listdir(self.directory):
+            entry_dir = os.path.join(self.directory, name)
+            result_file = os.path.join(entry_dir, self.RESULT_FILE)
+            if name.endswith('.tmp') or not os.path.exists(result_file):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                continue
+            found.append((os.path.getmtime(result_file), name, self._dir_size(entry_dir)))
+
+        for _, name, size in sorted(found):
+            self._entries[name] = size
+
+        self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits (caller holds the lock)"""
+
+        while self._entries and sum(self._entries.values()) > self.max_bytes:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+            logger.info(f"🧹 Evicted cached result {key}")
+
+    def _remove(self, key: str):
+        self._entries.pop(key, None)
+        shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+
+    @staticmethod
+    def _link(source: str, destination: str):
+        if os.path.exists(destination):
+            os.unlink(destination)  # Never write through an existing link into a shared file
+        try:
+            os.link(source, destination)
+        except OSError:
+            shutil.copy2(source, destination)  # Different filesystem, or links unsupported
+
+    @staticmethod
+    def _dir_size(path: str) -> int:
+        return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+    @staticmethod
+    def _json_default(value):
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return str(value)
+
+class ArtifactETags:
+    """Strong ETags from artifact content, hashed once per file version
+
+    Keyed by (device, inode, mtime, size): rewriting a file changes the key, and the hard links
+    ResultCache hands to every session of the same track share one entry.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._etags: Dict[Tuple[int, int, int, int], str] = {}
+        self._lock = threading.Lock()
+
+    def etag(self, path: str, stat_result: Optional[os.stat_result] = None) -> str:
+        stat_result = stat_result or os.stat(path)
+        key = (stat_result.st_dev, stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size)
+
+        with self._lock:
+            if key in self._etags:
+                return self._etags[key]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            while chunk := f.read(UPLOAD_CONFIG["chunk_size"]):
+                digest.update(chunk)
+        etag = f'"{digest.hexdigest()[:32]}"'
+
+        with self._lock:
+            if len(self._etags) >= self.max_entries:
+                self._etags.pop(next(iter(self._etags)))
+            self._etags[key] = etag
+
+        return etag
+
+    def warm(self, paths):
+        """Hash freshly written artifacts so the first download doesn't wait on it"""
+
+        for path in paths:
+            if path and os.path.exists(path):
+                self.etag(path)
+
+class VariantTranscoder:
+    """Encodes a WAV master into another format once, on first request, and reuses the file
+
+    Variants live next to their master in final/<session>/variants/, named by source, format
+    and bitrate. Concurrent requests for the same variant share one ffmpeg run. Without ffmpeg
+    on PATH only WAV is served - other formats get a 503.
+    """
+
+    def __init__(self):
+        self.encodes = 0
+        self.hits = 0
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.available = shutil.which('ffmpeg') is not None
+        if not self.available:
+            logger.warning("⚠️ ffmpeg not found - downloads and previews are served as WAV only")
+
+    def resolve_bitrate(self, audio_format: str, bitrate: Optional[int]) -> Optional[int]:
+        """Validated bitrate in kbps for the format (None for lossless formats)"""
+
+        spec = TRANSCODE_FORMATS.get(audio_format)
+        if spec is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported format: {audio_format}. Supported: {', '.join(TRANSCODE_FORMATS)}"
+            )
+
+        if spec["default_kbps"] is None:
+            return None
+
+        low, high = TRANSCODE_CONFIG["bitrate_range_kbps"]
+        bitrate = bitrate or spec["default_kbps"]
+        if not low <= bitrate <= high:
+            raise HTTPException(status_code=400, detail=f"Bitrate must be between {low} and {high} kbps")
+
+        return bitrate
+
+    async def variant(self, source_path: str, audio_format: str, bitrate: Optional[int] = None) -> str:
+        """Path of source_path encoded as audio_format - encoded now if it isn't on disk yet"""
+
+        bitrate = self.resolve_bitrate(audio_format, bitrate)
+        spec = TRANSCODE_FORMATS[audio_format]
+        if spec["codec"] is None:
+            return source_path
+
+        stem = os.path.splitext(os.path.basename(source_path))[0]
+        suffix = f"_{bitrate}k" if bitrate else ""
+        variant_dir = os.path.join(os.path.dirname(source_path), 'variants')
+        variant_path = os.path.join(variant_dir, f"{stem}{suffix}.{spec['extension']}")
+
+        lock = self._locks.setdefault(variant_path, asyncio.Lock())
+        try:
+            async with lock:
+                if os.path.exists(variant_path):
+                    self.hits += 1
+                    return variant_path
+
+                if not self.available:
+                    raise HTTPException(
+                        status_code=503,
+                        detail=f"Transcoding to {audio_format} is unavailable (ffmpeg not installed) - use format=wav"
+                    )
+
+                os.makedirs(variant_dir, exist_ok=True)
+                if artifact_collector is not None:
+                    artifact_collector.acquire(source_path)
+                try:
+                    await self._encode(source_path, variant_path, spec, bitrate)
+                finally:
+                    if artifact_collector is not None:
+                        artifact_collector.release(source_path)
+                self.encodes += 1
+        finally:
+            self._locks.pop(variant_path, None)  # Failed encodes too - the next request retries afresh
+
+        return variant_path
+
+    async def _encode(self, source_path: str, variant_path: str, spec: Dict[str, Any], bitrate: Optional[int]):
+        # Encode beside the target and rename, so a crashed encode never leaves a partial variant
+        partial_path = f"{variant_path}.{uuid.uuid4().hex}.part"
+        command = ['ffmpeg', '-nostdin', '-v', 'error', '-y', '-i', source_path, *spec["codec"]]
+        if bitrate:
+            command += ['-b:a', f'{bitrate}k']
+        command += ['-f', 'ogg' if spec["extension"] == 'opus' else spec["extension"], partial_path]
+
+        start = time.perf_counter()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+            )
+        except FileNotFoundError:
+            self.available = False  # Removed since startup
+            raise HTTPException(status_code=503, detail="Transcoding is unavailable (ffmpeg not installed) - use format=wav")
+        _, stderr = await process.communicate()
+
+        if process.returncode != 0:
+            if os.path.exists(partial_path):
+                os.unlink(partial_path)
+            raise HTTPException(status_code=500, detail=f"Transcoding failed: {stderr.decode(errors='replace').strip()}")
+
+        os.replace(partial_path, variant_path)
+        logger.info(f"🎚️ Encoded {variant_path} in {time.perf_counter() - start:.2f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        return {'available': self.available, 'encodes': self.encodes, 'hits': self.hits}
+
+class ArtifactCollector:
+    """Keeps session artifacts within a disk budget and per-class retention
+
+    Each session's files are grouped by class: final (mix and lyrics), preview, stems, variants
+    (re-encodable downloads) and upload. A group's last access is its newest atime/mtime -
+    serving a file stamps its atime. A group's score is its age over its class retention: past
+    1.0 it has expired, and while usage is over budget the highest scores go first. Sessions
+    with a queued or running job, and files leased by an in-flight response, are never touched;
+    uploads still waiting for /process are only removed once past their retention, never for budget.
+    Sessions that no longer exist (expired or deleted) lose their artifacts, the final mix only once
+    past its own retention. Completing a session and serving its files extend its TTL to that retention.
+
+    Session status comes from the shared store, so every uvicorn worker sees every job. Leases and
+    job_queue.pending are per process: a range request or encode running in another worker is not
+    protected here beyond its fresh atime. Run collection in one worker (FWEA_ARTIFACT_GC=false on the
+    others) and keep retention well above the longest download - an unlinked file that is already
+    open keeps streaming, only a later re-open would miss it.
+    """
+
+    CLASSES = {
+        'clean_final.wav': 'final',
+        'clean_preview.wav': 'preview',
+        'cleaned_vocals.wav': 'stems',
+        'instrumental.wav': 'stems'
+    }
+    BUSY_STATUSES = ("queued", "processing_real")
+    AWAITING_STATUSES = ("uploaded",)  # Upload stored, /process not called yet
+    ORPHAN_GRACE_SECONDS = 600  # An upload is on disk briefly before its session is stored
+
+    def __init__(self, budget_mb: float, retention_hours: Dict[str, float]):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.retention_seconds = {cls: hours * 3600 for cls, hours in retention_hours.items()}
+        self.reclaimed_bytes = 0
+        self.deleted_files = 0
+        self.runs = 0
+        self.last_run: Dict[str, Any] = {}
+        self._leases: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    # Step 1: Access tracking and leases
+    def touch(self, path: str):
+        """Record an access (atime), keeping mtime - the ETag key - unchanged"""
+
+        try:
+            os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+        except OSError:
+            pass
+
+    def acquire(self, path: str):
+        with self._lock:
+            self._leases[os.path.abspath(path)] = self._leases.get(os.path.abspath(path), 0) + 1
+
+    def release(self, path: str):
+        with self._lock:
+            key = os.path.abspath(path)
+            self._leases[key] -= 1
+            if self._leases[key] <= 0:
+                del self._leases[key]
+
+    def _leased(self, path: str) -> bool:
+        with self._lock:
+            return os.path.abspath(path) in self._leases
+
+    # Step 2: Inventory
+    def _classify(self, directory: str, path: str) -> str:
+        if directory == 'uploads':
+            return 'upload'
+        if directory == 'lyrics':
+            return 'final'
+        if os.path.basename(os.path.dirname(path)) == 'variants':
+            return 'variants'
+        return self.CLASSES.get(os.path.basename(path), 'stems')
+
+    def inventory(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """(session_id, class) -> files, unique bytes and last access"""
+
+        groups: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for directory in ('uploads', 'final', 'lyrics', 'processed'):
+            if not os.path.isdir(directory):
+                continue
+            for session_id in os.listdir(directory):
+                for root, _, files in os.walk(os.path.join(directory, session_id)):
+                    for name in files:
+                        path = os.path.join(root, name)
+                        try:
+                            st = os.stat(path)
+                        except OSError:
+                            continue
+                        # processed/ only holds streaming scratch files - grouped with the upload
+                        cls = 'upload' if directory == 'processed' else self._classify(directory, path)
+                        group = groups.setdefault((session_id, cls), {'files': [], 'bytes': 0, 'last_access': 0.0})
+                        group['files'].append(path)
+                        # Links shared with the result cache free nothing when removed here
+                        group['bytes'] += st.st_size if st.st_nlink == 1 else 0
+                        group['last_access'] = max(group['last_access'], st.st_atime, st.st_mtime)
+        return groups
+
+    # Step 3: Collection
+    def collect(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """One pass: drop expired sessions, expired groups, then LRU-by-class until under budget"""
+
+        now = now or time.time()
+        start = time.perf_counter()
+        reclaimed = deleted = 0
+
+        for session_id, _ in sessions.purge_expired(now):
+            logger.info(f"⌛ Session expired: {session_id}")
+
+        groups = self.inventory()
+        usage = sum(group['bytes'] for group in groups.values())
+
+        status_of: Dict[str, Optional[str]] = {}
+        for session_id, _ in groups:
+            if session_id not in status_of:
+                session = sessions.get(session_id)
+                status_of[session_id] = session.get('status') if session else None
+
+        def score(key: Tuple[str, str]) -> float:
+            session_id, cls = key
+            age = (now - groups[key]['last_access']) / self.retention_seconds.get(cls, 86400)
+            if status_of[session_id] is None and now - groups[key]['last_access'] > self.ORPHAN_GRACE_SECONDS:
+                if cls != 'final' or age >= 1.0:
+                    return float('inf')  # Session is gone - nothing can reach these files
+            return age
+
+        for key in sorted(groups, key=score, reverse=True):
+            session_id, cls = key
+            if status_of[session_id] in self.BUSY_STATUSES or session_id in job_queue.pending:
+                continue
+            if status_of[session_id] is None and score(key) != float('inf'):
+                continue  # Upload still being stored, or a paid final mix still within its retention
+            if status_of[session_id] in self.AWAITING_STATUSES and score(key) < 1.0:
+                continue  # /process will need this upload - retention floor, not a budget candidate
+            if score(key) < 1.0 and usage <= self.budget_bytes:
+                break
+
+            freed, removed = self._remove(groups[key]['files'])
+            usage -= freed
+            reclaimed += freed
+            deleted += removed
+            if removed:
+                logger.info(f"🧹 Collected {cls} artifacts of {session_id} ({freed / (1024 * 1024):.1f}MB)")
+
+        with self._lock:
+            self.reclaimed_bytes += reclaimed
+            self.deleted_files += deleted
+            self.runs += 1
+            self.last_run = {
+                'at': datetime.utcnow().isoformat(),
+                'reclaimed_mb': round(reclaimed / (1024 * 1024), 2),
+                'deleted_files': deleted,
+                'usage_mb': round(usage / (1024 * 1024), 2),
+                'seconds': round(time.perf_counter() - start, 3)
+            }
+        return self.last_run
+
+    def _remove(self, paths: List[str]) -> Tuple[int, int]:
+        freed = removed = 0
+        for path in paths:
+            if self._leased(path):
+                continue
+            try:
+                st = os.stat(path)
+                os.unlink(path)
+            except OSError:
+                continue
+            freed += st.st_size if st.st_nlink == 1 else 0
+            removed += 1
+            self._prune_empty_dirs(os.path.dirname(path))
+        return freed, removed
+
+    @staticmethod
+    def _prune_empty_dirs(directory: str):
+        try:
+            while os.path.basename(directory) and os.path.dirname(directory) and not os.listdir(directory):
+                os.rmdir(directory)
+                directory = os.path.dirname(directory)
+        except OSError:
+            pass  # Refilled or already gone
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': True,
+                'budget_mb': round(self.budget_bytes / (1024 * 1024), 2),
+                'reclaimed_mb_total': round(self.reclaimed_bytes / (1024 * 1024), 2),
+                'deleted_files_total': self.deleted_files,
+                'runs': self.runs,
+                'open_leases': len(self._leases),
+                'last_run': self.last_run
+            }
+
+class LeasedFileResponse(FileResponse):
+    """FileResponse holding a collector lease on its file until the body is fully sent"""
+
+    def __init__(self, *args, lease: Optional[Callable[[], None]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lease = lease
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.lease is not None:
+                self.lease()
+
+def _run_processing_job(
+    session_id: str,
+    audio_path: str,
+    options: Dict[str, Any],
+    progress_store: Dict[str, Dict],
+    transcriber: Optional[RemoteTranscriber] = None
+) -> Dict[str, Any]:
+    """Worker-process entry point: run one pipeline and publish its stage into progress_store"""
+
+    def report(stage: str, percent: int):
+        progress_store[session_id] = {'stage': stage, 'percent': percent}
+
+    report('starting', PIPELINE_STAGES['starting'])
+    models.ensure_loaded()  # Forked after warm-up, so normally already loaded
+    processor = RealAudioProcessor(transcriber, options.get('asr_engine'), options.get('model_size'))
+
+    try:
+        if options.get('streaming'):
+            pipeline = processor.process_audio_streaming(
+                audio_path,
+                session_id,
+                max_memory_mb=options.get('max_memory_mb'),
+                progress=report
+            )
+        else:
+            pipeline = processor.process_audio_real(audio_path, session_id, progress=report)
+
+        result = asyncio.run(pipeline)
+        result['model_tier'] = options.get('model_choice')
+        return {'success': True, 'result': result}
+
+    except Exception as e:
+        # HTTPException does not survive pickling back to the parent - send its detail instead
+        return {'success': False, 'error': getattr(e, 'detail', str(e))}
+
+class ProcessingJobQueue:
+    """Runs processing jobs on a pool of worker processes and tracks queue position and progress"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.manager = None
+        self.progress: Dict[str, Dict] = {}
+        self.pending: List[str] = []  # Session ids waiting for a worker, oldest first
+        self.jobs: Dict[str, Dict] = {}  # Queued and running jobs only - dropped once finished
+        self.completed = 0
+        self.failed = 0
+        self.asr_requests = None  # Workers' transcription requests, served by resident_models here
+        self.asr_replies: Dict[str, Any] = {}
+        self.asr_threads: Optional[ThreadPoolExecutor] = None
+
+    def start(self):
+        """Start the worker pool (fork keeps the already-imported models shared copy-on-write)
+
+        Called only once models are warm - forking mid warm-up would copy half-loaded modules
+        and any lock the warm-up thread holds into every worker.
+        """
+
+        if self.executor is not None:
+            return
+
+        context = multiprocessing.get_context('fork')
+        self.manager = context.Manager()
+        self.progress = self.manager.dict(self.progress)  # Carry over jobs queued during warm-up
+        self.executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+        logger.info(f"⚙️ Processing pool started with {self.max_workers} workers")
+
+        # Workers hand their vocals to this process so windows from every job batch together
+        if whisper_batcher is not None:
+            self.asr_requests = self.manager.Queue()
+            self.asr_threads = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='asr')
+            threading.Thread(target=self._relay_transcriptions, name='asr-relay', daemon=True).start()
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.asr_threads is not None:
+            self.asr_threads.shutdown(wait=False, cancel_futures=True)
+        if self.manager is not None:
+            self.manager.shutdown()
+
+    def submit(self, session_id: str, audio_path: str, options: Dict[str, Any]) -> str:
+        """Enqueue a job for a session and return its job id immediately"""
+
+        job_id = f"job_{uuid.uuid4()}"
+        self.progress[session_id] = {'stage': 'queued', 'percent': PIPELINE_STAGES['queued']}
+        self.pending.append(session_id)
+
+        self.jobs[session_id] = {
+            'job_id': job_id,
+            'submitted_at': datetime.utcnow(),
+            'predicted_seconds': options.get('model_choice', {}).get('predicted_seconds', 0.0),
+            'task': asyncio.create_task(self._complete(session_id, audio_path, options))
+        }
+
+        return job_id
+
+    async def _complete(self, session_id: str, audio_path: str, options: Dict[str, Any]):
+        """Run the job once models are warm, then move its result into the session"""
+
+        try:
+            # Jobs submitted during warm-up stay queued until the pool can fork warm workers
+            await models.wait_until_ready()
+            self.start()
+
+            transcriber = None
+            if self.asr_requests is not None:
+                self.asr_replies[session_id] = self.manager.Queue()
+                transcriber = RemoteTranscriber(session_id, self.asr_requests, self.asr_replies[session_id])
+
+            outcome = await asyncio.get_running_loop().run_in_executor(
+                self.executor, _run_processing_job, session_id, audio_path, options, self.progress, transcriber
+            )
+        except Exception as e:
+            outcome = {'success': False, 'error': str(e)}
+        finally:
+            self.asr_replies.pop(session_id, None)
+
+        if session_id in self.pending:
+            self.pending.remove(session_id)
+
+        try:
+            session = sessions.get(session_id)
+            if session is None:
+                return
+
+            if outcome['success']:
+                transcription = outcome['result'].get('transcription', {})
+                if transcription.get('asr_engine') == WhisperASRBackend.name and 'asr_seconds' in transcription:
+                    model_tiers.observe(
+                        transcription.get('asr_model'),
+                        transcription['vad']['audio_seconds'],
+                        transcription['asr_seconds']
+                    )
+
+                # Never cache the mock fallback of a failed engine - every re-upload of the track would get it
+                real_transcription = transcription.get('method') == 'whisper_ai' and transcription.get('asr_model')
+                if result_cache is not None and session.get("cache_key") and real_transcription:
+                    # Key by the model that actually ran - acquire() may have substituted a resident size
+                    cache_key = result_cache.key(
+                        session["content_hash"],
+                        bool(options.get("streaming")),
+                        options.get("asr_engine"),
+                        transcription['asr_model']
+                    )
+                    await asyncio.to_thread(result_cache.store, cache_key, outcome['result'])
+
+                await asyncio.to_thread(artifact_etags.warm, outcome['result']['file_paths'].values())
+
+                sessions.transition(
+                    session_id,
+                    "real_complete",
+                    {"completed_at": datetime.utcnow()},
+                    result=outcome['result']
+                )
+                _extend_session(session_id)
+                self.completed += 1
+                logger.info(f"🎯 REAL processing completed: {session_id}")
+            else:
+                sessions.transition(session_id, "error", {
+                    "error": outcome['error'],
+                    "completed_at": datetime.utcnow()
+                })
+                self.failed += 1
+                logger.error(f"❌ REAL processing error for {session_id}: {outcome['error']}")
+        finally:
+            # The session now carries the outcome - /status reports finished stages from its status
+            self.jobs.pop(session_id, None)
+            self.progress.pop(session_id, None)
+
+    def _relay_transcriptions(self):
+        """Serve worker transcription requests on this process's resident models"""
+
+        while True:
+            try:
+                session_id, audio_path, two_pass, model_size = self.asr_requests.get()
+            except (EOFError, OSError):
+                return  # Manager shut down
+
+            replies = self.asr_replies.get(session_id)
+            if replies is not None:
+                # One thread per request - each blocks until its windows come back from the batches
+                self.asr_threads.submit(self._serve_transcription, replies, audio_path, two_pass, model_size)
+
+    def _serve_transcription(self, replies, audio_path: str, two_pass: bool, model_size: Optional[str]):
+        try:
+            result, alignment = WhisperASRBackend(model_size=model_size).transcribe(np.load(audio_path), two_pass)
+            replies.put({'result': result, 'alignment': alignment})
+        except Exception as e:
+            replies.put({'error': str(e) or type(e).__name__})  # A timeout has no message
+
+    def backlog_seconds(self) -> float:
+        """Predicted seconds of work already queued or running, per worker"""
+
+        return sum(job['predicted_seconds'] for job in self.jobs.values()) / self.max_workers
+
+    def queue_position(self, session_id: str) -> int:
+        """1-based position among jobs no worker has picked up yet (0 once started)"""
+
+        self.pending = [sid for sid in self.pending if self.progress.get(sid, {}).get('stage') == 'queued']
+
+        return self.pending.index(session_id) + 1 if session_id in self.pending else 0
+
+    def status(self, session_id: str) -> Dict[str, Any]:
+        progress = dict(self.progress.get(session_id, {}))
+        job = self.jobs.get(session_id, {})
+
+        return {
+            'job_id': job.get('job_id'),
+            'stage': progress.get('stage'),
+            'percent': progress.get('percent', 0),
+            'queue_position': self.queue_position(session_id)
+        }
+
+    def stats(self) -> Dict[str, int]:
+        queued = len([sid for sid in self.pending if self.progress.get(sid, {}).get('stage') == 'queued'])
+
+        return {
+            'workers': self.max_workers,
+            'queued': queued,
+            'running': len(self.jobs) - queued,
+            'completed': self.completed,
+            'failed': self.failed
+        }
+
 # Initialize the real processor
 real_processor = RealAudioProcessor()
+artifact_etags = ArtifactETags()
+transcoder = VariantTranscoder()
+artifact_collector = ArtifactCollector(
+    ARTIFACT_GC_CONFIG["budget_mb"],
+    ARTIFACT_GC_CONFIG["retention_hours"]
+) if ARTIFACT_GC_CONFIG["enabled"] else None
+job_queue = ProcessingJobQueue(JOB_QUEUE_CONFIG["max_workers"])
+result_cache = ResultCache(
+    RESULT_CACHE_CONFIG["directory"],
+    RESULT_CACHE_CONFIG["max_size_mb"],
+    RESULT_CACHE_CONFIG["pipeline_version"]
+) if RESULT_CACHE_CONFIG["enabled"] else None
+
+def _clear_session_outputs(session_id: str):
+    """Remove a session's previous outputs - they may be hard links shared with the result cache"""
+
+    for directory in ('final', 'lyrics'):
+        shutil.rmtree(os.path.join(directory, session_id), ignore_errors=True)
+
+def _extend_session(session_id: str):
+    """Keep a finished session - and so its artifacts - for the final mix's retention from now"""
+
+    if sessions.ttl_seconds:
+        sessions.touch(session_id, max(sessions.ttl_seconds, ARTIFACT_GC_CONFIG["retention_hours"]["final"] * 3600))
+
+def _track_seconds(audio_path: str) -> float:
+    """Track length from the file header - a 128 kbps estimate from its size when the header can't say"""
+
+    try:
+        return float(sf.info(audio_path).duration)
+    except Exception:
+        return os.path.getsize(audio_path) * 8 / 128000
+
+def _choose_model(
+    audio_path: str,
+    asr_engine: str,
+    customer_tier: str,
+    deadline_seconds: float,
+    backlog_seconds: float
+) -> Dict[str, Any]:
+    """Per-job model choice, recorded in the job's result as 'model_tier'"""
+
+    track_seconds = _track_seconds(audio_path)
+
+    if asr_engine == WhisperASRBackend.name and MODEL_TIER_CONFIG["enabled"]:
+        return model_tiers.choose(track_seconds, customer_tier, deadline_seconds, backlog_seconds)
+
+    # Fixed model - still predicted, so the backlog estimate stays complete
+    model = WARMUP_CONFIG["whisper_model"] if asr_engine == WhisperASRBackend.name else ASR_CONFIG["ctranslate2_model"]
+    return {
+        'model': model,
+        'reason': 'tiering_disabled' if asr_engine == WhisperASRBackend.name else 'engine_model',
+        'customer_tier': customer_tier,
+        'track_seconds': round(track_seconds, 1),
+        'backlog_seconds': round(backlog_seconds, 1),
+        'deadline_seconds': deadline_seconds,
+        'predicted_seconds': round(model_tiers.predict_seconds(model, track_seconds), 1)
+    }
+
+async def _warm_up_and_start_pool():
+    try:
+        await models.wait_until_ready()
+    except Exception:
+        return  # Recorded in models.status() - /health/ready keeps reporting not ready
+    job_queue.start()
+
+async def _collect_artifacts_periodically():
+    while True:
+        try:
+            await asyncio.to_thread(artifact_collector.collect)
+        except Exception as e:
+            logger.error(f"❌ Artifact collection failed: {e}")
+        await asyncio.sleep(ARTIFACT_GC_CONFIG["interval_seconds"])
+
+@app.on_event("startup")
+async def start_job_queue():
+    """Warm models in the background, then start the processing worker pool"""
+    app.state.warmup_task = asyncio.create_task(_warm_up_and_start_pool())
+    if artifact_collector is not None:
+        app.state.collector_task = asyncio.create_task(_collect_artifacts_periodically())
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    job_queue.shutdown()
 
 @app.get("/health")
 async def real_health_check():
@@ -743,7 +3566,9 @@ async def real_health_check():
         "capabilities": {
             "real_profanity_detection": True,
             "accurate_curse_word_cleaning": True,
-            "whisper_transcription": whisper_model is not None,
+            "whisper_transcription": ASR_BACKENDS[ASR_CONFIG["engine"]].loaded(),
+            "asr_engines": list(ASR_BACKENDS),
+            "default_asr_engine": ASR_CONFIG["engine"],
             "advanced_stem_separation": True,
             "lyrics_extraction": True,
             "instrumental_preservation": 100,
@@ -753,9 +3578,97 @@ async def real_health_check():
         "detection_accuracy": "98%+",
         "uptime": "online",
         "memory_usage": "optimal",
-        "active_sessions": len(sessions)
+        "active_sessions": sessions.count(),
+        "job_queue": job_queue.stats(),
+        "model_tiers": {**model_tiers.stats(), "backlog_seconds": round(job_queue.backlog_seconds(), 1)},
+        "resident_models": resident_models.stats(),
+        "whisper_batching": whisper_batcher.stats() if whisper_batcher is not None else {"enabled": False},
+        "result_cache": result_cache.stats() if result_cache is not None else {"enabled": False},
+        "transcoding": transcoder.stats(),
+        "artifact_gc": artifact_collector.stats() if artifact_collector is not None else {"enabled": False},
+        "ready": models.ready,
+        "warmup": models.status()
     })
 
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness - the process is up and serving, whether or not models are loaded yet"""
+
+    return JSONResponse({"status": "alive", "timestamp": datetime.utcnow().isoformat()})
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness - 200 once models are loaded and warmed, 503 with warm-up progress until then"""
+
+    warmup = models.status()
+    return JSONResponse(
+        {"status": "ready" if warmup["ready"] else "warming_up", "warmup": warmup},
+        status_code=200 if warmup["ready"] else 503
+    )
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match uses weak comparison - W/ prefixes are ignored"""
+
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+async def artifact_response(
+    request: Request,
+    path: str,
+    media_type: str,
+    filename: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Serve a finished artifact with a strong content ETag, conditional GET and byte ranges
+
+    FileResponse answers Range (206, multipart/byteranges for several ranges, 416) and If-Range
+    against the ETag set here, and hands the file to the server via the pathsend extension
+    (sendfile) when the server offers it.
+    """
+
+    lease = None
+    if artifact_collector is not None:
+        # Leased until the body is sent, so the collector never removes a file mid-download
+        artifact_collector.acquire(path)
+        lease = lambda: artifact_collector.release(path)
+
+    try:
+        stat_result = await asyncio.to_thread(os.stat, path)
+        etag = await asyncio.to_thread(artifact_etags.etag, path, stat_result)
+    except BaseException as e:
+        if lease is not None:
+            lease()
+        if isinstance(e, FileNotFoundError):
+            raise HTTPException(status_code=404, detail="Audio file not found")
+        raise
+
+    headers = {
+        **(headers or {}),
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache"  # Revalidate by ETag - a 304 costs no body
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        if lease is not None:
+            lease()
+        return Response(status_code=304, headers=headers)
+
+    if lease is None:
+        return FileResponse(path, media_type=media_type, filename=filename, headers=headers, stat_result=stat_result)
+
+    await asyncio.to_thread(artifact_collector.touch, path)
+    return LeasedFileResponse(
+        path,
+        media_type=media_type,
+        filename=filename,
+        headers=headers,
+        stat_result=stat_result,
+        lease=lease
+    )
+
 @app.post("/upload")
 async def real_upload(audio: UploadFile = File(...)):
     """Real upload with enhanced validation"""
@@ -773,30 +3686,27 @@ async def real_upload(audio: UploadFile = File(...)):
                 detail=f"Unsupported format: {file_ext}. Supported: {', '.join(valid_formats)}"
             )
 
-        if audio.size > 104857600:  # 100MB
-            raise HTTPException(status_code=413, detail="File too large. Maximum: 100MB")
-
         # Save file
         session_dir = os.path.join("uploads", session_id)
         os.makedirs(session_dir, exist_ok=True)
 
         file_path = os.path.join(session_dir, f"original.{file_ext}")
 
-        audio_data = await audio.read()
-        with open(file_path, "wb") as f:
-            f.write(audio_data)
+        # Hash while writing - the content hash keys the result cache
+        file_size, content_hash = await save_upload(audio, file_path, UPLOAD_CONFIG["max_bytes"], UPLOAD_CONFIG["chunk_size"])
 
         # Store session
-        sessions[session_id] = {
+        sessions.create(session_id, {
             "session_id": session_id,
             "filename": audio.filename,
-            "file_size": audio.size,
+            "file_size": file_size,
             "format": file_ext,
             "file_path": file_path,
+            "content_hash": content_hash,
             "status": "uploaded",
             "created_at": datetime.utcnow(),
             "real_processing": True
-        }
+        })
 
         logger.info(f"✅ REAL upload completed: {session_id}")
 
@@ -804,52 +3714,195 @@ async def real_upload(audio: UploadFile = File(...)):
             "success": True,
             "session_id": session_id,
             "filename": audio.filename,
-            "file_size": audio.size,
+            "file_size": file_size,
             "format": file_ext,
             "real_processing": True,
             "message": "REAL upload successful - ready for processing"
         })
 
+    except HTTPException:
+        shutil.rmtree(os.path.join("uploads", session_id), ignore_errors=True)
+        raise
     except Exception as e:
+        shutil.rmtree(os.path.join("uploads", session_id), ignore_errors=True)
         logger.error(f"❌ REAL upload error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/process")
 async def real_processing(request: Request):
-    """REAL audio processing with accurate profanity detection and cleaning"""
+    """Queue REAL audio processing - returns a job id at once, poll /status/{session_id}"""
 
+    session_id = None
     try:
         data = await request.json()
         session_id = data.get("session_id")
 
-        if not session_id or session_id not in sessions:
+        session = sessions.get(session_id) if session_id else None
+        if session is None:
             raise HTTPException(status_code=404, detail="Session not found")
 
-        session = sessions[session_id]
+        asr_engine = data.get("asr_engine") or ASR_CONFIG["engine"]
+        if asr_engine not in ASR_BACKENDS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown asr_engine '{asr_engine}' - use one of {', '.join(ASR_BACKENDS)}"
+            )
 
-        logger.info(f"🎯 Starting REAL processing for session: {session_id}")
+        customer_tier = data.get("customer_tier") or MODEL_TIER_CONFIG["default_customer_tier"]
+        if customer_tier not in CUSTOMER_TIERS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown customer_tier '{customer_tier}' - use one of {', '.join(CUSTOMER_TIERS)}"
+            )
+        try:
+            deadline_seconds = float(data.get("deadline_seconds") or CUSTOMER_TIERS[customer_tier]["deadline_seconds"])
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="deadline_seconds must be a number")
+
+        streaming = data.get("streaming", STREAMING_CONFIG["enabled"])
+        if not isinstance(streaming, bool):
+            raise HTTPException(status_code=400, detail="streaming must be true or false")
+
+        max_memory_mb = data.get("max_memory_mb")
+        if max_memory_mb is not None and (
+            isinstance(max_memory_mb, bool)
+            or not isinstance(max_memory_mb, (int, float))
+            or not STREAMING_CONFIG["min_memory_mb"] <= max_memory_mb < float('inf')
+        ):
+            raise HTTPException(
+                status_code=400,
+                detail=f"max_memory_mb must be a number of at least {STREAMING_CONFIG['min_memory_mb']}"
+            )
 
-        session["status"] = "processing_real"
+        # Claim the session atomically - of two racing requests (or workers) only one queues it
+        if not sessions.transition(
+            session_id,
+            "queued",
+            {"job_id": None, "queued_at": datetime.utcnow()},
+            from_statuses=("uploaded", "real_complete", "error")
+        ):
+            # Already submitted - report the existing job instead of queueing it twice
+            session = sessions.get(session_id) or session
+            return JSONResponse({
+                "success": True,
+                "session_id": session_id,
+                "job_id": session.get("job_id"),
+                "status": session["status"],
+                "queue_position": job_queue.queue_position(session_id),
+                "status_url": f"/status/{session_id}",
+                "real_processing": True
+            })
+
+        # Streaming mode keeps memory bounded for long uploads
+        options = {
+            "streaming": streaming,
+            "max_memory_mb": max_memory_mb,
+            "asr_engine": asr_engine
+        }
+        _clear_session_outputs(session_id)
 
-        # Process with REAL precision
-        result = await real_processor.process_audio_real(
-            session["file_path"],
-            session_id
+        # Model size for this job from backlog, track length, customer tier and deadline
+        options["model_choice"] = await asyncio.to_thread(
+            _choose_model, session["file_path"], asr_engine, customer_tier, deadline_seconds, job_queue.backlog_seconds()
         )
+        if asr_engine == WhisperASRBackend.name:
+            options["model_size"] = options["model_choice"]["model"]
+
+        # Same track processed before - link the cached outputs instead of recomputing them
+        cache_key = None
+        if result_cache is not None and session.get("content_hash"):
+            cache_key = result_cache.key(
+                session["content_hash"],
+                options["streaming"],
+                asr_engine,
+                options["model_choice"]["model"]
+            )
+            cached = result_cache.lookup(cache_key)
+            result = None
+            if cached is not None:
+                # None when the entry's files are gone - it is dropped and the track processed normally
+                result = await asyncio.to_thread(result_cache.materialize, cache_key, cached, session_id)
+
+            if result is not None:
+                result['model_tier'] = options["model_choice"]  # This request's choice, not the cached job's
+                sessions.transition(
+                    session_id,
+                    "real_complete",
+                    {"cache_key": cache_key, "completed_at": datetime.utcnow()},
+                    result=result
+                )
+                _extend_session(session_id)
+                logger.info(f"🗄️ Cache hit for session {session_id}: {cache_key}")
+
+                return JSONResponse({
+                    "success": True,
+                    "session_id": session_id,
+                    "job_id": None,
+                    "status": "real_complete",
+                    "cached": True,
+                    "queue_position": 0,
+                    "status_url": f"/status/{session_id}",
+                    "real_processing": True,
+                    "message": "REAL processing completed from cache"
+                })
 
-        # Update session
-        session.update({
-            "status": "real_complete",
-            "processing_result": result,
-            "completed_at": datetime.utcnow()
-        })
+        sessions.update(session_id, {"cache_key": cache_key})
+        job_id = job_queue.submit(session_id, session["file_path"], options)
+        sessions.update(session_id, {"job_id": job_id})
 
-        logger.info(f"🎯 REAL processing completed: {session_id}")
+        logger.info(f"🎯 Queued REAL processing for session: {session_id} ({job_id})")
 
         return JSONResponse({
             "success": True,
             "session_id": session_id,
+            "job_id": job_id,
+            "status": "queued",
+            "queue_position": job_queue.queue_position(session_id),
+            "status_url": f"/status/{session_id}",
             "real_processing": True,
+            "message": "REAL processing queued"
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        if session_id:
+            sessions.transition(session_id, "error", {"error": str(e)}, from_statuses=("queued",))
+        logger.error(f"❌ REAL processing error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/status/{session_id}")
+async def real_status(session_id: str):
+    """Queue position, current stage and progress for a session's processing job"""
+
+    session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    job = job_queue.status(session_id)
+    if job["stage"] is None and session.get("status") in ("real_complete", "error"):
+        stage = "complete" if session["status"] == "real_complete" else "error"
+        job.update(stage=stage, percent=PIPELINE_STAGES[stage])  # Finished jobs leave the queue
+
+    # A worker has picked the job up once it leaves the queued stage
+    if session.get("status") == "queued" and job["stage"] not in (None, "queued"):
+        if sessions.transition(session_id, "processing_real", from_statuses=("queued",)):
+            session["status"] = "processing_real"
+
+    response = {
+        "session_id": session_id,
+        "job_id": job["job_id"] or session.get("job_id"),
+        "status": session.get("status"),
+        "stage": job["stage"],
+        "progress": job["percent"],
+        "queue_position": job["queue_position"],
+        "created_at": session["created_at"].isoformat(),
+        "real_processing": True
+    }
+
+    if session.get("status") == "real_complete":
+        result = sessions.get_result(session_id)
+        response.update({
             "processing": {
                 "status": "completed",
                 "detectedWords": result['profanity_detection']['total_detected'],
@@ -861,49 +3914,69 @@ async def real_processing(request: Request):
             },
             "profanity_detection": result['profanity_detection'],
             "cleaning_results": result['cleaning_results'],
+            "streaming": result.get('streaming', {'enabled': False}),
+            "cached": result.get('cache', {}).get('hit', False),
             "preview_available": True,
             "download_ready": False,  # Requires payment
             "message": "REAL processing completed with maximum accuracy"
         })
-
-    except Exception as e:
-        logger.error(f"❌ REAL processing error: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@app.get("/preview/{session_id}")
-async def real_preview(session_id: str):
-    """Stream real audio preview"""
-
-    if session_id not in sessions:
+    elif session.get("status") == "error":
+        response["error"] = session.get("error")
+
+    return JSONResponse(response)
+
+@app.api_route("/preview/{session_id}", methods=["GET", "HEAD"])
+async def real_preview(
+    session_id: str,
+    request: Request,
+    format: str = TRANSCODE_CONFIG["preview_format"],
+    bitrate: Optional[int] = None
+):
+    """Stream real audio preview - low-bitrate Opus by default, format=wav for the raw master"""
+
+    session = sessions.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    session = sessions[session_id]
-
     if session.get("status") != "real_complete":
         raise HTTPException(status_code=400, detail="Processing not completed")
+    _extend_session(session_id)
 
     preview_path = os.path.join('final', session_id, 'clean_preview.wav')
 
     if not os.path.exists(preview_path):
         raise HTTPException(status_code=404, detail="Preview not ready")
 
-    return FileResponse(
+    if not transcoder.available:
+        format = "wav"  # No ffmpeg - the master still previews, just larger
+    if format == TRANSCODE_CONFIG["preview_format"] and bitrate is None:
+        bitrate = TRANSCODE_CONFIG["preview_kbps"]
+    preview_path = await transcoder.variant(preview_path, format, bitrate)
+
+    return await artifact_response(
+        request,
         preview_path,
-        media_type="audio/wav",
+        media_type=TRANSCODE_FORMATS[format]["media_type"],
         headers={"Content-Disposition": "inline"}
     )
 
-@app.get("/download/{session_id}")
-async def real_download(session_id: str, audio_type: str = "final"):
-    """Download real processed audio"""
-
-    if session_id not in sessions:
+@app.api_route("/download/{session_id}", methods=["GET", "HEAD"])
+async def real_download(
+    session_id: str,
+    request: Request,
+    audio_type: str = "final",
+    format: str = "wav",
+    bitrate: Optional[int] = None
+):
+    """Download real processed audio as wav, flac, mp3 or opus (bitrate in kbps for lossy formats)"""
+
+    session = sessions.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    session = sessions[session_id]
-
     if session.get("status") != "real_complete":
         raise HTTPException(status_code=400, detail="Processing not completed")
+    _extend_session(session_id)
 
     # Map download types to files
     file_mapping = {
@@ -920,23 +3993,29 @@ async def real_download(session_id: str, audio_type: str = "final"):
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail=f"Audio file not found: {audio_type}")
 
-    return FileResponse(
+    download_name = f"fwea_real_{audio_type}_{session['filename']}"
+    if format != "wav":
+        file_path = await transcoder.variant(file_path, format, bitrate)
+        download_name = f"{os.path.splitext(download_name)[0]}.{TRANSCODE_FORMATS[format]['extension']}"
+
+    return await artifact_response(
+        request,
         file_path,
         media_type="application/octet-stream",
-        filename=f"fwea_real_{audio_type}_{session['filename']}"
+        filename=download_name
     )
 
 @app.get("/download-lyrics/{session_id}")
 async def download_lyrics(session_id: str):
     """Download extracted lyrics (Premium feature)"""
 
-    if session_id not in sessions:
+    session = sessions.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    session = sessions[session_id]
-
     if session.get("status") != "real_complete":
         raise HTTPException(status_code=400, detail="Processing not completed")
+    _extend_session(session_id)
 
     lyrics_path = os.path.join('lyrics', session_id, 'extracted_lyrics.txt')
 
@@ -6,17 +6,29 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, FileResponse
 import os
 import io
+import base64
 import json
 import re
 import tempfile
 import subprocess
 import uuid
-import requests
+import mmap
+import shutil
+import wave
+import heapq
+import time
+import random
+import httpx
 import asyncio
-from typing import Optional, Dict, List
+import numpy as np
+from typing import Optional, Dict, List, Tuple
+from contextlib import contextmanager
+from collections import Counter
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 import stripe
+from session_store import open_session_store
+from upload_limits import UploadLimitMiddleware, save_upload
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -49,14 +61,47 @@ stripe.api_key = STRIPE_SECRET_KEY
 
 # Whisper model configuration
 WHISPER_MODEL = "@cf/openai/whisper"
+WHISPER_API_BASE = os.getenv("WHISPER_API_BASE", "https://api.cloudflare.com/client/v4")  # Point at a stub for local testing
+
+# Whisper API client - one keep-alive pool, bounded concurrency per host, retries with backoff
+WHISPER_MAX_CONCURRENCY = int(os.getenv("WHISPER_MAX_CONCURRENCY", "8"))  # In-flight calls per host
+WHISPER_MAX_RETRIES = int(os.getenv("WHISPER_MAX_RETRIES", "4"))
+WHISPER_BACKOFF_BASE = 0.5  # Seconds; doubled each attempt, full jitter
+WHISPER_BACKOFF_MAX = 8.0
+WHISPER_ATTEMPT_TIMEOUT = 60.0  # Per attempt
+WHISPER_DEADLINE = float(os.getenv("WHISPER_DEADLINE_SECONDS", "120"))  # Per call, across all retries
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+WHISPER_PAYLOAD = os.getenv("WHISPER_PAYLOAD", "binary")  # "binary" raw body, or "base64" JSON for models that need it
+
+# Long audio is decoded to PCM and cut into overlapping time windows, preferring quiet spots
+WHISPER_SINGLE_CALL_BYTES = 25 * 1024 * 1024  # Files up to this size go to Whisper as uploaded
+CHUNK_SAMPLE_RATE = 16000  # Whisper's native rate
+CHUNK_SECONDS = float(os.getenv("CHUNK_SECONDS", "300"))
+CHUNK_OVERLAP_SECONDS = 2.0  # Heard by both neighbours, de-duplicated when stitching
+SILENCE_SEARCH_SECONDS = 10.0  # How far before a nominal cut to look for the quietest frame
+SILENCE_FRAME_SECONDS = 0.05
+TRANSCRIBE_CONCURRENCY = int(os.getenv("TRANSCRIBE_CONCURRENCY", "4"))  # Chunks in flight per file
+STITCH_MAX_OVERLAP_WORDS = 10  # About as much as fits in the overlap, even for fast rap
 
 # Storage directories
 os.makedirs("uploads", exist_ok=True)
 os.makedirs("processed", exist_ok=True)
 os.makedirs("temp", exist_ok=True)
 
-# Session storage (in production, use Redis or database)
-active_sessions: Dict[str, Dict] = {}
+# Uploads are copied to disk in chunks and rejected as soon as they cross the size limit
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "100")) * 1024 * 1024
+app.add_middleware(UploadLimitMiddleware, paths=["/preview"], max_bytes=MAX_UPLOAD_BYTES)
+
+# Session storage - metadata persists in SQLite (or Redis) and is shared by every worker;
+# raw upload bytes stay on disk under uploads/ and are only memory-mapped while in use
+SESSION_TTL_HOURS = float(os.getenv("SESSION_TTL_HOURS", "24"))
+active_sessions = open_session_store(
+    os.getenv("SESSION_STORE", "sqlite"),
+    os.getenv("SESSION_DB", "sessions.db"),
+    redis_url=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+    prefix="omni",
+    ttl_seconds=SESSION_TTL_HOURS * 3600
+)
 
 # Enhanced multilingual profanity patterns
 PROFANITY_PATTERNS = {
@@ -86,96 +131,340 @@ PROFANITY_PATTERNS = {
     ]
 }
 
-def detect_language(text: str) -> str:
-    """Enhanced language detection"""
-    patterns = {
-        "english": r"\b(the|and|or|but|in|on|at|to|for|of|with|by|is|are|was|were)\b",
-        "spanish": r"\b(el|la|los|las|de|en|un|una|por|para|con|sin|es|son|fue|fueron)\b",
-        "french": r"\b(le|la|les|de|du|des|un|une|dans|pour|avec|sans|est|sont|était)\b",
-        "portuguese": r"\b(o|a|os|as|de|em|um|uma|para|com|sem|por|é|são|foi|eram)\b",
-        "german": r"\b(der|die|das|den|dem|des|ein|eine|und|oder|in|mit|ist|sind|war)\b",
-        "italian": r"\b(il|la|lo|gli|le|di|da|in|con|su|per|tra|è|sono|era|erano)\b"
-    }
+# Stopwords that mark each language, counted over one tokenization pass
+LANGUAGE_STOPWORDS = {
+    "english": ["the", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by", "is", "are", "was", "were"],
+    "spanish": ["el", "la", "los", "las", "de", "en", "un", "una", "por", "para", "con", "sin", "es", "son", "fue", "fueron"],
+    "french": ["le", "la", "les", "de", "du", "des", "un", "une", "dans", "pour", "avec", "sans", "est", "sont", "était"],
+    "portuguese": ["o", "a", "os", "as", "de", "em", "um", "uma", "para", "com", "sem", "por", "é", "são", "foi", "eram"],
+    "german": ["der", "die", "das", "den", "dem", "des", "ein", "eine", "und", "oder", "in", "mit", "ist", "sind", "war"],
+    "italian": ["il", "la", "lo", "gli", "le", "di", "da", "in", "con", "su", "per", "tra", "è", "sono", "era", "erano"]
+}
+
+class LanguageDetector:
+    """Stopword counting language ID, built once at import
+    
+    The transcript is tokenized into whole \\w runs in one pass and counted; each language's
+    score is the sum of its stopword counts. Ties go to the earlier language, English first.
+    """
     
-    max_matches = 0
-    detected_lang = "english"
+    TOKEN = re.compile(r"\w+")
     
-    for lang, pattern in patterns.items():
-        matches = len(re.findall(pattern, text.lower()))
-        if matches > max_matches:
-            max_matches = matches
-            detected_lang = lang
+    def __init__(self, stopwords: Dict[str, List[str]]):
+        self.stopwords = {lang: frozenset(words) for lang, words in stopwords.items()}
     
-    return detected_lang
+    def scores(self, text: str) -> Dict[str, int]:
+        counts = Counter(self.TOKEN.findall(text.lower()))
+        return {lang: sum(counts[word] for word in words if word in counts) for lang, words in self.stopwords.items()}
+    
+    def detect(self, text: str, default: str = "english") -> str:
+        detected_lang, max_matches = default, 0
+        for lang, matches in self.scores(text).items():
+            if matches > max_matches:
+                detected_lang, max_matches = lang, matches
+        return detected_lang
+
+def _profanity_phrases(patterns: List[str]) -> List[str]:
+    """Literal words and phrases from \\b(a|b|c\\s+d)\\b patterns, lowercased"""
+    phrases = []
+    for pattern in patterns:
+        inner = pattern[len(r"\b("):-len(r")\b")]
+        phrases.extend(alternative.replace(r"\s+", " ").lower() for alternative in inner.split("|"))
+    return phrases
+
+def compile_profanity_automaton(patterns: List[str]) -> "re.Pattern":
+    """One regex per language: every word and phrase merged into a prefix trie
+    
+    At each word start the engine follows one branch per character instead of trying every
+    alternative, and a word is reported once however many patterns list it.
+    """
+    trie: Dict = {}
+    for phrase in _profanity_phrases(patterns):
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}  # Word ends here
+    
+    def build(node: Dict) -> str:
+        branches = [(r"\s+" if char == " " else re.escape(char)) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if "" in node else body
+    
+    # The first-letter lookahead lets most positions fail before the \b test
+    first_letters = re.escape("".join(sorted(trie)))
+    return re.compile(rf"(?=[{first_letters}])\b{build(trie)}\b", re.IGNORECASE)
+
+language_detector = LanguageDetector(LANGUAGE_STOPWORDS)
+PROFANITY_AUTOMATA = {lang: compile_profanity_automaton(patterns) for lang, patterns in PROFANITY_PATTERNS.items()}
+
+def detect_language(text: str) -> str:
+    """Enhanced language detection"""
+    return language_detector.detect(text)
 
 def detect_profanity(text: str, language: str = "english") -> List[Dict]:
     """Enhanced profanity detection with timestamps"""
-    patterns = PROFANITY_PATTERNS.get(language, PROFANITY_PATTERNS["english"])
-    found_words = []
+    automaton = PROFANITY_AUTOMATA.get(language, PROFANITY_AUTOMATA["english"])
     
-    for pattern in patterns:
-        matches = re.finditer(pattern, text, re.IGNORECASE)
-        for match in matches:
-            found_words.append({
-                "word": match.group(),
-                "start_pos": match.start(),
-                "end_pos": match.end(),
-                "confidence": 0.95
-            })
-    
-    return found_words
-
-async def call_cloudflare_whisper(audio_data: bytes) -> Dict:
-    """Call Cloudflare Workers AI Whisper model"""
-    url = f"https://api.cloudflare.com/client/v4/accounts/{CF_ACCOUNT_ID}/ai/run/{WHISPER_MODEL}"
+    return [
+        {
+            "word": match.group(),
+            "start_pos": match.start(),
+            "end_pos": match.end(),
+            "confidence": 0.95
+        }
+        for match in automaton.finditer(text)
+    ]
+
+class AudioBody:
+    """Raw audio request body, sent in slices of the caller's buffer
     
-    headers = {
-        "Authorization": f"Bearer {CF_API_TOKEN}",
-        "Content-Type": "application/json"
-    }
+    Nothing is copied up front - each slice becomes bytes only as it is written to the socket -
+    and every iteration starts over, so a retry can resend the same body.
+    """
     
-    # Convert audio to required format
-    audio_array = list(audio_data)
+    def __init__(self, audio_data, chunk_size: int = 256 * 1024):
+        self.audio_data = audio_data
+        self.chunk_size = chunk_size
     
-    payload = {
-        "audio": audio_array
-    }
+    def __len__(self) -> int:
+        return len(self.audio_data)
+    
+    async def __aiter__(self):
+        with memoryview(self.audio_data) as view:
+            for start in range(0, len(view), self.chunk_size):
+                yield bytes(view[start:start + self.chunk_size])
+
+def encode_whisper_payload(audio_data, payload_format: str = WHISPER_PAYLOAD) -> Tuple[Dict[str, str], object]:
+    """Headers and request content for the Whisper call - never a per-byte list"""
+    if payload_format == "base64":
+        body = b'{"audio":"' + base64.b64encode(audio_data) + b'"}'
+        return {"Content-Type": "application/json"}, body
+    
+    body = AudioBody(audio_data)
+    return {"Content-Type": "application/octet-stream", "Content-Length": str(len(body))}, body
+
+class WhisperClient:
+    """Async HTTP client for the Whisper API
+    
+    Connections are pooled and kept alive across calls, a semaphore per host caps in-flight
+    requests, and 429/5xx responses or transport errors are retried with jittered exponential
+    backoff until the call's deadline runs out.
+    """
+    
+    def __init__(self, max_concurrency: int = WHISPER_MAX_CONCURRENCY, max_retries: int = WHISPER_MAX_RETRIES):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+    
+    def _session(self) -> httpx.AsyncClient:
+        # Pools and semaphores belong to one event loop - rebuild them if the loop changed
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_concurrency * 2,
+                                    max_keepalive_connections=self.max_concurrency),
+                timeout=WHISPER_ATTEMPT_TIMEOUT
+            )
+            self._loop = loop
+            self._host_limits = {}
+        return self._client
+    
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return random.uniform(0, min(WHISPER_BACKOFF_MAX, WHISPER_BACKOFF_BASE * 2 ** attempt))
+    
+    async def post(self, url: str, deadline: float, **kwargs) -> httpx.Response:
+        """POST with retries; deadline is a time.monotonic() timestamp covering every attempt"""
+        client = self._session()
+        host = httpx.URL(url).host
+        limit = self._host_limits.setdefault(host, asyncio.Semaphore(self.max_concurrency))
+        
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            
+            response, error = None, None
+            try:
+                await asyncio.wait_for(limit.acquire(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            try:
+                self.requests += 1
+                timeout = min(WHISPER_ATTEMPT_TIMEOUT, deadline - time.monotonic())
+                response = await client.post(url, timeout=max(timeout, 0.001), **kwargs)
+            except httpx.TransportError as e:
+                error = e
+            finally:
+                limit.release()
+            
+            if response is not None and response.status_code not in RETRYABLE_STATUS:
+                return response
+            if attempt == self.max_retries:
+                break
+            
+            delay = self._backoff(attempt, response)
+            if time.monotonic() + delay >= deadline:
+                break
+            self.retries += 1
+            logger.warning(f"Whisper API attempt {attempt + 1} failed "
+                           f"({response.status_code if response is not None else error!r}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+        
+        self.failures += 1
+        if response is not None:
+            return response  # Last retryable response; the caller's raise_for_status reports it
+        if error is not None and not isinstance(error, httpx.TimeoutException):
+            raise error
+        raise asyncio.TimeoutError(f"Whisper API deadline exceeded for {url}") from error
+    
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def stats(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "max_concurrency": self.max_concurrency
+        }
+
+whisper_client = WhisperClient()
+
+async def call_cloudflare_whisper(audio_data: bytes, timeout: float = WHISPER_DEADLINE) -> Dict:
+    """Call Cloudflare Workers AI Whisper model"""
+    url = f"{WHISPER_API_BASE}/accounts/{CF_ACCOUNT_ID}/ai/run/{WHISPER_MODEL}"
+    
+    # Send the audio as a binary body (or base64 JSON) rather than a JSON array of ints
+    headers, content = encode_whisper_payload(audio_data)
+    headers["Authorization"] = f"Bearer {CF_API_TOKEN}"
     
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=60)
+        response = await whisper_client.post(url, time.monotonic() + timeout, content=content, headers=headers)
         response.raise_for_status()
         return response.json()
+    except asyncio.TimeoutError:
+        logger.error(f"Cloudflare Whisper API deadline of {timeout:g}s exceeded")
+        raise HTTPException(status_code=504, detail="Transcription timed out")
     except Exception as e:
         logger.error(f"Cloudflare Whisper API error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
 
-def chunk_audio(audio_data: bytes, chunk_size: int = 1024*1024) -> List[bytes]:
-    """Split large audio files into chunks"""
-    chunks = []
-    for i in range(0, len(audio_data), chunk_size):
-        chunks.append(audio_data[i:i + chunk_size])
-    return chunks
+async def decode_to_pcm(path: str, pcm_path: str, sr: int = CHUNK_SAMPLE_RATE):
+    """Decode any ffmpeg-readable file to raw mono 16-bit PCM on disk"""
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-nostdin", "-v", "error", "-y", "-i", path,
+        "-f", "s16le", "-ac", "1", "-ar", str(sr), pcm_path,
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+    )
+    _, stderr = await process.communicate()
+    if process.returncode != 0:
+        raise HTTPException(status_code=400, detail=f"Could not decode audio: {stderr.decode(errors='replace')[-300:]}")
 
-async def process_large_audio(audio_data: bytes) -> Dict:
-    """Process large audio files with chunking"""
-    if len(audio_data) <= 25 * 1024 * 1024:  # 25MB limit for single call
-        return await call_cloudflare_whisper(audio_data)
+def plan_chunks(pcm: np.ndarray, sr: int = CHUNK_SAMPLE_RATE) -> List[Tuple[int, int]]:
+    """(start, end) sample ranges of about CHUNK_SECONDS, cut at the quietest frame before each
+    nominal boundary and extended by the overlap"""
+    total = len(pcm)
+    step = max(int(CHUNK_SECONDS * sr), 1)
+    overlap = int(CHUNK_OVERLAP_SECONDS * sr)
+    frame = max(int(SILENCE_FRAME_SECONDS * sr), 1)
     
-    # Chunk processing for large files
-    chunks = chunk_audio(audio_data, chunk_size=20*1024*1024)  # 20MB chunks
-    transcriptions = []
+    cuts = [0]
+    while total - cuts[-1] > step + overlap:
+        nominal = cuts[-1] + step
+        low = max(cuts[-1] + step // 2, nominal - int(SILENCE_SEARCH_SECONDS * sr))
+        frames = (nominal - low) // frame
+        if frames <= 0:
+            # Search span shorter than one frame (a very small CHUNK_SECONDS) - cut at the nominal point
+            cuts.append(nominal)
+            continue
+        window = pcm[low:low + frames * frame].astype(np.float32).reshape(frames, frame)
+        quietest = int(np.argmin(np.mean(window * window, axis=1)))
+        cuts.append(low + quietest * frame + frame // 2)
+    cuts.append(total)
     
-    for i, chunk in enumerate(chunks):
-        logger.info(f"Processing chunk {i+1}/{len(chunks)}")
-        try:
-            result = await call_cloudflare_whisper(chunk)
-            transcriptions.append(result.get("result", {}).get("text", ""))
-        except Exception as e:
-            logger.warning(f"Chunk {i+1} failed: {str(e)}")
-            transcriptions.append("")
+    return [(start, min(end + overlap, total)) for start, end in zip(cuts, cuts[1:])]
+
+def wav_bytes(samples: np.ndarray, sr: int = CHUNK_SAMPLE_RATE) -> bytes:
+    """16-bit mono WAV file for one chunk"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sr)
+        wav.writeframes(np.ascontiguousarray(samples, dtype="<i2").tobytes())
+    return buffer.getvalue()
+
+def _stitch_key(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+def stitch_transcripts(texts: List[str], max_overlap_words: int = STITCH_MAX_OVERLAP_WORDS) -> str:
+    """Join chunk transcripts in order, dropping the words both neighbours heard in their overlap
+    
+    The longest run (two words or more) that ends the previous transcript and starts the next
+    one is kept only once.
+    """
+    words: List[str] = []
+    for text in texts:
+        incoming = text.split()
+        if words and incoming:
+            tail = [_stitch_key(w) for w in words[-max_overlap_words:]]
+            head = [_stitch_key(w) for w in incoming[:max_overlap_words]]
+            for size in range(min(len(tail), len(head)), 1, -1):
+                if tail[-size:] == head[:size]:
+                    incoming = incoming[size:]
+                    break
+        words.extend(incoming)
+    return " ".join(words)
+
+async def process_large_audio(file_path: str) -> Dict:
+    """Transcribe an upload - long files in overlapping time windows, several at once"""
+    if os.path.getsize(file_path) <= WHISPER_SINGLE_CALL_BYTES:
+        with map_upload(file_path) as audio_data:
+            return await call_cloudflare_whisper(audio_data)
+    
+    # Step 1: Decode to PCM on disk and memory-map it (an hour is ~115MB at 16 kHz)
+    pcm_path = os.path.join("temp", f"{uuid.uuid4()}.pcm")
+    try:
+        await decode_to_pcm(file_path, pcm_path)
+        pcm = np.memmap(pcm_path, dtype="<i2", mode="r") if os.path.getsize(pcm_path) else np.zeros(0, dtype="<i2")
+        
+        # Step 2: Cut on time windows at quiet spots - frames are never split
+        chunks = plan_chunks(pcm)
+        limit = asyncio.Semaphore(TRANSCRIBE_CONCURRENCY)
+        
+        # Step 3: Transcribe chunks concurrently, results kept in chunk order
+        async def transcribe(i: int, start: int, end: int) -> str:
+            async with limit:
+                logger.info(f"Processing chunk {i+1}/{len(chunks)} "
+                            f"({start / CHUNK_SAMPLE_RATE:.0f}s-{end / CHUNK_SAMPLE_RATE:.0f}s)")
+                try:
+                    body = await asyncio.to_thread(wav_bytes, pcm[start:end])
+                    result = await call_cloudflare_whisper(body)
+                    return result.get("result", {}).get("text", "")
+                except Exception as e:
+                    logger.warning(f"Chunk {i+1} failed: {str(e)}")
+                    return ""
+        
+        transcriptions = await asyncio.gather(*(transcribe(i, start, end) for i, (start, end) in enumerate(chunks)))
+    finally:
+        if os.path.exists(pcm_path):
+            os.remove(pcm_path)
     
-    # Combine transcriptions
-    combined_text = " ".join(filter(None, transcriptions))
+    # Step 4: Stitch in order, removing words repeated across the overlaps
+    combined_text = stitch_transcripts(transcriptions)
     
     return {
         "result": {
@@ -185,6 +474,25 @@ async def process_large_audio(audio_data: bytes) -> Dict:
         "success": True
     }
 
+@contextmanager
+def map_upload(path: str):
+    """Memory-map a stored upload read-only - pages come from the page cache, not the heap"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield memoryview(b"")
+            return
+        
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        try:
+            yield view
+        finally:
+            view.release()
+            try:
+                mapped.close()
+            except BufferError:
+                pass  # A slice is still referenced; the map closes when it is collected
+
 @app.post("/preview")
 async def preview_audio(audio: UploadFile = File(...)):
     """Process audio file and generate preview with explicit content detection"""
@@ -200,22 +508,25 @@ async def preview_audio(audio: UploadFile = File(...)):
         if file_ext not in valid_formats:
             raise HTTPException(status_code=400, detail=f"Unsupported format. Supported: {', '.join(valid_formats)}")
         
-        # Read audio data
-        audio_data = await audio.read()
+        # Stream the upload to disk - the session only keeps its path
+        file_path = os.path.join("uploads", f"{session_id}.{file_ext}")
+        file_size, content_hash = await save_upload(audio, file_path, MAX_UPLOAD_BYTES)
         
         # Store session info
-        active_sessions[session_id] = {
+        active_sessions.create(session_id, {
             "filename": audio.filename,
-            "file_size": len(audio_data),
+            "file_size": file_size,
+            "file_path": file_path,
+            "content_hash": content_hash,
             "format": file_ext,
             "status": "processing",
-            "created_at": datetime.utcnow(),
-            "audio_data": audio_data
-        }
+            "created_at": datetime.utcnow()
+        })
+        session_expiry.schedule(session_id, active_sessions.expiry(session_id))
         
         # Process with Whisper AI
         logger.info(f"Starting transcription for session {session_id}")
-        whisper_result = await process_large_audio(audio_data)
+        whisper_result = await process_large_audio(file_path)
         
         if not whisper_result.get("success", True):
             raise HTTPException(status_code=500, detail="Transcription failed")
@@ -230,12 +541,11 @@ async def preview_audio(audio: UploadFile = File(...)):
         profanity_found = detect_profanity(transcript, detected_language)
         
         # Update session
-        active_sessions[session_id].update({
+        active_sessions.transition(session_id, "ready_for_preview", {
             "transcript": transcript,
             "language": detected_language,
             "profanity": profanity_found,
-            "word_count": word_count,
-            "status": "ready_for_preview"
+            "word_count": word_count
         })
         
         return JSONResponse({
@@ -255,11 +565,13 @@ async def preview_audio(audio: UploadFile = File(...)):
             "preview_ready": True,
             "file_info": {
                 "name": audio.filename,
-                "size": len(audio_data),
+                "size": file_size,
                 "format": file_ext
             }
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Preview processing error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -269,17 +581,17 @@ async def clean_audio(session_data: Dict):
     """Generate clean version of audio file"""
     
     session_id = session_data.get("session_id")
-    if not session_id or session_id not in active_sessions:
+    session = active_sessions.get(session_id) if session_id else None
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    
-    session = active_sessions[session_id]
+    session_expiry.touch(session_id)
     
     try:
         # Simulate audio cleaning process
         # In production, implement actual audio processing with FFmpeg
         logger.info(f"Cleaning audio for session {session_id}")
         
-        session["status"] = "cleaning"
+        active_sessions.transition(session_id, "cleaning")
         
         # Simulate processing time
         await asyncio.sleep(2)
@@ -288,12 +600,10 @@ async def clean_audio(session_data: Dict):
         # In production, process the actual audio with muted sections
         cleaned_file_path = f"processed/{session_id}_clean.{session['format']}"
         
-        # For demo, copy original file
-        with open(cleaned_file_path, "wb") as f:
-            f.write(session["audio_data"])
+        # For demo, copy original file - streamed file to file, never loaded into memory
+        await asyncio.to_thread(shutil.copyfile, session["file_path"], cleaned_file_path)
         
-        session.update({
-            "status": "completed",
+        active_sessions.transition(session_id, "completed", {
             "cleaned_file": cleaned_file_path,
             "processing_time": 45  # seconds
         })
@@ -309,17 +619,17 @@ async def clean_audio(session_data: Dict):
         
     except Exception as e:
         logger.error(f"Audio cleaning error: {str(e)}")
-        session["status"] = "error"
+        active_sessions.transition(session_id, "error")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/download/{session_id}")
 async def download_clean_audio(session_id: str):
     """Download cleaned audio file"""
     
-    if session_id not in active_sessions:
+    session = active_sessions.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    
-    session = active_sessions[session_id]
+    session_expiry.touch(session_id)
     
     if session["status"] != "completed":
         raise HTTPException(status_code=400, detail="Audio not ready for download")
@@ -342,10 +652,10 @@ async def download_clean_audio(session_id: str):
 async def get_session_status(session_id: str):
     """Get processing status for session"""
     
-    if session_id not in active_sessions:
+    session = active_sessions.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    
-    session = active_sessions[session_id]
+    session_expiry.touch(session_id)
     
     return JSONResponse({
         "session_id": session_id,
@@ -367,35 +677,122 @@ async def get_session_status(session_id: str):
 async def cleanup_session(session_id: str):
     """Clean up session data and temporary files"""
     
-    if session_id not in active_sessions:
+    # Remove from active sessions
+    session = active_sessions.delete(session_id)
+    if session is None:
         return JSONResponse({"message": "Session not found"})
     
-    session = active_sessions[session_id]
+    release_session(session_id, session)
     
-    # Clean up files
-    cleaned_file = session.get("cleaned_file")
-    if cleaned_file and os.path.exists(cleaned_file):
-        os.remove(cleaned_file)
+    return JSONResponse({"message": "Session cleaned up successfully"})
+
+def release_session(session_id: str, session: Dict):
+    """Delete a removed session's files"""
+    for path in (session.get("cleaned_file"), session.get("file_path")):
+        if path and os.path.exists(path):
+            os.remove(path)
+
+class ExpiryScheduler:
+    """Min-heap of (expiry, session_id) - each session is freed the moment its TTL runs out
     
-    # Remove from active sessions
-    del active_sessions[session_id]
+    Scheduling and expiring are O(log n). A TTL extension pushes a new entry and the old one is
+    skipped when popped. The store stays authoritative: a due session another worker touched is
+    rescheduled to its new expiry instead of being removed.
+    """
     
-    return JSONResponse({"message": "Session cleaned up successfully"})
+    def __init__(self, store, on_expire):
+        self.store = store
+        self.on_expire = on_expire
+        self.expired = 0
+        self._heap: List[Tuple[float, str]] = []
+        self._expiry: Dict[str, float] = {}  # Current expiry per session; older heap entries are stale
+        self._wakeup = asyncio.Event()
+    
+    def schedule(self, session_id: str, expires_at: float):
+        if expires_at == float("inf"):
+            self._expiry.pop(session_id, None)
+            return
+        
+        self._expiry[session_id] = expires_at
+        heapq.heappush(self._heap, (expires_at, session_id))
+        if self._heap[0] == (expires_at, session_id):
+            self._wakeup.set()  # New earliest deadline - re-arm the timer
+        
+        # Drop stale entries once they outnumber live ones
+        if len(self._heap) > 2 * len(self._expiry) + 64:
+            self._heap = [(exp, sid) for sid, exp in self._expiry.items()]
+            heapq.heapify(self._heap)
+    
+    def touch(self, session_id: str):
+        """Extend a session's TTL on access"""
+        if self.store.touch(session_id):
+            self.schedule(session_id, self.store.expiry(session_id) or float("inf"))
+    
+    def seed(self):
+        """Schedule every session already in the store (after a restart)"""
+        for session_id, expires_at in self.store.expiries():
+            self.schedule(session_id, expires_at)
+    
+    def expire_due(self, now: Optional[float] = None) -> int:
+        now = now or time.time()
+        count = 0
+        
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, session_id = heapq.heappop(self._heap)
+            if self._expiry.get(session_id) != expires_at:
+                continue  # Superseded by a later TTL extension
+            
+            current = self.store.expiry(session_id)
+            if current is None:
+                del self._expiry[session_id]  # Already deleted or purged
+                continue
+            if current > now:
+                self.schedule(session_id, current)  # Touched by another worker
+                continue
+            
+            del self._expiry[session_id]
+            session = self.store.delete(session_id)
+            self.on_expire(session_id, session or {})
+            self.expired += 1
+            count += 1
+            logger.info(f"Expired session: {session_id}")
+        
+        return count
+    
+    async def run(self):
+        while True:
+            self._wakeup.clear()
+            if self._heap and self._heap[0][0] <= time.time():
+                try:
+                    self.expire_due()
+                except Exception as e:
+                    logger.error(f"Session expiry error: {str(e)}")
+                    await asyncio.sleep(5)
+                continue
+            
+            timeout = self._heap[0][0] - time.time() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+    
+    def stats(self) -> Dict:
+        return {
+            "scheduled": len(self._expiry),
+            "next_expiry_in": round(self._heap[0][0] - time.time(), 1) if self._heap else None,
+            "expired": self.expired
+        }
+
+session_expiry = ExpiryScheduler(active_sessions, release_session)
 
-# Background task to clean up old sessions
+# Background sweep - catches sessions whose scheduling worker went away
 async def cleanup_old_sessions():
-    """Clean up sessions older than 24 hours"""
+    """Purge expired sessions no scheduler removed"""
     while True:
         try:
-            current_time = datetime.utcnow()
-            expired_sessions = []
-            
-            for session_id, session in active_sessions.items():
-                if current_time - session["created_at"] > timedelta(hours=24):
-                    expired_sessions.append(session_id)
-            
-            for session_id in expired_sessions:
-                await cleanup_session(session_id)
+            # The store indexes expiry times - no scan over every session
+            for session_id, session in active_sessions.purge_expired():
+                release_session(session_id, session)
                 logger.info(f"Cleaned up expired session: {session_id}")
             
             # Sleep for 1 hour
@@ -407,16 +804,25 @@ async def cleanup_old_sessions():
 
 @app.on_event("startup")
 async def startup_event():
-    """Start background cleanup task"""
+    """Start session expiry and the background cleanup sweep"""
+    session_expiry.seed()
+    asyncio.create_task(session_expiry.run())
     asyncio.create_task(cleanup_old_sessions())
     logger.info("FWEA-I Backend started successfully")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled Whisper API connections"""
+    await whisper_client.aclose()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "active_sessions": len(active_sessions),
+        "active_sessions": active_sessions.count(),
+        "session_expiry": session_expiry.stats(),
+        "whisper_client": whisper_client.stats(),
         "timestamp": datetime.utcnow().isoformat()
     }
 
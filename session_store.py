@@ -0,0 +1,560 @@
+# FWEA-I Session Store - persistent sessions shared by every uvicorn worker
+# SQLite (WAL) by default, Redis for multi-host deployments, memory for single-process dev
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Tuple, Optional, Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if hasattr(value, "item"):  # numpy scalars
+        return value.item()
+    return str(value)
+
+
+def _object_hook(obj: Dict) -> Any:
+    if len(obj) == 1 and "$datetime" in obj:
+        return datetime.fromisoformat(obj["$datetime"])
+    return obj
+
+
+def encode(value: Any) -> str:
+    """JSON with datetimes preserved - session dicts carry created_at/completed_at"""
+    return json.dumps(value, default=_json_default, separators=(",", ":"))
+
+
+def decode(text: Optional[str]) -> Any:
+    return None if text is None else json.loads(text, object_hook=_object_hook)
+
+
+class SessionStore(ABC):
+    """Session records: metadata dict, indexed status and timestamps, optional TTL and result payload
+
+    The metadata dict is what callers read on every request. The result payload (a finished
+    job's full output) is stored beside it and only loaded by get_result(), so hot lookups stay
+    small. Expired sessions are invisible to reads and removed by purge_expired().
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = ttl_seconds or None
+
+    def _expires_at(self, now: float, ttl_seconds: Optional[float] = None) -> Optional[float]:
+        ttl = ttl_seconds or self.ttl_seconds
+        return now + ttl if ttl else None
+
+    @abstractmethod
+    def create(self, session_id: str, session: Dict[str, Any], ttl_seconds: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def update(self, session_id: str, fields: Dict[str, Any]) -> bool:
+        """Merge fields into a live session; False if it does not exist"""
+        return self.transition(session_id, None, fields)
+
+    @abstractmethod
+    def transition(
+        self,
+        session_id: str,
+        to_status: Optional[str],
+        fields: Optional[Dict[str, Any]] = None,
+        from_statuses: Optional[Iterable[str]] = None,
+        result: Any = None
+    ) -> bool:
+        """Atomically move a session to to_status (None keeps it) and merge fields
+
+        Only applies when the current status is in from_statuses (any status when None), so
+        two requests racing to claim a session cannot both succeed. A non-None result replaces
+        the stored result payload in the same step.
+        """
+
+    @abstractmethod
+    def get_result(self, session_id: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def touch(self, session_id: str, ttl_seconds: Optional[float] = None) -> bool:
+        """Restart a live session's TTL from now"""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Remove a session and return its metadata (None if it did not exist)"""
+
+    @abstractmethod
+    def expiry(self, session_id: str) -> Optional[float]:
+        """Expiry timestamp (inf without a TTL, possibly past if not yet purged), None if absent"""
+
+    @abstractmethod
+    def expiries(self) -> List[Tuple[str, float]]:
+        """(session_id, expiry) for every session with a TTL - seeds an expiry scheduler"""
+
+    @abstractmethod
+    def count(self, status: Optional[str] = None) -> int:
+        ...
+
+    @abstractmethod
+    def purge_expired(self, now: Optional[float] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Delete expired sessions, returning (session_id, metadata) for their file cleanup"""
+
+    def __len__(self) -> int:
+        return self.count()
+
+
+class MemorySessionStore(SessionStore):
+    """Process-local store - the old plain dict behaviour, for single-worker development"""
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        super().__init__(ttl_seconds)
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, session_id: str, now: float) -> Optional[Dict[str, Any]]:
+        record = self._records.get(session_id)
+        if record is None or (record["expires_at"] is not None and record["expires_at"] <= now):
+            return None
+        return record
+
+    def create(self, session_id: str, session: Dict[str, Any], ttl_seconds: Optional[float] = None):
+        now = time.time()
+        with self._lock:
+            self._records[session_id] = {
+                "data": dict(session),
+                "result": None,
+                "updated_at": now,
+                "expires_at": self._expires_at(now, ttl_seconds)
+            }
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        record = self._live(session_id, time.time())
+        return dict(record["data"]) if record else None
+
+    def transition(self, session_id, to_status, fields=None, from_statuses=None, result=None) -> bool:
+        with self._lock:
+            record = self._live(session_id, time.time())
+            if record is None:
+                return False
+            if from_statuses is not None and record["data"].get("status") not in from_statuses:
+                return False
+
+            record["data"].update(fields or {})
+            if to_status is not None:
+                record["data"]["status"] = to_status
+            if result is not None:
+                record["result"] = result
+            record["updated_at"] = time.time()
+            return True
+
+    def get_result(self, session_id: str) -> Optional[Any]:
+        record = self._live(session_id, time.time())
+        return record["result"] if record else None
+
+    def touch(self, session_id: str, ttl_seconds: Optional[float] = None) -> bool:
+        now = time.time()
+        with self._lock:
+            record = self._live(session_id, now)
+            if record is None:
+                return False
+            record["expires_at"] = self._expires_at(now, ttl_seconds)
+            return True
+
+    def delete(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._records.pop(session_id, None)
+        return record["data"] if record else None
+
+    def expiry(self, session_id: str) -> Optional[float]:
+        record = self._records.get(session_id)
+        if record is None:
+            return None
+        return record["expires_at"] if record["expires_at"] is not None else float("inf")
+
+    def expiries(self) -> List[Tuple[str, float]]:
+        return [(sid, record["expires_at"]) for sid, record in list(self._records.items())
+                if record["expires_at"] is not None]
+
+    def count(self, status: Optional[str] = None) -> int:
+        now = time.time()
+        return sum(
+            1 for session_id, record in list(self._records.items())
+            if self._live(session_id, now) and (status is None or record["data"].get("status") == status)
+        )
+
+    def purge_expired(self, now: Optional[float] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        now = now or time.time()
+        with self._lock:
+            expired = [sid for sid, record in self._records.items()
+                       if record["expires_at"] is not None and record["expires_at"] <= now]
+            return [(sid, self._records.pop(sid)["data"]) for sid in expired]
+
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite in WAL mode - readers never block the writer, and every worker process shares the file
+
+    Status, timestamps and expiry are indexed columns; metadata and result are JSON text.
+    Read-modify-write updates run in BEGIN IMMEDIATE transactions, so they are atomic across
+    processes. Connections are per thread and per process (never shared across fork).
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            status TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            expires_at REAL,
+            data TEXT NOT NULL,
+            result TEXT
+        );
+        CREATE INDEX IF NOT EXISTS sessions_status ON sessions (status, updated_at);
+        CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at);
+    """
+    LIVE = "(expires_at IS NULL OR expires_at > ?)"
+
+    def __init__(self, path: str, ttl_seconds: Optional[float] = None):
+        super().__init__(ttl_seconds)
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(self.SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        if getattr(self._local, "pid", None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")  # Durable at checkpoints; safe under WAL
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    @contextmanager
+    def _transaction(self):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def create(self, session_id: str, session: Dict[str, Any], ttl_seconds: Optional[float] = None):
+        now = time.time()
+        created_at = session.get("created_at")
+        self._connection().execute(
+            "INSERT OR REPLACE INTO sessions (session_id, status, created_at, updated_at, expires_at, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                session_id,
+                session.get("status"),
+                created_at.timestamp() if isinstance(created_at, datetime) else now,
+                now,
+                self._expires_at(now, ttl_seconds),
+                encode(session)
+            )
+        )
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            f"SELECT data FROM sessions WHERE session_id = ? AND {self.LIVE}", (session_id, time.time())
+        ).fetchone()
+        return decode(row[0]) if row else None
+
+    def __contains__(self, session_id: str) -> bool:
+        return self._connection().execute(
+            f"SELECT 1 FROM sessions WHERE session_id = ? AND {self.LIVE}", (session_id, time.time())
+        ).fetchone() is not None
+
+    def transition(self, session_id, to_status, fields=None, from_statuses=None, result=None) -> bool:
+        with self._transaction() as connection:
+            row = connection.execute(
+                f"SELECT status, data FROM sessions WHERE session_id = ? AND {self.LIVE}", (session_id, time.time())
+            ).fetchone()
+            if row is None or (from_statuses is not None and row[0] not in from_statuses):
+                return False
+
+            data = decode(row[1])
+            data.update(fields or {})
+            if to_status is not None:
+                data["status"] = to_status
+
+            assignments = "status = ?, data = ?, updated_at = ?"
+            params = [data.get("status"), encode(data), time.time()]
+            if result is not None:
+                assignments += ", result = ?"
+                params.append(encode(result))
+
+            connection.execute(f"UPDATE sessions SET {assignments} WHERE session_id = ?", (*params, session_id))
+            return True
+
+    def get_result(self, session_id: str) -> Optional[Any]:
+        row = self._connection().execute(
+            f"SELECT result FROM sessions WHERE session_id = ? AND {self.LIVE}", (session_id, time.time())
+        ).fetchone()
+        return decode(row[0]) if row else None
+
+    def touch(self, session_id: str, ttl_seconds: Optional[float] = None) -> bool:
+        now = time.time()
+        cursor = self._connection().execute(
+            f"UPDATE sessions SET expires_at = ? WHERE session_id = ? AND {self.LIVE}",
+            (self._expires_at(now, ttl_seconds), session_id, now)
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._transaction() as connection:
+            row = connection.execute("SELECT data FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            connection.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        return decode(row[0]) if row else None
+
+    def expiry(self, session_id: str) -> Optional[float]:
+        row = self._connection().execute(
+            "SELECT expires_at FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0] if row[0] is not None else float("inf")
+
+    def expiries(self) -> List[Tuple[str, float]]:
+        return self._connection().execute(
+            "SELECT session_id, expires_at FROM sessions WHERE expires_at IS NOT NULL"
+        ).fetchall()
+
+    def count(self, status: Optional[str] = None) -> int:
+        query = f"SELECT COUNT(*) FROM sessions WHERE {self.LIVE}"
+        params: List[Any] = [time.time()]
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        return self._connection().execute(query, params).fetchone()[0]
+
+    def purge_expired(self, now: Optional[float] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        now = now or time.time()
+        with self._transaction() as connection:
+            rows = connection.execute(
+                "SELECT session_id, data FROM sessions WHERE expires_at <= ?", (now,)
+            ).fetchall()
+            connection.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+        return [(session_id, decode(data)) for session_id, data in rows]
+
+
+class RedisSessionStore(SessionStore):
+    """Redis (or any server speaking its protocol) - one hash per session plus sorted-set indexes
+
+    <prefix>:session:<id> holds status, timestamps, metadata and result. <prefix>:expiry scores
+    sessions by expiry time and <prefix>:status:<status> by last update, so counts and purges
+    never scan the keyspace. Updates are optimistic WATCH/MULTI transactions, retried on conflict.
+    """
+
+    def __init__(self, client=None, url: Optional[str] = None, prefix: str = "fwea",
+                 ttl_seconds: Optional[float] = None):
+        super().__init__(ttl_seconds)
+        if client is None:
+            import redis  # Optional dependency - only needed for this backend
+            client = redis.Redis.from_url(url or "redis://localhost:6379/0")
+        self.client = client
+        self.prefix = prefix
+        self.expiry_key = f"{prefix}:expiry"
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}:session:{session_id}"
+
+    def _status_key(self, status: Optional[str]) -> str:
+        return f"{self.prefix}:status:{status}"
+
+    @staticmethod
+    def _text(value) -> Optional[str]:
+        return value.decode() if isinstance(value, bytes) else value
+
+    def _is_live(self, expires_at, now: float) -> bool:
+        expires_at = self._text(expires_at)
+        return not expires_at or float(expires_at) > now
+
+    def _schedule_expiry(self, pipe, session_id: str, expires_at: Optional[float]):
+        # Sessions without a TTL still sit in the expiry index, at +inf, so counts stay O(log n)
+        pipe.zadd(self.expiry_key, {session_id: expires_at if expires_at else float("inf")})
+        if expires_at:
+            # Safety net if purges stop running - long enough that a purge still sees the metadata
+            pipe.expireat(self._key(session_id), int(expires_at) + 3600)
+        else:
+            pipe.persist(self._key(session_id))
+
+    def create(self, session_id: str, session: Dict[str, Any], ttl_seconds: Optional[float] = None):
+        now = time.time()
+        expires_at = self._expires_at(now, ttl_seconds)
+        created_at = session.get("created_at")
+
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(self._key(session_id))
+        pipe.hset(self._key(session_id), mapping={
+            "status": session.get("status") or "",
+            "created_at": created_at.timestamp() if isinstance(created_at, datetime) else now,
+            "updated_at": now,
+            "expires_at": expires_at or "",
+            "data": encode(session)
+        })
+        pipe.zadd(self._status_key(session.get("status")), {session_id: now})
+        self._schedule_expiry(pipe, session_id, expires_at)
+        pipe.execute()
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        data, expires_at = self.client.hmget(self._key(session_id), "data", "expires_at")
+        if data is None or not self._is_live(expires_at, time.time()):
+            return None
+        return decode(self._text(data))
+
+    def __contains__(self, session_id: str) -> bool:
+        expires_at = self.client.hget(self._key(session_id), "expires_at")
+        return expires_at is not None and self._is_live(expires_at, time.time())
+
+    def transition(self, session_id, to_status, fields=None, from_statuses=None, result=None) -> bool:
+        key = self._key(session_id)
+
+        def apply(pipe) -> bool:
+            status, data, expires_at = pipe.hmget(key, "status", "data", "expires_at")
+            status = self._text(status) or None
+            if data is None or not self._is_live(expires_at, time.time()):
+                return False
+            if from_statuses is not None and status not in from_statuses:
+                return False
+
+            merged = decode(self._text(data))
+            merged.update(fields or {})
+            if to_status is not None:
+                merged["status"] = to_status
+            new_status = merged.get("status")
+            now = time.time()
+
+            mapping = {"status": new_status or "", "data": encode(merged), "updated_at": now}
+            if result is not None:
+                mapping["result"] = encode(result)
+
+            pipe.multi()
+            pipe.hset(key, mapping=mapping)
+            if new_status != status:
+                pipe.zrem(self._status_key(status), session_id)
+            pipe.zadd(self._status_key(new_status), {session_id: now})
+            return True
+
+        return self.client.transaction(apply, key, value_from_callable=True)
+
+    def get_result(self, session_id: str) -> Optional[Any]:
+        result, expires_at = self.client.hmget(self._key(session_id), "result", "expires_at")
+        if result is None or not self._is_live(expires_at, time.time()):
+            return None
+        return decode(self._text(result))
+
+    def touch(self, session_id: str, ttl_seconds: Optional[float] = None) -> bool:
+        key = self._key(session_id)
+
+        def apply(pipe) -> bool:
+            expires_at = pipe.hget(key, "expires_at")
+            now = time.time()
+            if expires_at is None or not self._is_live(expires_at, now):
+                return False
+
+            new_expiry = self._expires_at(now, ttl_seconds)
+            pipe.multi()
+            pipe.hset(key, "expires_at", new_expiry or "")
+            self._schedule_expiry(pipe, session_id, new_expiry)
+            return True
+
+        return self.client.transaction(apply, key, value_from_callable=True)
+
+    def delete(self, session_id: str) -> Optional[Dict[str, Any]]:
+        key = self._key(session_id)
+
+        def apply(pipe) -> Optional[Dict[str, Any]]:
+            status, data = pipe.hmget(key, "status", "data")
+            pipe.multi()
+            pipe.delete(key)
+            pipe.zrem(self.expiry_key, session_id)
+            pipe.zrem(self._status_key(self._text(status) or None), session_id)
+            return decode(self._text(data))
+
+        return self.client.transaction(apply, key, value_from_callable=True)
+
+    def expiry(self, session_id: str) -> Optional[float]:
+        expires_at = self.client.hget(self._key(session_id), "expires_at")
+        if expires_at is None:
+            return None
+        expires_at = self._text(expires_at)
+        return float(expires_at) if expires_at else float("inf")
+
+    def expiries(self) -> List[Tuple[str, float]]:
+        return [(self._text(session_id), score)
+                for session_id, score in self.client.zrangebyscore(self.expiry_key, "-inf", "(inf", withscores=True)]
+
+    def count(self, status: Optional[str] = None) -> int:
+        now = time.time()
+        if status is None:
+            return self.client.zcount(self.expiry_key, f"({now}", "+inf")
+
+        # The status index still holds expired sessions until they are purged - check their expiry
+        session_ids = self.client.zrange(self._status_key(status), 0, -1)
+        if not session_ids:
+            return 0
+        return sum(1 for expires_at in self.client.zmscore(self.expiry_key, session_ids)
+                   if expires_at is not None and expires_at > now)
+
+    def purge_expired(self, now: Optional[float] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        now = now or time.time()
+        purged = []
+
+        for session_id in self.client.zrangebyscore(self.expiry_key, "-inf", now):
+            session_id = self._text(session_id)
+            key = self._key(session_id)
+
+            def apply(pipe):
+                status, data, expires_at = pipe.hmget(key, "status", "data", "expires_at")
+                if data is not None and self._is_live(expires_at, now):
+                    return None  # Touched since the range query
+                pipe.multi()
+                pipe.delete(key)
+                pipe.zrem(self.expiry_key, session_id)
+                pipe.zrem(self._status_key(self._text(status) or None), session_id)
+                return decode(self._text(data)) or {}
+
+            session = self.client.transaction(apply, key, value_from_callable=True)
+            if session is not None:
+                purged.append((session_id, session))
+
+        return purged
+
+
+def open_session_store(
+    backend: str,
+    path: str,
+    redis_url: Optional[str] = None,
+    prefix: str = "fwea",
+    ttl_seconds: Optional[float] = None
+) -> SessionStore:
+    """Build the configured store: 'sqlite' (default), 'redis' or 'memory'"""
+
+    if backend == "redis":
+        store = RedisSessionStore(url=redis_url, prefix=prefix, ttl_seconds=ttl_seconds)
+    elif backend == "memory":
+        store = MemorySessionStore(ttl_seconds=ttl_seconds)
+    else:
+        store = SQLiteSessionStore(path, ttl_seconds=ttl_seconds)
+
+    logger.info(f"🗃️ Session store: {type(store).__name__}")
+    return store
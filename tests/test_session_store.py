@@ -0,0 +1,152 @@
+# Session store contract - every backend claims, expires, purges and counts sessions the same way
+
+import os
+import time
+import threading
+from datetime import datetime
+
+import pytest
+
+from session_store import MemorySessionStore, RedisSessionStore, SQLiteSessionStore
+
+TTL = 60.0
+SHORT_TTL = 0.2
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemorySessionStore(ttl_seconds=TTL)
+    if request.param == "sqlite":
+        return SQLiteSessionStore(os.path.join(tmp_path, "sessions.db"), ttl_seconds=TTL)
+
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisSessionStore(client=fakeredis.FakeRedis(), prefix="test", ttl_seconds=TTL)
+
+
+def expire(store, *session_ids):
+    """Create sessions with a short TTL and wait until it has passed"""
+    for session_id in session_ids:
+        store.create(session_id, {"status": "uploaded"}, ttl_seconds=SHORT_TTL)
+    time.sleep(SHORT_TTL * 1.5)
+
+
+def test_create_and_get_round_trip(store):
+    created_at = datetime(2024, 1, 2, 3, 4, 5)
+    store.create("s1", {"status": "uploaded", "filename": "track.wav", "created_at": created_at})
+
+    session = store.get("s1")
+    assert session == {"status": "uploaded", "filename": "track.wav", "created_at": created_at}
+    assert "s1" in store
+    assert store.get("missing") is None
+    assert "missing" not in store
+
+
+def test_transition_merges_fields_and_stores_result(store):
+    store.create("s1", {"status": "uploaded"})
+
+    assert store.transition("s1", "real_complete", {"job_id": "job_1"}, result={"text": "clean"})
+    assert store.get("s1") == {"status": "real_complete", "job_id": "job_1"}
+    assert store.get_result("s1") == {"text": "clean"}
+
+    # Without a result the stored payload is kept
+    assert store.update("s1", {"downloads": 1})
+    assert store.get("s1")["downloads"] == 1
+    assert store.get_result("s1") == {"text": "clean"}
+
+
+def test_transition_only_from_allowed_statuses(store):
+    store.create("s1", {"status": "uploaded"})
+
+    assert store.transition("s1", "queued", from_statuses=("uploaded",))
+    assert not store.transition("s1", "queued", from_statuses=("uploaded",))
+    assert store.get("s1")["status"] == "queued"
+    assert not store.transition("missing", "queued")
+
+
+def test_transition_claim_is_atomic_across_threads(store):
+    store.create("s1", {"status": "uploaded"})
+    barrier = threading.Barrier(8)
+    claims = []
+
+    def claim(worker: int):
+        barrier.wait()
+        claims.append(store.transition("s1", "queued", {"worker": worker}, from_statuses=("uploaded",)))
+
+    threads = [threading.Thread(target=claim, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert claims.count(True) == 1
+    assert store.get("s1")["status"] == "queued"
+
+
+def test_expired_session_is_invisible(store):
+    store.create("s1", {"status": "uploaded"})
+    expire(store, "s2")
+
+    assert store.get("s2") is None
+    assert "s2" not in store
+    assert store.get_result("s2") is None
+    assert not store.transition("s2", "queued")
+    assert not store.touch("s2")
+    assert store.get("s1") is not None
+
+
+def test_touch_restarts_ttl(store):
+    store.create("s1", {"status": "uploaded"}, ttl_seconds=SHORT_TTL)
+    first = store.expiry("s1")
+
+    assert store.touch("s1", ttl_seconds=TTL)
+    assert store.expiry("s1") > first + TTL / 2
+    time.sleep(SHORT_TTL * 1.5)
+    assert store.get("s1") is not None
+
+
+def test_session_without_ttl_never_expires(store):
+    store.ttl_seconds = None
+    store.create("s1", {"status": "uploaded"})
+
+    assert store.expiry("s1") == float("inf")
+    assert "s1" not in dict(store.expiries())
+    assert store.purge_expired(time.time() + 10 * TTL) == []
+    assert store.get("s1") is not None
+
+
+def test_purge_expired_returns_and_removes_only_expired(store):
+    store.create("live", {"status": "uploaded"})
+    expire(store, "old_1", "old_2")
+
+    purged = dict(store.purge_expired())
+    assert purged == {"old_1": {"status": "uploaded"}, "old_2": {"status": "uploaded"}}
+    assert store.expiry("old_1") is None
+    assert store.purge_expired() == []
+    assert store.get("live") == {"status": "uploaded"}
+
+
+def test_count_excludes_expired_sessions(store):
+    store.create("s1", {"status": "uploaded"})
+    store.create("s2", {"status": "uploaded"})
+    store.transition("s2", "queued")
+    expire(store, "old")
+
+    # Expired but not yet purged
+    assert store.count() == 2
+    assert len(store) == 2
+    assert store.count("uploaded") == 1
+    assert store.count("queued") == 1
+    assert store.count("real_complete") == 0
+
+    store.purge_expired()
+    assert store.count("uploaded") == 1
+
+
+def test_delete_returns_metadata(store):
+    store.create("s1", {"status": "uploaded"})
+
+    assert store.delete("s1") == {"status": "uploaded"}
+    assert store.get("s1") is None
+    assert store.count() == 0
+    assert store.delete("s1") is None
@@ -0,0 +1,103 @@
+# FWEA-I Upload Limits - size-capped, hashed upload copies shared by both backends
+# The body is counted on the ASGI receive stream, so a chunked upload without a Content-Length is
+# cut off as soon as it crosses the limit instead of being spooled whole by the multipart parser
+
+import os
+import asyncio
+import hashlib
+from typing import Iterable, Tuple
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+CHUNK_SIZE = 1024 * 1024
+MULTIPART_OVERHEAD = 64 * 1024  # Allowance for form boundaries and headers counted in the body
+
+
+def too_large_detail(max_bytes: int) -> str:
+    return f"File too large. Maximum: {max_bytes // (1024 * 1024)}MB"
+
+
+class UploadTooLarge(HTTPException):
+    """Raised from the receive stream - FastAPI re-raises HTTPExceptions from body parsing as-is"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(status_code=413, detail=too_large_detail(max_bytes))
+
+
+class UploadLimitMiddleware:
+    """413 for POSTs to `paths` whose body exceeds max_bytes plus the multipart overhead
+
+    A declared Content-Length over the limit is rejected before any of the body is read; every
+    other body is counted as it arrives and the request fails the moment it crosses the limit.
+    """
+
+    def __init__(self, app, paths: Iterable[str], max_bytes: int, overhead: int = MULTIPART_OVERHEAD):
+        self.app = app
+        self.paths = set(paths)
+        self.max_bytes = max_bytes
+        self.limit = max_bytes + overhead
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        declared = dict(scope["headers"]).get(b"content-length", b"")
+        if declared.isdigit() and int(declared) > self.limit:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def counted_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.limit:
+                    raise UploadTooLarge(self.max_bytes)
+            return message
+
+        async def tracked_send(message):
+            nonlocal response_started
+            response_started = response_started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, counted_receive, tracked_send)
+        except UploadTooLarge:
+            if response_started:
+                raise
+            await self._reject(scope, receive, send)  # Raised outside FastAPI's exception handling
+
+    async def _reject(self, scope, receive, send):
+        await JSONResponse({"detail": too_large_detail(self.max_bytes)}, status_code=413)(scope, receive, send)
+
+
+async def save_upload(upload: UploadFile, path: str, max_bytes: int, chunk_size: int = CHUNK_SIZE) -> Tuple[int, str]:
+    """Copy an upload to path in fixed-size chunks, off the event loop, hashing as it goes
+
+    Only one chunk is held in memory at a time. Crossing max_bytes aborts the copy at once
+    (413) and removes the partial file. Returns the byte count and the SHA-256 hex digest.
+    """
+
+    content_hash = hashlib.sha256()
+    size = 0
+    f = await asyncio.to_thread(open, path, "wb")
+
+    try:
+        while chunk := await upload.read(chunk_size):
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail=too_large_detail(max_bytes))
+            content_hash.update(chunk)
+            await asyncio.to_thread(f.write, chunk)
+    except BaseException:
+        await asyncio.to_thread(f.close)
+        await asyncio.to_thread(os.unlink, path)
+        raise
+
+    await asyncio.to_thread(f.close)
+    return size, content_hash.hexdigest()